@@ -44,24 +44,26 @@ import os
 import sys
 import serial
 
-import constants
-from interfaces.local import DebugInterface
-from interfaces.local import Serial
-from interfaces.local import USB
+from alphasign import constants
+from alphasign.interfaces.local import DebugInterface
+from alphasign.interfaces.local import Serial
+from alphasign.interfaces.local import USB
 
-from time import Time
-from date import Date
-from string import String
-from packet import Packet
-from text import Text
+from alphasign.time import Time
+from alphasign.date import Date
+from alphasign.string import String
+from alphasign.packet import Packet
+from alphasign.template import Template
+from alphasign.text import Text
 
-import charsets
-import colors
-import counters
-import devices
-import extchars
-import modes
-import positions
-import speeds
+from alphasign import charsets
+from alphasign import colors
+from alphasign import counters
+from alphasign import devices
+from alphasign import extchars
+from alphasign import markup
+from alphasign import modes
+from alphasign import positions
+from alphasign import speeds
 
 
@@ -14,6 +14,15 @@ READ_LARGE_DOTS       = "N"  # Read LARGE DOTS PICTURE file (p43)
 WRITE_ALPHAVISION     = "O"  # Write ALPHAVISION BULLETIN (p48)
 SET_TIMEOUT           = "T"  # Set Timeout Message (p118) (Alpha 2.0/3.0)
 
+# Type Codes (p9)
+TYPE_ALL_SIGNS        = "Z"  # All signs
+TYPE_ONE_LINE         = "1"  # One-line signs
+TYPE_TWO_LINE         = "2"  # Two-line signs
+
+# Sign Addresses (p10)
+ADDRESS_BROADCAST     = "00"  # All signs of the given type
+ADDRESS_WILDCARD      = "?"   # Matches any hex digit in that position
+
 UNLOCKED              = "U"
 LOCKED                = "L"
 
@@ -0,0 +1,128 @@
+"""
+A dashboard is a TEXT file whose changing fields live in STRING files.
+
+Writing a TEXT file restarts its display mode and sends the whole message;
+writing a STRING file only sends the new value and the sign updates it in
+place. :class:`Dashboard` lays this out automatically: every field of the
+layout gets its own STRING file, referenced from the TEXT file with
+:meth:`alphasign.string.String.call`, and updates only send the STRING files
+whose value changed::
+
+  board = Dashboard(sign, "%sTemp %%(temp)s  Wind %%(wind)s" %
+                    alphasign.colors.GREEN,
+                    fields={"temp": 5, "wind": 8}, mode=alphasign.modes.HOLD)
+  board.install()
+  board.update(temp="21C", wind="12 km/h")
+  board.update(temp="22C")  # sends one small STRING packet
+
+Fields are written as in :class:`alphasign.template.Template`.
+"""
+from alphasign import template
+from alphasign.interfaces import base
+from alphasign.string import String
+from alphasign.text import Text
+
+
+# Labels given to the STRING files of fields, in order. "1" to "5" are left
+# for the TARGET TEXT files that BaseInterface.allocate sets up.
+STRING_LABELS = "6789" + "abcdefghijklmnopqrstuvwxyz"
+
+# Size of a field's STRING file when none is given.
+DEFAULT_FIELD_SIZE = 16
+
+
+class Dashboard(object):
+  """TEXT file with fields backed by STRING files.
+
+  :ivar text: the :class:`alphasign.text.Text` holding the layout
+  :ivar strings: dict of field name to :class:`alphasign.string.String`
+  """
+
+  def __init__(self, interface, layout, fields=None, label=None,
+               position=None, mode=None, labels=STRING_LABELS):
+    """
+    :param interface: interface to write to
+    :param layout: message with ``%(name)s`` fields
+    :param fields: dict of field name to the largest size of its values
+                   (default: :const:`DEFAULT_FIELD_SIZE` for every field)
+    :param label: label of the TEXT file (default: "A")
+    :param position: constant from :mod:`alphasign.positions`
+    :param mode: constant from :mod:`alphasign.modes`
+    :param labels: labels to give the STRING files, in order
+    :exception ValueError: if there are more fields than labels
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    if fields is None:
+      fields = {}
+    names = []
+    for name in template.Template(layout).fields:
+      if name not in names:
+        names.append(name)
+    labels = [l for l in labels if l != label]
+    if len(names) > len(labels):
+      raise ValueError("%d fields but only %d STRING labels" %
+                       (len(names), len(labels)))
+
+    self.interface = interface
+    self.strings = {}
+    calls = {}
+    for name, string_label in zip(names, labels):
+      size = fields.get(name, DEFAULT_FIELD_SIZE)
+      self.strings[name] = String(label=string_label, size=size)
+      calls[name] = self.strings[name].call()
+    self.text = Text(layout % calls, label=label, position=position,
+                     mode=mode)
+    self._sent = {}
+
+  @property
+  def files(self):
+    """Files the dashboard needs allocated: the TEXT file and its STRING
+    files."""
+    return [self.text] + [self.strings[name] for name in sorted(self.strings)]
+
+  def install(self, other_files=(), **values):
+    """Allocate the dashboard's files, write all of them and show them.
+
+    This reconfigures the sign's memory, so any other files that should stay
+    on the sign must be given in ``other_files``. The run sequence is set to
+    the dashboard followed by the TEXT files among ``other_files``.
+
+    :param other_files: other files to allocate alongside the dashboard
+    :param values: initial field values (default: empty)
+    """
+    self._sent = {}
+    self.interface.allocate(list(other_files) + self.files)
+    for name in self.strings:
+      values.setdefault(name, "")
+    self.update(**values)
+    self.interface.write(self.text)
+    self.interface.set_run_sequence(
+      [self.text] + [f for f in other_files if isinstance(f, Text)])
+
+  def update(self, **values):
+    """Set field values, sending only the STRING files that changed.
+
+    Values longer than their field are cut to fit.
+
+    :returns: names of the fields sent
+    :rtype: list
+    """
+    changed = []
+    for name, value in values.items():
+      string = self.strings[name]
+      value = ("%s" % value)[:string.size]
+      if self._sent.get(name) != value:
+        string.data = value
+        changed.append(name)
+    if not changed:
+      return changed
+
+    # Several changed fields go out together as one nested packet.
+    batch = self.interface.batch()
+    for name in changed:
+      batch.write(self.strings[name])
+    if batch.flush() is not False:
+      for name in changed:
+        self._sent[name] = self.strings[name].data
+    return changed
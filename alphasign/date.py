@@ -1,6 +1,7 @@
-import constants
 import datetime
-from packet import Packet
+
+from alphasign import constants
+from alphasign.packet import Packet
 
 
 class Date(object):
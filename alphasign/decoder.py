@@ -0,0 +1,128 @@
+"""
+Decoding of raw packet streams back into commands.
+
+:class:`Decoder` takes the bytes sent to signs in chunks of any size, as read
+from a serial line, a TCP connection or a capture file
+(:func:`alphasign.interfaces.capture.read_capture`), and returns the packets
+they hold with their commands decoded::
+
+  decoder = Decoder()
+  for chunk in iter(lambda: port.read(4096), b""):
+    for pkt in decoder.feed(chunk):
+      for command in pkt.commands:
+        if isinstance(command, WriteText):
+          print(command.label, repr(command.data))
+
+Noise between packets is skipped, and a packet cut short by the start of
+another is discarded and counted in :attr:`Decoder.errors`.
+"""
+import collections
+
+from alphasign import constants
+from alphasign import parser
+
+
+ENCODING = "latin-1"
+
+DecodedPacket = collections.namedtuple("DecodedPacket",
+                                       "type address commands")
+"""A decoded packet: type code, sign address and list of commands."""
+
+WriteText = collections.namedtuple("WriteText",
+                                   "label position mode data")
+"""WRITE TEXT command. ``position`` and ``mode`` are None when the command
+leaves them out."""
+
+WriteString = collections.namedtuple("WriteString", "label data")
+"""WRITE STRING command."""
+
+WriteSpecial = collections.namedtuple("WriteSpecial", "label data value")
+"""WRITE SPECIAL FUNCTION command. ``label`` selects the function (see the
+``SPECIAL_*`` constants of :mod:`alphasign.parser`), and ``value`` is the
+decoded data of the common ones: a list of
+:class:`alphasign.parser.MemoryEntry` for a memory configuration, an (hour,
+minute) tuple for the time of day and a list of TEXT labels for a run
+sequence; it is None for the others."""
+
+Command = collections.namedtuple("Command", "code label data")
+"""Any other command: command code, file label and data."""
+
+
+def decode_command(command):
+  """Decode one command.
+
+  :param command: command code followed by its fields, as a string
+
+  :rtype: :class:`WriteText`, :class:`WriteString`, :class:`WriteSpecial` or
+          :class:`Command`
+  """
+  code = command[:1]
+  label = command[1:2]
+  data = command[2:]
+  if code == constants.WRITE_TEXT:
+    if data[:1] != constants.ESC:
+      return WriteText(label, None, None, data)
+    mode_size = data[2:3] == "n" and 2 or 1
+    return WriteText(label, data[1:2], data[2:2 + mode_size],
+                     data[2 + mode_size:])
+  if code == constants.WRITE_STRING:
+    return WriteString(label, data)
+  if code == constants.WRITE_SPECIAL:
+    return WriteSpecial(label, data, _special_value(label, data))
+  return Command(code, label, data)
+
+
+def _special_value(label, data):
+  if label == parser.SPECIAL_MEMORY_CONFIGURATION:
+    return parser.parse_memory_configuration(data)
+  if label == parser.SPECIAL_TIME:
+    try:
+      return int(data[0:2]), int(data[2:4])
+    except ValueError:
+      return None
+  if label == parser.SPECIAL_RUN_SEQUENCE:
+    return list(data[2:])
+  return None
+
+
+class Decoder(object):
+  """Incremental decoder of packet streams.
+
+  :ivar packets: number of packets decoded
+  :ivar errors: number of damaged packets discarded
+  """
+
+  def __init__(self, max_size=65536):
+    """
+    :param max_size: longest packet to buffer; a packet that grows beyond this
+                     without an EOT is discarded
+    """
+    self.max_size = max_size
+    self.packets = 0
+    self.errors = 0
+    self._buffer = ""
+
+  def feed(self, data):
+    """Add a chunk of the stream.
+
+    :param data: bytes (or a latin-1 string) of any length
+
+    :returns: packets completed by this chunk
+    :rtype: list of :class:`DecodedPacket`
+    """
+    if not isinstance(data, str):
+      data = data.decode(ENCODING)
+    bodies, errors, self._buffer = parser.split_packets(self._buffer + data,
+                                                        self.max_size)
+    split = parser.split_commands
+    decoded = []
+    for body in bodies:
+      commands = split(body)
+      if commands is None:
+        errors += 1
+      else:
+        decoded.append(DecodedPacket(body[0], body[1:3],
+                                     [decode_command(c) for c in commands]))
+    self.packets += len(decoded)
+    self.errors += errors
+    return decoded
@@ -0,0 +1,377 @@
+"""
+Interfaces for use with :mod:`asyncio` (Python 3.5 and later).
+
+These mirror the interfaces in :mod:`alphasign.interfaces.local`, but
+:meth:`~AsyncInterface.write` and the special functions are coroutines, so a
+sign can be driven from an event loop without blocking it::
+
+  import asyncio
+  import alphasign
+  from alphasign.interfaces import aio
+
+  async def main():
+    sign = aio.AsyncSerial("/dev/ttyUSB0")
+    await sign.connect()
+    await sign.clear_memory()
+    msg = alphasign.Text("hello", label="A")
+    await sign.allocate((msg,))
+    await sign.write(msg)
+    await sign.disconnect()
+
+  asyncio.run(main())
+
+Packets are built by the same classes as for the blocking interfaces
+(:class:`alphasign.text.Text`, :class:`alphasign.string.String`,
+:class:`alphasign.packet.Packet`). The asyncio interfaces are not
+:class:`alphasign.interfaces.base.BaseInterface` objects, and they cannot read
+from the sign. Helpers that write without awaiting
+(:class:`alphasign.dashboard.Dashboard`,
+:class:`alphasign.memory.MemoryPlanner`,
+:class:`alphasign.interfaces.fleet.SignFleet`, ...) raise TypeError when given
+one.
+"""
+import asyncio
+import functools
+import os
+import time
+
+from alphasign import packet
+from alphasign.interfaces import base
+from alphasign.interfaces import local
+
+
+class AsyncInterface(object):
+  """Base class for asyncio interfaces.
+
+  The special functions (:meth:`clear_memory`, :meth:`beep`,
+  :meth:`soft_reset`, :meth:`allocate`, :meth:`set_run_sequence`,
+  :meth:`set_run_times`) build the same packets as those of
+  :class:`alphasign.interfaces.base.BaseInterface`, and return coroutines
+  that must be awaited. Writes are serialized, so packets from concurrent
+  tasks never interleave on the wire. Slow commands are paced with
+  non-blocking waits.
+  """
+
+  asynchronous = True
+  write_cache = None
+  metrics = None
+  metrics_name = None
+  type_code = None
+  address = None
+  command_delays = base.COMMAND_DELAYS
+
+  _ready_at = None
+
+  # These only build packets and hand them to write(), which is a coroutine
+  # here.
+  _addressed = base.BaseInterface._addressed
+  _delay = base.BaseInterface._delay
+  _busy = base.BaseInterface._busy
+  enable_write_cache = base.BaseInterface.enable_write_cache
+  enable_metrics = base.BaseInterface.enable_metrics
+  clear_memory = base.BaseInterface.clear_memory
+  beep = base.BaseInterface.beep
+  soft_reset = base.BaseInterface.soft_reset
+  allocate = base.BaseInterface.allocate
+  set_run_sequence = base.BaseInterface.set_run_sequence
+
+  def __init__(self):
+    self._lock = asyncio.Lock()
+
+  async def connect(self):
+    """Establish connection to the device."""
+    pass
+
+  async def disconnect(self):
+    """Disconnect from the device."""
+    pass
+
+  async def write(self, data):
+    """Write a packet to the sign.
+
+    If the write is cancelled, any part of the packet still queued for
+    transmission is discarded.
+
+    :param data: :class:`alphasign.packet.Packet`,
+                 :class:`alphasign.text.Text` or
+                 :class:`alphasign.string.String` object
+    :returns: False if the write failed
+    """
+    pkt = self._addressed(packet.as_packet(data))
+    if self.write_cache is not None:
+      if self.write_cache.is_current(pkt.contents, pkt.type,
+                                     pkt.address):
+        return True
+    async with self._lock:
+      await self.wait_ready()
+      if self.metrics is None:
+        result = await self._write(pkt)
+      else:
+        start = time.time()
+        try:
+          result = await self._write(pkt)
+        except Exception:
+          self.metrics.record_write(self.metrics_name, pkt.contents,
+                                    len(pkt), time.time() - start, False)
+          raise
+        self.metrics.record_write(self.metrics_name, pkt.contents, len(pkt),
+                                  time.time() - start, result is not False)
+      self._busy(pkt.contents)
+    if result is not False and self.write_cache is not None:
+      self.write_cache.update(pkt.contents, pkt.type, pkt.address)
+    return result
+
+  async def wait_ready(self):
+    """Wait until the sign has finished the last slow command."""
+    ready_at = self._ready_at
+    self._ready_at = None
+    if ready_at is not None and ready_at > time.time():
+      await asyncio.sleep(ready_at - time.time())
+
+  async def _write(self, data):
+    return False
+
+  async def set_run_times(self, files):
+    """Set the run time table on the device (see
+    :meth:`alphasign.interfaces.base.BaseInterface.set_run_times`).
+
+    :returns: result of :meth:`write`
+    """
+    if not files:
+      return True
+    return await base.BaseInterface.set_run_times(self, files)
+
+  def at(self, address, type_code=None):
+    """Address commands to particular signs (see
+    :meth:`alphasign.interfaces.base.BaseInterface.at`).
+
+    :param address: two-character sign address; either character may be the
+                    wildcard ``?``
+    :param type_code: type code (default: this interface's, or all signs)
+
+    :rtype: :class:`AsyncAddressed` object
+    """
+    if type_code is None:
+      type_code = self.type_code
+    return AsyncAddressed(self, address, type_code)
+
+  def batch(self, max_size=None):
+    """Collect writes and send them together as nested packets.
+
+    The returned batch is used with ``async with``; commands are queued with
+    plain (non-awaited) calls::
+
+      async with sign.batch() as batch:
+        batch.write(counter_str)
+        batch.set_run_sequence((counter_txt,))
+
+    :param max_size: largest transmission to build, in bytes
+
+    :rtype: :class:`AsyncBatch` object
+    """
+    return AsyncBatch(self, max_size=max_size)
+
+
+class AsyncAddressed(AsyncInterface):
+  """Interface that sends packets to particular signs through another asyncio
+  interface. Usually created with :meth:`AsyncInterface.at`.
+  """
+
+  command_delays = {}
+
+  def __init__(self, interface, address, type_code=None):
+    """
+    :param interface: asyncio interface to send the packets through
+    :param address: sign address
+    :param type_code: type code (default: all signs)
+    """
+    AsyncInterface.__init__(self)
+    self.interface = interface
+    self.address = address
+    self.type_code = type_code
+
+  async def _write(self, data):
+    pkt = packet.as_packet(data).addressed(self.type_code, self.address)
+    return await self.interface.write(pkt)
+
+
+class AsyncBatch(base.Batch):
+  """:class:`alphasign.interfaces.base.Batch` for asyncio interfaces."""
+
+  asynchronous = True
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    if exc_type is None:
+      await self.flush()
+    else:
+      self._pending = []
+    return False
+
+  async def flush(self):
+    """Send all queued commands.
+
+    :returns: False if any write failed
+    :rtype: bool
+    """
+    packets = self.packets()
+    self._pending = []
+    result = True
+    for pkt in packets:
+      if await self.interface.write(pkt) is False:
+        result = False
+    return result
+
+
+class AsyncSerial(AsyncInterface):
+  """Connect to a sign through a local serial device.
+
+  On POSIX systems the port is written without blocking and drain waits are
+  scheduled on the event loop. Elsewhere, writes run in the loop's default
+  executor.
+  """
+
+  def __init__(self, device="/dev/ttyS0", **kwargs):
+    """
+    :param device: character device (default: /dev/ttyS0)
+    :type device: string
+
+    Other keyword arguments (``baudrate``, ``parity``, ...) are passed to
+    :class:`alphasign.interfaces.local.Serial`.
+    """
+    AsyncInterface.__init__(self)
+    self.debug = False
+    self._serial = local.Serial(device, **kwargs)
+    self._serial.debug = False
+    self._fd = None
+
+  @property
+  def device(self):
+    return self._serial.device
+
+  async def connect(self):
+    """Establish connection to the device."""
+    self._serial.connect()
+    try:
+      self._fd = self._serial._conn.fileno()
+    except (AttributeError, OSError):
+      self._fd = None
+    else:
+      os.set_blocking(self._fd, False)
+
+  async def disconnect(self):
+    """Disconnect from the device."""
+    self._serial.disconnect()
+    self._fd = None
+
+  async def _write(self, packet):
+    if not self._serial._conn:
+      await self.connect()
+    if self.debug:
+      print("Writing packet: %s" % repr(packet))
+    loop = asyncio.get_running_loop()
+    data = packet.data
+    if self._fd is None:
+      write = functools.partial(self._serial._conn.write, data)
+      try:
+        await loop.run_in_executor(None, write)
+      except OSError:
+        await self.disconnect()
+        return False
+      return True
+
+    try:
+      await self._send(loop, memoryview(data))
+      await self._drain()
+    except asyncio.CancelledError:
+      self._serial._conn.reset_output_buffer()
+      raise
+    except OSError:
+      await self.disconnect()
+      return False
+    return True
+
+  async def _send(self, loop, view):
+    while view:
+      try:
+        written = os.write(self._fd, view)
+      except BlockingIOError:
+        written = 0
+      view = view[written:]
+      if view:
+        writable = loop.create_future()
+        loop.add_writer(self._fd, writable.set_result, None)
+        try:
+          await writable
+        finally:
+          loop.remove_writer(self._fd)
+
+  async def _drain(self):
+    # Wait until the UART has shifted out every queued byte, sleeping for
+    # roughly the time the remaining bytes take on the wire.
+    conn = self._serial._conn
+    byte_time = 1.0 / self._serial.bytes_per_second
+    while True:
+      waiting = conn.out_waiting
+      if not waiting:
+        return
+      await asyncio.sleep(waiting * byte_time)
+
+
+class AsyncUSB(AsyncInterface):
+  """Connect to a sign using USB.
+
+  PyUSB transfers are blocking, so they run in the loop's default executor.
+  A cancelled write stops waiting immediately, but a transfer already handed
+  to the USB stack runs to completion.
+  """
+
+  def __init__(self, usb_id):
+    """
+    :param usb_id: tuple of (vendor id, product id) identifying the USB device
+    """
+    AsyncInterface.__init__(self)
+    self._usb = local.USB(usb_id)
+
+  @property
+  def debug(self):
+    return self._usb.debug
+
+  @debug.setter
+  def debug(self, value):
+    self._usb.debug = value
+
+  async def connect(self, reset=True):
+    """
+    :param reset: send a USB RESET command to the sign.
+    :exception usb.USBError: on USB-related errors
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, self._usb.connect, reset)
+
+  async def disconnect(self):
+    """ """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, self._usb.disconnect)
+
+  async def _write(self, packet):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, self._usb._write, packet)
+
+
+class AsyncDebugInterface(AsyncInterface):
+  """Dummy interface used only for debugging.
+
+  This does nothing except print the contents of written packets.
+  """
+
+  def __init__(self):
+    AsyncInterface.__init__(self)
+    self.debug = True
+
+  async def _write(self, packet):
+    if self.debug:
+      print("Writing packet: %s" % repr(packet))
+    return True
@@ -1,29 +1,239 @@
+import collections
 import time
 
 from alphasign import constants
+from alphasign import memory
 from alphasign import packet
+from alphasign import parser
+from alphasign.interfaces import cache
+from alphasign.interfaces.metrics import Metrics
 
-import alphasign.string
-import alphasign.text
+
+# Seconds a sign needs after each of these SPECIAL FUNCTION commands before it
+# accepts another packet: memory configuration (clear_memory and allocate)
+# and soft reset.
+COMMAND_DELAYS = {
+  constants.WRITE_SPECIAL + "$": 1.0,
+  constants.WRITE_SPECIAL + ",": 1.0,
+}
 
 
 class BaseInterface(object):
   """Base interface from which all other interfaces inherit.
 
   This class contains utility methods for fundamental sign features.
+  Subclasses implement :meth:`_write` to send a packet to the device.
+
+  :ivar write_cache: :class:`alphasign.interfaces.cache.WriteCache` in use, or
+                     None (see :meth:`enable_write_cache`)
+  :ivar metrics: :class:`alphasign.interfaces.metrics.Metrics` recording the
+                 writes, or None (see :meth:`enable_metrics`)
+  :ivar type_code: type code used for packets that are not explicitly
+                   addressed, or None to send them to all signs
+  :ivar address: sign address used for packets that are not explicitly
+                 addressed, or None to broadcast them
+  :ivar command_delays: seconds the sign is busy after each command, keyed by
+                        command prefix (see :const:`COMMAND_DELAYS`)
+  :ivar probe_ready: while the sign is busy, poll it with read commands and
+                     continue as soon as it answers, instead of waiting out
+                     the full delay (for signs that answer read commands)
+  :ivar read_interval: seconds to wait before reading again when nothing was
+                       received
+  :ivar asynchronous: whether the methods return coroutines to be awaited
+                      (see :mod:`alphasign.interfaces.aio`)
   """
 
+  write_cache = None
+  metrics = None
+  metrics_name = None
+  type_code = None
+  address = None
+  read_timeout = 2
+  command_delays = COMMAND_DELAYS
+  probe_ready = False
+  probe_interval = 0.1
+  read_interval = 0.01
+  asynchronous = False
+
+  _parser = None
+  _ready_at = None
+
   def write(self, data):
+    """Write a packet to the sign.
+
+    :param data: :class:`alphasign.packet.Packet`,
+                 :class:`alphasign.text.Text` or
+                 :class:`alphasign.string.String` object
+    :returns: False if the write failed
+    """
+    pkt = self._addressed(packet.as_packet(data))
+    if self.write_cache is not None:
+      if self.write_cache.is_current(pkt.contents, pkt.type,
+                                     pkt.address):
+        return True
+    self.wait_ready()
+    if self.metrics is None:
+      result = self._write(pkt)
+    else:
+      start = time.time()
+      try:
+        result = self._write(pkt)
+      except Exception:
+        self.metrics.record_write(self.metrics_name, pkt.contents, len(pkt),
+                                  time.time() - start, False)
+        raise
+      self.metrics.record_write(self.metrics_name, pkt.contents, len(pkt),
+                                time.time() - start, result is not False)
+    if result is not False and self.write_cache is not None:
+      self.write_cache.update(pkt.contents, pkt.type, pkt.address)
+    self._busy(pkt.contents)
+    return result
+
+  def _write(self, data):
     return False
 
+  def _read(self, size):
+    """Read up to ``size`` bytes received from the sign.
+
+    Subclasses that can receive data implement this; it should return an
+    empty string if nothing arrives within a short timeout.
+    """
+    return ""
+
+  def _receives(self):
+    # Interfaces that do not implement _read never receive anything;
+    # wrappers ask the interface they wrap.
+    method = type(self)._read
+    return getattr(method, "__func__", method) is not _no_read
+
+  def _addressed(self, pkt):
+    # Apply this interface's default type code and address.
+    if pkt.explicit or (self.type_code is None and self.address is None):
+      return pkt
+    return pkt.addressed(self.type_code, self.address)
+
+  def _delay(self, commands):
+    delay = 0
+    for command in commands:
+      delay = max(delay, self.command_delays.get(command[:2], 0))
+    return delay
+
+  def _busy(self, commands):
+    # Note when the sign will be ready again after these commands.
+    delay = self._delay(commands)
+    if delay:
+      self._ready_at = time.time() + delay
+
+  def wait_ready(self):
+    """Wait until the sign has finished the last slow command.
+
+    :meth:`clear_memory`, :meth:`allocate` and :meth:`soft_reset` return as
+    soon as the command is sent; the next write waits here only for whatever
+    is left of the sign's delay. If :attr:`probe_ready` is set, the sign is
+    polled and the wait ends as soon as it answers.
+
+    :rtype: None
+    """
+    ready_at = self._ready_at
+    if ready_at is None:
+      return
+    self._ready_at = None
+    if self.probe_ready and self._receives():
+      read_timeout = self.read_timeout
+      try:
+        while time.time() < ready_at:
+          self.read_timeout = min(self.probe_interval,
+                                  max(ready_at - time.time(), 0))
+          if self.read([(constants.READ_SPECIAL, parser.SPECIAL_TIME)])[0]:
+            return
+      finally:
+        self.read_timeout = read_timeout
+    remaining = ready_at - time.time()
+    if remaining > 0:
+      time.sleep(remaining)
+
+  def at(self, address, type_code=None):
+    """Address commands to particular signs.
+
+    Everything written through the returned interface, including the special
+    functions, goes to the given sign address::
+
+      sign.at("05").write(msg)
+      sign.at("1?").set_run_sequence((msg,))
+
+    :param address: two-character sign address; either character may be the
+                    wildcard ``?``
+    :param type_code: type code (default: this interface's, or all signs)
+
+    :rtype: :class:`Addressed` object
+    """
+    if type_code is None:
+      type_code = self.type_code
+    return Addressed(self, address, type_code)
+
+  def enable_write_cache(self, max_entries=256):
+    """Skip writes of TEXT and STRING data the sign already holds.
+
+    The last data written to each file label is remembered, and writing the
+    same data to the same label again sends nothing. The cache is invalidated
+    whenever memory is cleared or reconfigured, or the sign is reset; call
+    ``write_cache.invalidate()`` if the sign may have been changed by other
+    means.
+
+    :param max_entries: number of file labels to remember
+
+    :rtype: :class:`alphasign.interfaces.cache.WriteCache` object
+    """
+    self.write_cache = cache.WriteCache(max_entries=max_entries)
+    return self.write_cache
+
+  def enable_metrics(self, metrics=None, name=None):
+    """Count the packets, bytes and errors of every write and time them.
+
+    Special functions are counted per function (``E$`` for
+    :meth:`allocate`, ``E.`` for :meth:`set_run_sequence`, ...).
+
+    :param metrics: :class:`alphasign.interfaces.metrics.Metrics` to record
+                    into, possibly shared with other interfaces
+                    (default: a new one)
+    :param name: name of this interface in the metrics
+                 (default: its class name)
+
+    :rtype: :class:`alphasign.interfaces.metrics.Metrics` object
+    """
+    if metrics is None:
+      metrics = Metrics()
+    self.metrics = metrics
+    self.metrics_name = name or type(self).__name__
+    return metrics
+
+  def batch(self, max_size=None):
+    """Collect writes and send them together as nested packets.
+
+    Every command written to the returned :class:`Batch` is held back until
+    the ``with`` block ends, then sent in as few transmissions as possible::
+
+      with sign.batch() as batch:
+        batch.write(counter_str)
+        batch.write(counter_txt)
+        batch.set_run_sequence((counter_txt,))
+
+    :param max_size: largest transmission to build, in bytes
+                     (default: :const:`alphasign.packet.MAX_NESTED_SIZE`)
+
+    :rtype: :class:`Batch` object
+    """
+    return Batch(self, max_size=max_size)
+
   def clear_memory(self):
     """Clear the sign's memory.
 
-    :rtype: None
+    The next write waits until the sign has finished (see :meth:`wait_ready`).
+
+    :returns: result of :meth:`write`
     """
     pkt = packet.Packet("%s%s" % (constants.WRITE_SPECIAL, "$"))
-    self.write(pkt)
-    time.sleep(1)
+    return self.write(pkt)
 
   def beep(self, frequency=0, duration=0.1, repeat=0):
     """Make the sign beep.
@@ -32,7 +242,7 @@ class BaseInterface(object):
     :param duration: beep duration, 0.1 - 1.5
     :param repeat: number of times to repeat, 0 - 15
 
-    :rtype: None
+    :returns: result of :meth:`write`
     """
     if frequency < 0:
       frequency = 0
@@ -52,60 +262,62 @@ class BaseInterface(object):
 
     pkt = packet.Packet("%s%s%02X%X%X" % (constants.WRITE_SPECIAL, "(2",
                                           frequency, duration, repeat))
-    self.write(pkt)
+    return self.write(pkt)
 
   def soft_reset(self):
     """Perform a soft reset on the sign.
 
     This is non-destructive and does not clear the sign's memory.
 
-    :rtype: None
+    :returns: result of :meth:`write`
     """
     pkt = packet.Packet("%s%s" % (constants.WRITE_SPECIAL, ","))
-    self.write(pkt)
+    return self.write(pkt)
 
-  def allocate(self, files):
+  def allocate(self, files, targets=5):
     """Allocate a set of files on the device.
 
+    This replaces the sign's whole memory configuration, which also clears
+    the contents of every file.
+
     :param files: list of file objects (:class:`alphasign.text.Text`,
                                         :class:`alphasign.string.String`, ...)
+                  or :class:`alphasign.parser.MemoryEntry` tuples
+    :param targets: number of 100-byte TARGET TEXT files to allocate, labeled
+                    "1" onwards (default: 5); labels used by ``files`` are
+                    skipped
 
-    :rtype: None
+    :returns: result of :meth:`write`
     """
     seq = ""
+    labels = set()
     for obj in files:
-      size_hex = "%04X" % obj.size
+      if not isinstance(obj, parser.MemoryEntry):
+        obj = memory.entry(obj)
+      labels.add(obj.label)
       # format: FTPSIZEQQQQ
-
-      if type(obj) == alphasign.string.String:
-        file_type = "B"
-        qqqq = "0000"  # unused for strings
-        lock = constants.LOCKED
-      else:  # if type(obj) == alphasign.text.Text:
-        file_type = "A"
-        qqqq = "FFFF"  # TODO(ms): start/end times
-        lock = constants.UNLOCKED
-
-      alloc_str = ("%s%s%s%s%s" %
+      alloc_str = ("%s%s%s%04X%s" %
                    (obj.label,  # file label to allocate
-                   file_type,   # file type
-                   lock,
-                   size_hex,    # size in hex
-                   qqqq))
+                    obj.type,   # file type
+                    obj.lock,
+                    obj.size,   # size in hex
+                    obj.qqqq))
       seq += alloc_str
 
-    # allocate special TARGET TEXT files 1 through 5
-    for i in range(5):
+    # allocate special TARGET TEXT files 1 through 5 (by default)
+    for i in range(targets):
+      if "%d" % (i + 1) in labels:
+        continue  # a sign can't hold two files with one label
       alloc_str = ("%s%s%s%s%s" %
                    ("%d" % (i + 1),
                    "A",    # file type
                    constants.UNLOCKED,
-                   "%04X" % 100,
+                   "%04X" % memory.TARGET_SIZE,
                    "FEFE"))
       seq += alloc_str
 
     pkt = packet.Packet("%s%s%s" % (constants.WRITE_SPECIAL, "$", seq))
-    self.write(pkt)
+    return self.write(pkt)
 
   def set_run_sequence(self, files, locked=False):
     """Set the run sequence on the device.
@@ -117,11 +329,322 @@ class BaseInterface(object):
                                         :class:`alphasign.string.String`, ...)
     :param locked: allow sequence to be changed with IR keyboard
 
-    :rtype: None
+    :returns: result of :meth:`write`
     """
     seq_str = ".T"
     seq_str += locked and "L" or "U"
     for obj in files:
       seq_str += obj.label
     pkt = packet.Packet("%s%s" % (constants.WRITE_SPECIAL, seq_str))
-    self.write(pkt)
+    return self.write(pkt)
+
+  def set_run_times(self, files):
+    """Set the run time table on the device.
+
+    This changes when TEXT files are displayed to their ``start`` and
+    ``stop`` times without reallocating memory. The times are followed by
+    the run sequence set with :meth:`set_run_sequence`.
+
+    :param files: list of TEXT file objects (:class:`alphasign.text.Text`,
+                                             ...)
+
+    :returns: result of :meth:`write`
+    """
+    if not files:
+      return True
+    commands = []
+    for obj in files:
+      commands.append("%s%s%s%s" % (constants.WRITE_SPECIAL,
+                                    parser.SPECIAL_RUN_TIME_TABLE, obj.label,
+                                    memory.entry(obj).qqqq))
+    pkt = packet.Packet(len(commands) == 1 and commands[0] or commands)
+    return self.write(pkt)
+
+  def read(self, requests, window=4):
+    """Send read commands and collect the sign's responses.
+
+    Up to ``window`` commands are kept outstanding at a time, so several reads
+    cost little more than one round trip. Responses are matched to requests
+    by command and file label.
+
+    :param requests: list of (read command code, label) tuples, e.g.
+                     ``(constants.READ_STRING, "1")``
+    :param window: largest number of requests awaiting a response
+
+    :returns: :class:`alphasign.parser.Response` for each request, or None
+              where no response arrived within :attr:`read_timeout` seconds,
+              or at once if the interface cannot receive
+    :rtype: list
+    """
+    if not self._receives():
+      return [None] * len(requests)
+    if self._parser is None:
+      self._parser = parser.PacketParser()
+    results = [None] * len(requests)
+    pending = collections.deque()  # ((response code, label), index)
+    sent = 0
+    deadline = time.time() + self.read_timeout
+    while (sent < len(requests) or pending) and time.time() < deadline:
+      while sent < len(requests) and len(pending) < window:
+        code, label = requests[sent]
+        self.write(packet.Packet("%s%s" % (code, label)))
+        pending.append(((parser.RESPONSE_CODES[code], label), sent))
+        sent += 1
+
+      data = self._read(1024)
+      if not data:
+        time.sleep(max(min(self.read_interval, deadline - time.time()), 0))
+        continue
+      for frame in self._parser.feed(data):
+        for response in frame.responses:
+          for item in pending:
+            if item[0] == (response.command, response.label):
+              pending.remove(item)
+              results[item[1]] = response
+              deadline = time.time() + self.read_timeout
+              break
+    return results
+
+  def _read_one(self, code, label):
+    response = self.read([(code, label)])[0]
+    if response is None:
+      return None
+    return response.data
+
+  def read_text(self, label):
+    """Read the contents of a TEXT file.
+
+    :returns: file contents, or None if the sign did not answer
+    """
+    return self._read_one(constants.READ_TEXT, label)
+
+  def read_string(self, label):
+    """Read the contents of a STRING file.
+
+    :returns: file contents, or None if the sign did not answer
+    """
+    return self._read_one(constants.READ_STRING, label)
+
+  def read_special(self, label):
+    """Read a SPECIAL FUNCTION.
+
+    :param label: one of the ``SPECIAL_*`` constants in
+                  :mod:`alphasign.parser`
+
+    :returns: raw response data, or None if the sign did not answer
+    """
+    return self._read_one(constants.READ_SPECIAL, label)
+
+  def read_time(self):
+    """Read the time of day from the sign's clock.
+
+    :returns: (hour, minute) tuple, or None if the sign did not answer
+    """
+    data = self.read_special(parser.SPECIAL_TIME)
+    if data is None or len(data) < 4:
+      return None
+    return int(data[0:2]), int(data[2:4])
+
+  def read_memory_configuration(self):
+    """Read the sign's file table.
+
+    :returns: list of :class:`alphasign.parser.MemoryEntry`, or None if the
+              sign did not answer
+    """
+    data = self.read_special(parser.SPECIAL_MEMORY_CONFIGURATION)
+    if data is None:
+      return None
+    return parser.parse_memory_configuration(data)
+
+  def reconcile(self, files, planner=None):
+    """Bring the sign to a set of files, sending only what it lacks.
+
+    The sign's memory configuration and the contents of the wanted files are
+    read back first, so after a restart files already on the sign are not
+    cleared and written again. If the sign does not answer, the files are
+    allocated and written.
+
+    :param files: list of file objects with contents
+                  (:class:`alphasign.text.Text`,
+                  :class:`alphasign.string.String`, ...)
+    :param planner: :class:`alphasign.memory.MemoryPlanner` to update, so
+                    later changes can go through it
+                    (default: a new planner)
+
+    :rtype: :class:`alphasign.memory.Plan` that was carried out
+    """
+    if planner is None:
+      planner = memory.MemoryPlanner()
+    entries = self.read_memory_configuration()
+    if not entries:
+      planner.reset()
+      return planner.apply(self, files)
+
+    # Contents only matter if every file can stay where it is; otherwise the
+    # sign is reallocated and everything is written anyway.
+    allocated = dict([(e.label, e) for e in entries])
+    written = {}
+    wanted = [memory.entry(obj) for obj in files]
+    if all([memory.fits(w, allocated.get(w.label)) for w in wanted]):
+      requests = []
+      for w in wanted:
+        requests.append((w.type == "B" and constants.READ_STRING or
+                         constants.READ_TEXT, w.label))
+      for response in self.read(requests):
+        if response is not None:
+          written[response.label] = (response.command + response.label +
+                                     response.data)
+    planner.reset(entries, written)
+    return planner.apply(self, files)
+
+
+_no_read = BaseInterface.__dict__["_read"]
+
+
+def check_blocking(interface):
+  """Check that an interface's methods return their results directly.
+
+  Helpers that write through an interface without awaiting it call this, so
+  that an asyncio interface is refused instead of its writes being dropped.
+
+  :exception TypeError: if ``interface`` is asynchronous
+  """
+  if getattr(interface, "asynchronous", False):
+    raise TypeError("%s is an asyncio interface; its writes must be awaited"
+                    % type(interface).__name__)
+
+
+class Addressed(BaseInterface):
+  """Interface that sends packets to particular signs through another
+  interface. Usually created with :meth:`BaseInterface.at`.
+  """
+
+  command_delays = {}
+
+  def __init__(self, interface, address, type_code=None):
+    """
+    :param interface: interface to send the packets through
+    :param address: sign address
+    :param type_code: type code (default: all signs)
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    check_blocking(interface)
+    self.interface = interface
+    self.address = address
+    self.type_code = type_code
+
+  def _write(self, data):
+    pkt = packet.as_packet(data).addressed(self.type_code, self.address)
+    return self.interface.write(pkt)
+
+  def _receives(self):
+    return self.interface._receives()
+
+  def _read(self, size):
+    return self.interface._read(size)
+
+
+class Batch(BaseInterface):
+  """Interface that queues commands for another interface.
+
+  Queued commands are packed into nested packets of at most ``max_size`` bytes
+  when :meth:`flush` is called or the ``with`` block ends. If the block raises
+  an exception, queued commands are discarded.
+  """
+
+  command_delays = {}
+
+  def __init__(self, interface, max_size=None):
+    """
+    :param interface: interface to send the packets through
+    :param max_size: largest transmission to build, in bytes
+                     (default: :const:`alphasign.packet.MAX_NESTED_SIZE`)
+    :exception TypeError: if ``interface`` is an asyncio interface (use its
+                          own :meth:`batch`)
+    """
+    if not self.asynchronous:
+      check_blocking(interface)
+    if max_size is None:
+      max_size = packet.MAX_NESTED_SIZE
+    self.interface = interface
+    self.max_size = max_size
+    self._pending = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    if exc_type is None:
+      self.flush()
+    else:
+      self._pending = []
+    return False
+
+  def _write(self, data):
+    """Queue a packet, TEXT or STRING object.
+
+    :param data: :class:`alphasign.packet.Packet`,
+                 :class:`alphasign.text.Text` or
+                 :class:`alphasign.string.String` object
+    """
+    pkt = packet.as_packet(data)
+    if pkt.explicit:
+      destination = (pkt.type, pkt.address)
+    else:
+      destination = None
+    for command in pkt.contents:
+      self._pending.append((destination, command))
+    return True
+
+  def packets(self):
+    """Group the queued commands into nested packets.
+
+    A command that does not fit within ``max_size`` on its own is sent alone.
+    Commands for different sign addresses are never nested together, and a
+    command the sign needs time to carry out (see
+    :attr:`BaseInterface.command_delays`) ends its packet.
+
+    :rtype: list of :class:`alphasign.packet.Packet` objects
+    """
+    packets = []
+    group = []
+    sizes = []
+    current = None
+    for destination, command in self._pending:
+      if group and (destination != current or
+                    packet.nested_size(sizes + [len(command)]) >
+                    self.max_size):
+        packets.append(_group_packet(group, current))
+        group = []
+        sizes = []
+      current = destination
+      group.append(command)
+      sizes.append(len(command))
+      if self.interface._delay([command]):
+        packets.append(_group_packet(group, current))
+        group = []
+        sizes = []
+    if group:
+      packets.append(_group_packet(group, current))
+    return packets
+
+  def flush(self):
+    """Send all queued commands.
+
+    :returns: False if any write failed
+    :rtype: bool
+    """
+    packets = self.packets()
+    self._pending = []
+    result = True
+    for pkt in packets:
+      if self.interface.write(pkt) is False:
+        result = False
+    return result
+
+
+def _group_packet(commands, destination):
+  if destination is None:
+    return packet.Packet(commands)
+  type_code, address = destination
+  return packet.Packet(commands, type=type_code, address=address)
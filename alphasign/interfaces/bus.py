@@ -0,0 +1,147 @@
+from alphasign import constants
+from alphasign import packet
+from alphasign.interfaces import base
+
+
+HEX_DIGITS = "0123456789ABCDEF"
+
+
+def matches(pattern, address):
+  """Check whether a sign address matches an address pattern.
+
+  :param pattern: two-character address; ``00`` matches every address and
+                  ``?`` matches any digit in its position
+  :param address: two-character sign address
+
+  :rtype: bool
+  """
+  if pattern == constants.ADDRESS_BROADCAST:
+    return True
+  for p, a in zip(pattern.upper(), address.upper()):
+    if p != constants.ADDRESS_WILDCARD and p != a:
+      return False
+  return True
+
+
+def cover(targets, addresses):
+  """Find few address patterns that reach exactly a set of signs.
+
+  :param targets: addresses that must receive the packet
+  :param addresses: every address on the bus; patterns reaching any other
+                    address on the bus are not used
+
+  :returns: list of address patterns
+  """
+  targets = set([a.upper() for a in targets])
+  addresses = set([a.upper() for a in addresses]) | targets
+  if len(targets) > 1 and targets == addresses:
+    return [constants.ADDRESS_BROADCAST]
+
+  candidates = []
+  for digit in HEX_DIGITS:
+    for pattern in (digit + constants.ADDRESS_WILDCARD,
+                    constants.ADDRESS_WILDCARD + digit):
+      reached = set([a for a in addresses if matches(pattern, a)])
+      if len(reached) > 1 and reached <= targets:
+        candidates.append((pattern, reached))
+
+  patterns = []
+  remaining = set(targets)
+  while remaining:
+    best = None
+    for pattern, reached in candidates:
+      gain = len(reached & remaining)
+      if gain > 1 and (best is None or gain > best[0]):
+        best = (gain, pattern, reached)
+    if best is None:
+      break
+    patterns.append(best[1])
+    remaining -= best[2]
+  return patterns + sorted(remaining)
+
+
+class BusScheduler(object):
+  """Send packets for many addressed signs sharing one bus (e.g. RS-485).
+
+  Packets are queued with :meth:`write` for a list of sign addresses. When
+  :meth:`flush` is called, each distinct packet is sent once per address
+  pattern needed to reach its signs: a single broadcast when every sign on
+  the bus gets it, wildcard addresses (``1?``) for whole groups, and
+  individual addresses otherwise::
+
+    bus = BusScheduler(alphasign.Serial("/dev/ttyS0"),
+                       ["01", "02", "03", "10", "11"])
+    bus.write(weather_txt, ["01", "02", "03", "10", "11"])
+    bus.write(gate_txt, ["10", "11"])
+    bus.write(delay_txt, ["03"])
+    bus.flush()  # sends 3 packets instead of 8
+
+  Each sign still receives its packets in the order they were queued.
+
+  :ivar transmissions: number of packets sent
+  :ivar saved: number of per-sign packets that did not have to be sent
+  """
+
+  def __init__(self, interface, addresses, type_code=None):
+    """
+    :param interface: interface connected to the bus
+    :param addresses: addresses of every sign on the bus
+    :param type_code: type code of the packets
+                      (default: :const:`alphasign.constants.TYPE_ALL_SIGNS`)
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    self.interface = interface
+    self.addresses = [a.upper() for a in addresses]
+    self.type_code = type_code
+    self.transmissions = 0
+    self.saved = 0
+    self._queue = []  # [commands, set of addresses]
+    self._last = {}  # address -> index of its last entry in the queue
+
+  def write(self, data, addresses=None):
+    """Queue a packet, TEXT or STRING object for some signs.
+
+    :param addresses: sign addresses (default: every sign on the bus)
+    """
+    if addresses is None:
+      addresses = self.addresses
+    addresses = set([a.upper() for a in addresses])
+    commands = tuple(packet.commands(data))
+
+    # Merge with an earlier entry for the same packet, unless one of the
+    # signs has something queued after it.
+    for index in range(len(self._queue) - 1, -1, -1):
+      entry = self._queue[index]
+      if entry[0] == commands:
+        if all([self._last.get(a, -1) <= index for a in addresses]):
+          entry[1] |= addresses
+          for a in addresses:
+            self._last[a] = index
+          return
+        break
+
+    self._queue.append([commands, addresses])
+    for a in addresses:
+      self._last[a] = len(self._queue) - 1
+
+  def flush(self):
+    """Send all queued packets.
+
+    :returns: False if any write failed
+    :rtype: bool
+    """
+    queue = self._queue
+    self._queue = []
+    self._last = {}
+    result = True
+    for commands, addresses in queue:
+      patterns = cover(addresses, self.addresses)
+      for pattern in patterns:
+        pkt = packet.Packet(list(commands), type=self.type_code,
+                            address=pattern)
+        if self.interface.write(pkt) is False:
+          result = False
+      self.transmissions += len(patterns)
+      self.saved += len(addresses) - len(patterns)
+    return result
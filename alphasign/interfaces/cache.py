@@ -0,0 +1,140 @@
+from collections import OrderedDict
+
+from alphasign import constants
+
+
+# Commands whose data is remembered, keyed by command code and file label.
+CACHED_COMMANDS = (constants.WRITE_TEXT, constants.WRITE_STRING)
+
+# SPECIAL FUNCTION commands after which the sign's files can no longer be
+# trusted: memory configuration (which also clears memory) and soft reset.
+INVALIDATING_SPECIALS = ("$", ",")
+
+
+def command_key(command, type=None, address=None):
+  """Get the cache key for a single command.
+
+  :param command: command string as carried in a packet
+  :param type: type code of the packet carrying the command
+  :param address: sign address of the packet carrying the command
+  :returns: (type code, address, command code and file label) tuple, or None
+            if the command is not cached
+  """
+  if len(command) >= 2 and command[0] in CACHED_COMMANDS:
+    return (type, address, command[:2])
+  return None
+
+
+def overlaps(a, b):
+  """Check whether two packet destinations can reach the same sign.
+
+  :param a: (type code, address) tuple; None for either means any
+  :param b: (type code, address) tuple
+
+  :rtype: bool
+  """
+  if a == b:
+    return True
+  for x, y, any_value in ((a[0], b[0], constants.TYPE_ALL_SIGNS),
+                          (a[1], b[1], constants.ADDRESS_BROADCAST)):
+    if x is None or y is None or x == any_value or y == any_value:
+      continue
+    if len(x) != len(y):
+      return False
+    for p, q in zip(x.upper(), y.upper()):
+      if p != q and constants.ADDRESS_WILDCARD not in (p, q):
+        return False
+  return True
+
+
+class WriteCache(object):
+  """Shadow copy of the files last written to a sign.
+
+  The cache remembers the last TEXT and STRING data sent for each file label
+  of each sign address so that writing identical data again can be skipped.
+  It is enabled on an interface with
+  :meth:`alphasign.interfaces.base.BaseInterface.enable_write_cache`.
+
+  :ivar hits: number of writes skipped because the sign already had the data
+  :ivar misses: number of writes that had to be sent
+  """
+
+  def __init__(self, max_entries=256):
+    """
+    :param max_entries: number of file labels to remember; the least recently
+                        written labels are forgotten first
+    """
+    self.max_entries = max_entries
+    self.hits = 0
+    self.misses = 0
+    self._entries = OrderedDict()
+    self._destinations = set()
+
+  def __len__(self):
+    return len(self._entries)
+
+  def is_current(self, commands, type=None, address=None):
+    """Check whether the sign already holds the data in a list of commands.
+
+    The hit and miss counters are updated.
+
+    :param commands: list of command strings
+    :param type: type code the commands are sent to
+    :param address: sign address the commands are sent to
+    :rtype: bool
+    """
+    for command in commands:
+      key = command_key(command, type, address)
+      if key is None or self._entries.get(key) != command:
+        self.misses += 1
+        return False
+    self.hits += 1
+    return True
+
+  def update(self, commands, type=None, address=None):
+    """Record a list of commands as sent to the sign.
+
+    :param commands: list of command strings
+    :param type: type code the commands were sent to
+    :param address: sign address the commands were sent to
+    """
+    destination = (type, address)
+    for command in commands:
+      key = command_key(command, type, address)
+      if key is not None:
+        self._forget(key, destination)
+        self._entries[key] = command
+        while len(self._entries) > self.max_entries:
+          self._entries.popitem(last=False)
+      elif (command[:1] == constants.WRITE_SPECIAL and
+            command[1:2] in INVALIDATING_SPECIALS):
+        self._forget(None, destination)
+
+  def _forget(self, key, destination):
+    # Forget what a write to a destination makes stale: the file (or every
+    # file, if key is None) on the signs it reaches, and writes cached for
+    # groups of signs that include them.
+    self._destinations.add(destination)
+    if len(self._destinations) == 1:
+      if key is None:
+        self._entries.clear()
+      else:
+        self._entries.pop(key, None)
+      return
+    for cached in list(self._entries):
+      if ((key is None or cached[2] == key[2]) and
+          overlaps(cached[:2], destination)):
+        del self._entries[cached]
+
+  def invalidate(self, label=None):
+    """Forget cached data.
+
+    :param label: file label to forget (default: forget everything)
+    """
+    if label is None:
+      self._entries.clear()
+      self._destinations.clear()
+      return
+    for key in list(self._entries):
+      if key[2][1:] == label:
+        del self._entries[key]
@@ -0,0 +1,208 @@
+"""
+Recording of the packets written to a sign, and timed replay.
+
+:class:`Recorder` wraps an interface and appends every packet written through
+it to a capture file, with the time it was written::
+
+  sign = Recorder(alphasign.Serial("/dev/ttyS0"), "lobby.cap")
+  ...
+  sign.close()
+
+:func:`replay` sends a capture to an interface again, at the original pace,
+faster, or as fast as the interface allows. It can also be run from the
+command line, against an emulated sign by default::
+
+  python -m alphasign.interfaces.capture lobby.cap --speed 10
+  python -m alphasign.interfaces.capture lobby.cap --max --device /dev/ttyS1
+
+A capture file starts with :const:`MAGIC` and the wall clock time the
+recording started (a little-endian double). Each packet follows as its
+offset from the start in microseconds (unsigned 64-bit), its length
+(unsigned 32-bit) and its bytes.
+"""
+import argparse
+import collections
+import struct
+import sys
+import time
+
+from alphasign import parser
+from alphasign.interfaces import base
+from alphasign.packet import Packet
+
+
+MAGIC = b"ALPHACAP\x01"
+
+ENCODING = "latin-1"
+
+_HEADER = struct.Struct("<d")
+_RECORD = struct.Struct("<QI")
+
+# time.monotonic is Python 3 only.
+_clock = getattr(time, "monotonic", time.time)
+
+Record = collections.namedtuple("Record", "time data")
+"""A captured packet: seconds since the recording started and its bytes."""
+
+ReplayResult = collections.namedtuple("ReplayResult",
+                                      "packets bytes failures elapsed")
+"""Outcome of :func:`replay`: packets and bytes sent, writes that failed and
+seconds the replay took."""
+
+
+class Recorder(base.BaseInterface):
+  """Interface that records the packets it writes to a capture file.
+
+  Each packet is flushed to the file as it is written, so the capture
+  survives the program being killed.
+
+  :ivar started: wall clock time the recording started
+  :ivar packets: number of packets recorded
+  """
+
+  command_delays = {}
+
+  def __init__(self, interface, path):
+    """
+    :param interface: interface to send the packets through
+    :param path: capture file to create, or a writable binary file object
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    self.interface = interface
+    if hasattr(path, "write"):
+      self._file = path
+    else:
+      self._file = open(path, "wb")
+    self.started = time.time()
+    self.packets = 0
+    self._start = _clock()
+    self._file.write(MAGIC + _HEADER.pack(self.started))
+    self._file.flush()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def close(self):
+    """Close the capture file."""
+    self._file.close()
+
+  def _write(self, data):
+    offset = int((_clock() - self._start) * 1e6)
+    self._file.write(_RECORD.pack(offset, len(data.data)) + data.data)
+    # A capture is most wanted after a crash, so don't leave it buffered.
+    self._file.flush()
+    self.packets += 1
+    return self.interface.write(data)
+
+  def _receives(self):
+    return self.interface._receives()
+
+  def _read(self, size):
+    return self.interface._read(size)
+
+
+def read_capture(path):
+  """Read the packets of a capture file.
+
+  :param path: capture file, or a readable binary file object
+
+  :returns: iterator of :class:`Record`
+  :exception ValueError: if the file is not a capture file
+  """
+  opened = not hasattr(path, "read")
+  f = opened and open(path, "rb") or path
+  try:
+    if f.read(len(MAGIC)) != MAGIC:
+      raise ValueError("not a capture file")
+    f.read(_HEADER.size)
+    while True:
+      head = f.read(_RECORD.size)
+      if len(head) < _RECORD.size:
+        return
+      offset, size = _RECORD.unpack(head)
+      data = f.read(size)
+      if len(data) < size:
+        return  # recording was cut short
+      yield Record(offset / 1e6, data)
+  finally:
+    if opened:
+      f.close()
+
+
+def packets(data):
+  """Rebuild the packets in captured bytes.
+
+  :rtype: list of :class:`alphasign.packet.Packet`, addressed as captured
+  """
+  frames = parser.PacketParser().feed(data.decode(ENCODING))
+  return [Packet([r.command + r.label + r.data for r in frame.responses],
+                 type=frame.type, address=frame.address)
+          for frame in frames]
+
+
+def replay(path, interface, speed=1.0):
+  """Send the packets of a capture to an interface.
+
+  :param path: capture file, or a readable binary file object
+  :param interface: interface to send the packets through
+  :param speed: how many times faster than recorded to send the packets;
+                None sends them as fast as the interface takes them
+
+  :rtype: :class:`ReplayResult`
+  """
+  sent = size = failures = 0
+  start = _clock()
+  for record in read_capture(path):
+    if speed:
+      wait = record.time / speed - (_clock() - start)
+      if wait > 0:
+        time.sleep(wait)
+    for pkt in packets(record.data):
+      if interface.write(pkt) is False:
+        failures += 1
+      sent += 1
+    size += len(record.data)
+  return ReplayResult(sent, size, failures, _clock() - start)
+
+
+def main(argv=None):
+  args = argparse.ArgumentParser(description="Replay a capture file.")
+  args.add_argument("capture", help="capture file")
+  pace = args.add_mutually_exclusive_group()
+  pace.add_argument("--speed", type=float, default=1.0,
+                    help="times faster than recorded (default: 1)")
+  pace.add_argument("--max", action="store_true",
+                    help="send as fast as possible")
+  target = args.add_mutually_exclusive_group()
+  target.add_argument("--device", help="serial device of a sign")
+  target.add_argument("--host", help="host[:port] of a sign on TCP")
+  options = args.parse_args(argv)
+
+  if options.device:
+    from alphasign.interfaces import local
+    interface = local.Serial(options.device)
+  elif options.host:
+    from alphasign.interfaces import network
+    host, _, port = options.host.partition(":")
+    interface = network.TCP(host, int(port or network.DEFAULT_PORT))
+  else:
+    from alphasign.interfaces import emulator
+    interface = emulator.Emulator()
+
+  result = replay(options.capture, interface,
+                  speed=not options.max and options.speed or None)
+  print("%d packets, %d bytes, %d failed in %.3fs (%.0f bytes/s)" %
+        (result.packets, result.bytes, result.failures, result.elapsed,
+         result.bytes / max(result.elapsed, 1e-9)))
+  if hasattr(interface, "elapsed"):
+    print("emulated sign link time: %.3fs" % interface.elapsed)
+  return result.failures and 1 or 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
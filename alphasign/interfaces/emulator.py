@@ -0,0 +1,293 @@
+"""
+Software model of a sign, for testing and benchmarking without hardware.
+
+:class:`Emulator` is an interface that parses every packet written to it the
+way a sign would and keeps the resulting state: the memory configuration,
+the contents of each file, the run sequence, run time table and clock. Read
+commands are answered, so :meth:`read_text`, :meth:`read_memory_configuration`
+and friends work against it::
+
+  sign = Emulator()
+  sign.allocate((counter_str, counter_txt))
+  sign.write(counter_str)
+  sign.files["1"]               # counter_str's data
+  sign.read_string("1")         # the same, through a read command
+
+Commands a sign would ignore (writes to files that are not allocated, memory
+configurations that don't fit, ...) are counted in :attr:`Emulator.errors`
+and don't change the state.
+
+Link time is simulated: :attr:`Emulator.elapsed` adds up the time each packet
+takes on a serial line of the given speed and the time the sign spends on
+slow commands. With ``realtime=True`` the emulator sleeps for that time
+instead, like a real sign would make a writer wait.
+"""
+import datetime
+import time
+
+from alphasign import constants
+from alphasign import parser
+from alphasign.interfaces import base
+from alphasign.interfaces import bus
+from alphasign.memory import MAX_STRING_SIZE
+from alphasign.packet import ENCODING
+
+
+# Memory pool of the emulated sign, in bytes.
+DEFAULT_MEMORY_SIZE = 32768
+
+# Label of the priority TEXT file, which needs no allocation.
+PRIORITY_LABEL = "0"
+
+
+class Emulator(base.BaseInterface):
+  """Interface to an emulated sign.
+
+  :ivar sign_address: two-character address the emulated sign answers to
+  :ivar memory: dict of label to the allocated
+                :class:`alphasign.parser.MemoryEntry`
+  :ivar files: dict of label to the data of each written file; TEXT data
+               starts with the display position and mode
+  :ivar specials: dict of SPECIAL FUNCTION label to the data last written
+                  with it (run sequence, run time table, ...)
+  :ivar packets: number of packets received
+  :ivar bytes: number of bytes received
+  :ivar errors: number of commands ignored
+  :ivar last_error: description of the last ignored command
+  :ivar elapsed: simulated seconds spent on the link and processing
+  """
+
+  def __init__(self, address="00", memory_size=DEFAULT_MEMORY_SIZE,
+               baudrate=4800, bits_per_byte=11, realtime=False):
+    """
+    :param address: two-character address of the emulated sign
+    :param memory_size: bytes of memory files can be allocated in
+    :param baudrate: simulated line speed, or None for no wire time
+    :param bits_per_byte: bits on the wire per byte (default: 7E2, 11 bits)
+    :param realtime: sleep for the simulated time instead of only adding it
+                     to :attr:`elapsed`
+    """
+    self.sign_address = address
+    self.memory_size = memory_size
+    self.baudrate = baudrate
+    self.bits_per_byte = bits_per_byte
+    self.realtime = realtime
+    self.debug = False
+    self.packets = 0
+    self.bytes = 0
+    self.errors = 0
+    self.last_error = None
+    self.elapsed = 0.0
+    self._received = parser.PacketParser()
+    self._replies = ""
+    self._clock = None  # (minutes past midnight, time it was set)
+    self.clear()
+
+  def clear(self):
+    """Remove every file, as clearing the sign's memory does."""
+    self.memory = {}
+    self.files = {}
+    self.specials = {}
+
+  @property
+  def free(self):
+    """Bytes of memory not allocated to files."""
+    return self.memory_size - sum([e.size for e in self.memory.values()])
+
+  @property
+  def run_sequence(self):
+    """Labels of the TEXT files in the run sequence, in order."""
+    return self.specials.get(parser.SPECIAL_RUN_SEQUENCE, "")[2:]
+
+  def connect(self):
+    """ """
+    pass
+
+  def disconnect(self):
+    """ """
+    pass
+
+  def wait_ready(self):
+    if self.realtime:
+      base.BaseInterface.wait_ready(self)
+
+  def _busy(self, commands):
+    if self.realtime:
+      base.BaseInterface._busy(self, commands)
+    else:
+      self.elapsed += self._delay(commands)
+
+  def _write(self, packet):
+    if self.debug:
+      print("Writing packet: %s" % repr(packet))
+    if self.baudrate:
+      wire = len(packet) * self.bits_per_byte / float(self.baudrate)
+      self.elapsed += wire
+      if self.realtime:
+        time.sleep(wire)
+    self._replies += self.receive(packet.data)
+    return True
+
+  def _read(self, size):
+    data = self._replies[:size]
+    self._replies = self._replies[size:]
+    return data
+
+  def receive(self, data):
+    """Process raw data received by the sign.
+
+    :param data: bytes of any number of (partial) packets
+
+    :returns: the sign's replies to completed read commands
+    :rtype: string
+    """
+    if not isinstance(data, str):
+      data = data.decode(ENCODING)
+    self.bytes += len(data)
+    replies = ""
+    for frame in self._received.feed(data):
+      replies += self.handle(frame)
+    return replies
+
+  def handle(self, frame):
+    """Carry out the commands of a received packet.
+
+    This can be given as the handler of a
+    :class:`alphasign.interfaces.network.FakeSignServer`.
+
+    :param frame: :class:`alphasign.parser.Frame`
+
+    :returns: replies to its read commands
+    :rtype: string
+    """
+    self.packets += 1
+    if not bus.matches(frame.address, self.sign_address):
+      return ""
+    replies = ""
+    for command in frame.responses:
+      handler = self._COMMANDS.get(command.command)
+      if handler is None:
+        self._ignore("unsupported command %r" % command.command)
+        continue
+      reply = handler(self, command.label, command.data)
+      if reply is not None:
+        replies += self._reply(command.command, command.label, reply)
+    return replies
+
+  def _ignore(self, reason):
+    self.errors += 1
+    self.last_error = reason
+
+  def _reply(self, code, label, data):
+    command = "%s%s%s%s%s" % (constants.STX, parser.RESPONSE_CODES[code],
+                              label, data, constants.ETX)
+    return "%s%s0%s%s%s%s" % (constants.NUL * 5, constants.SOH,
+                              self.sign_address, command,
+                              parser.checksum(command), constants.EOT)
+
+  def _store(self, label, prefix, data, file_type):
+    if not (file_type == "A" and label == PRIORITY_LABEL):
+      entry = self.memory.get(label)
+      if entry is None or entry.type != file_type:
+        self._ignore("file %r is not allocated" % label)
+        return
+      if len(data) > entry.size:
+        self._ignore("%d bytes written to %d-byte file %r" %
+                     (len(data), entry.size, label))
+        data = data[:entry.size]
+    self.files[label] = prefix + data
+
+  def _write_text(self, label, data):
+    # The display position and mode don't count against the file size.
+    # Special modes ("n" and a specifier) take two characters.
+    prefix = ""
+    if data.startswith(constants.ESC):
+      end = data[2:3] == "n" and 4 or 3
+      prefix, data = data[:end], data[end:]
+    self._store(label, prefix, data, "A")
+
+  def _write_string(self, label, data):
+    self._store(label, "", data, "B")
+
+  def _read_file(self, label, file_type):
+    entry = self.memory.get(label)
+    if entry is not None and entry.type != file_type:
+      return None
+    return self.files.get(label)
+
+  def _read_text(self, label, data):
+    return self._read_file(label, "A")
+
+  def _read_string(self, label, data):
+    return self._read_file(label, "B")
+
+  def _write_special(self, label, data):
+    if label == parser.SPECIAL_MEMORY_CONFIGURATION:
+      self._configure(data)
+    elif label == parser.SPECIAL_TIME:
+      try:
+        minutes = int(data[0:2]) * 60 + int(data[2:4])
+      except ValueError:
+        self._ignore("bad time %r" % data)
+        return
+      self._clock = (minutes, time.time())
+    elif label == ",":
+      pass  # soft reset keeps the files
+    elif label == parser.SPECIAL_RUN_TIME_TABLE:
+      entry = self.memory.get(data[:1])
+      if entry is None or entry.type != "A" or len(data) != 5:
+        self._ignore("bad run time table %r" % data)
+        return
+      self.memory[entry.label] = entry._replace(qqqq=data[1:5])
+    else:
+      self.specials[label] = data
+
+  def _configure(self, data):
+    if len(data) % 11:
+      self._ignore("bad memory configuration %r" % data)
+      return
+    entries = parser.parse_memory_configuration(data)
+    if len(entries) != len(data) // 11:
+      self._ignore("bad memory configuration %r" % data)
+      return
+    if len(set([e.label for e in entries])) != len(entries):
+      self._ignore("label allocated twice")
+      return
+    for e in entries:
+      if e.type == "B" and e.size > MAX_STRING_SIZE:
+        self._ignore("%d-byte STRING file %r" % (e.size, e.label))
+        return
+    needed = sum([e.size for e in entries])
+    if needed > self.memory_size:
+      self._ignore("%d bytes allocated in %d bytes of memory" %
+                   (needed, self.memory_size))
+      return
+    self.clear()
+    self.memory = dict([(e.label, e) for e in entries])
+
+  def _read_special(self, label, data):
+    if label == parser.SPECIAL_TIME:
+      return "%02d%02d" % divmod(self.minutes(), 60)
+    if label == parser.SPECIAL_MEMORY_CONFIGURATION:
+      return "".join(["%s%s%s%04X%s" % e for e in
+                      sorted(self.memory.values())])
+    if label == parser.SPECIAL_MEMORY_POOL_SIZE:
+      return "%04X" % self.free
+    return self.specials.get(label)
+
+  def minutes(self):
+    """Time of day on the sign's clock, in minutes past midnight."""
+    if self._clock is None:
+      now = datetime.datetime.now()
+      return now.hour * 60 + now.minute
+    minutes, since = self._clock
+    return int(minutes + (time.time() - since) // 60) % (24 * 60)
+
+  _COMMANDS = {
+    constants.WRITE_TEXT: _write_text,
+    constants.READ_TEXT: _read_text,
+    constants.WRITE_STRING: _write_string,
+    constants.READ_STRING: _read_string,
+    constants.WRITE_SPECIAL: _write_special,
+    constants.READ_SPECIAL: _read_special,
+  }
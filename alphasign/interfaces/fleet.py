@@ -0,0 +1,152 @@
+import collections
+import time
+from multiprocessing.pool import ThreadPool
+
+from alphasign import packet
+from alphasign.interfaces import base
+
+
+FleetResult = collections.namedtuple("FleetResult",
+                                     "interface result error elapsed")
+"""Outcome of an operation on one sign of a :class:`SignFleet`.
+
+``result`` is the return value of the interface method, ``error`` the
+exception it raised (or None) and ``elapsed`` the time it took in seconds.
+"""
+
+
+class _Capture(base.BaseInterface):
+  """Interface that keeps the packets written to it."""
+
+  command_delays = {}
+
+  def __init__(self):
+    self.packets = []
+
+  def _write(self, data):
+    self.packets.append(packet.as_packet(data))
+    return True
+
+
+class SignFleet(object):
+  """Group of signs updated concurrently.
+
+  Each operation runs on every interface at the same time on a pool of
+  threads and returns a list of :class:`FleetResult`, one per interface in
+  the order they were given. Packets are encoded once and the same packet is
+  written to every sign::
+
+    fleet = SignFleet([alphasign.Serial("/dev/ttyS%d" % i) for i in range(8)])
+    fleet.allocate((counter_str, counter_txt))
+    for result in fleet.write(counter_txt):
+      if result.error:
+        print("%s failed: %s" % (result.interface.device, result.error))
+  """
+
+  def __init__(self, interfaces, threads=None):
+    """
+    :param interfaces: list of interfaces (:class:`alphasign.Serial`, ...)
+    :param threads: size of the thread pool (default: one per interface)
+    :exception TypeError: if any of the interfaces is an asyncio interface
+    """
+    self.interfaces = list(interfaces)
+    for interface in self.interfaces:
+      base.check_blocking(interface)
+    self.threads = threads or len(self.interfaces) or 1
+    self._pool = None
+
+  def __len__(self):
+    return len(self.interfaces)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def close(self):
+    """Stop the thread pool."""
+    if self._pool is not None:
+      self._pool.close()
+      self._pool.join()
+      self._pool = None
+
+  def run(self, function):
+    """Call a function on every interface concurrently.
+
+    :param function: callable taking an interface as its only argument
+
+    :rtype: list of :class:`FleetResult`
+    """
+    if self._pool is None:
+      self._pool = ThreadPool(self.threads)
+
+    def call(interface):
+      start = time.time()
+      try:
+        result = function(interface)
+      except Exception as e:
+        return FleetResult(interface, None, e, time.time() - start)
+      return FleetResult(interface, result, None, time.time() - start)
+
+    return self._pool.map(call, self.interfaces)
+
+  def _write_all(self, packets):
+    def write(interface):
+      result = True
+      for pkt in packets:
+        if interface.write(pkt) is False:
+          result = False
+      return result
+    return self.run(write)
+
+  def _capture(self, method, *args, **kwargs):
+    capture = _Capture()
+    getattr(capture, method)(*args, **kwargs)
+    return self._write_all(capture.packets)
+
+  def write(self, data):
+    """Write a packet, TEXT or STRING object to every sign.
+
+    :rtype: list of :class:`FleetResult`
+    """
+    return self._write_all([packet.as_packet(data)])
+
+  def clear_memory(self):
+    """Clear the memory of every sign.
+
+    :rtype: list of :class:`FleetResult`
+    """
+    return self._capture("clear_memory")
+
+  def beep(self, *args, **kwargs):
+    """Make every sign beep. See
+    :meth:`alphasign.interfaces.base.BaseInterface.beep`.
+
+    :rtype: list of :class:`FleetResult`
+    """
+    return self._capture("beep", *args, **kwargs)
+
+  def soft_reset(self):
+    """Perform a soft reset on every sign.
+
+    :rtype: list of :class:`FleetResult`
+    """
+    return self._capture("soft_reset")
+
+  def allocate(self, files, targets=5):
+    """Allocate a set of files on every sign. See
+    :meth:`alphasign.interfaces.base.BaseInterface.allocate`.
+
+    :rtype: list of :class:`FleetResult`
+    """
+    return self._capture("allocate", files, targets=targets)
+
+  def set_run_sequence(self, files, locked=False):
+    """Set the run sequence on every sign. See
+    :meth:`alphasign.interfaces.base.BaseInterface.set_run_sequence`.
+
+    :rtype: list of :class:`FleetResult`
+    """
+    return self._capture("set_run_sequence", files, locked=locked)
@@ -1,35 +1,79 @@
+import collections
+import contextlib
 import serial
 import time
 import usb
 
+try:
+  import usb.core
+  import usb.util
+  _PYUSB_CORE = True
+except ImportError:  # PyUSB 0.x
+  _PYUSB_CORE = False
+
 from alphasign.interfaces import base
 
 
+# Line speeds tried by Serial.probe_baudrates, slowest first.
+BAUDRATES = (1200, 2400, 4800, 9600, 19200, 38400)
+
+BaudrateResult = collections.namedtuple(
+    "BaudrateResult", "baudrate ok round_trip bytes_per_second")
+"""Outcome of probing one line speed: whether the sign answered, the time a
+read took in seconds (None if it did not answer) and the line's throughput in
+bytes per second."""
+
+
 class Serial(base.BaseInterface):
   """Connect to a sign through a local serial device.
 
   This class uses `pySerial <http://pyserial.sourceforge.net/>`_.
   """
-  def __init__(self, device="/dev/ttyS0"):
+  def __init__(self, device="/dev/ttyS0", baudrate=4800,
+               parity=serial.PARITY_EVEN, stopbits=serial.STOPBITS_TWO,
+               bytesize=serial.SEVENBITS, timeout=1):
     """
     :param device: character device (default: /dev/ttyS0)
     :type device: string
+    :param baudrate: line speed (default: 4800)
+    :param parity: pySerial parity constant (default: even)
+    :param stopbits: pySerial stop bits constant (default: two)
+    :param bytesize: pySerial byte size constant (default: seven bits)
+    :param timeout: read timeout in seconds (default: 1)
     """
     self.device = device
-    self.debug = True
+    self.baudrate = baudrate
+    self.parity = parity
+    self.stopbits = stopbits
+    self.bytesize = bytesize
+    self.timeout = timeout
+    self.debug = False
     self._conn = None
 
+  @property
+  def bits_per_byte(self):
+    """Bits on the wire per byte: start, data, parity and stop bits."""
+    bits = 1 + self.bytesize + self.stopbits
+    if self.parity != serial.PARITY_NONE:
+      bits += 1
+    return bits
+
+  @property
+  def bytes_per_second(self):
+    """Throughput of the line at the current settings."""
+    return float(self.baudrate) / self.bits_per_byte
+
   def connect(self):
     """Establish connection to the device.
     """
-    # TODO(ms): these settings can probably be tweaked and still support most of
-    # the devices.
+    if self._conn:
+      return
     self._conn = serial.Serial(port=self.device,
-                               baudrate=4800,
-                               parity=serial.PARITY_EVEN,
-                               stopbits=serial.STOPBITS_TWO,
-                               bytesize=serial.SEVENBITS,
-                               timeout=1,
+                               baudrate=self.baudrate,
+                               parity=self.parity,
+                               stopbits=self.stopbits,
+                               bytesize=self.bytesize,
+                               timeout=self.timeout,
                                xonxoff=0,
                                rtscts=0)
 
@@ -38,40 +82,131 @@ class Serial(base.BaseInterface):
     """
     if self._conn:
       self._conn.close()
+      self._conn = None
+
+  def probe_baudrates(self, baudrates=BAUDRATES):
+    """Find the fastest line speed the sign answers at.
+
+    Speeds are tried from slowest to fastest by reading the sign's clock. The
+    first speed that fails after one has worked ends the probe, and the
+    interface is left at the fastest working speed (or its original speed if
+    none worked). This requires a sign that detects the line speed
+    automatically.
 
-  def write(self, packet):
+    :param baudrates: speeds to try
+
+    :returns: result for each speed tried
+    :rtype: list of :class:`BaudrateResult`
+    """
+    original = self.baudrate
+    best = None
+    results = []
+    for baudrate in sorted(baudrates):
+      self.disconnect()
+      self.baudrate = baudrate
+      start = time.time()
+      try:
+        ok = self.read_time() is not None
+      except (OSError, serial.SerialException):
+        ok = False
+      round_trip = ok and time.time() - start or None
+      results.append(BaudrateResult(baudrate, ok, round_trip,
+                                    self.bytes_per_second))
+      if ok:
+        best = baudrate
+      elif best is not None:
+        break
+
+    self.disconnect()
+    self.baudrate = best or original
+    return results
+
+  def _write(self, packet):
     """Write packet to the serial interface.
 
     :param packet: packet to write
     :type packet: :class:`alphasign.packet.Packet`
     """
-    if not self._conn or not self._conn.isOpen():
+    if not self._conn:
       self.connect()
     if self.debug:
-      print "Writing packet: %s" % repr(packet)
+      print("Writing packet: %s" % repr(packet))
     try:
-      self._conn.write(str(packet))
-    except OSError:
+      self._conn.write(packet.data)
+    except (OSError, serial.SerialException):
+      # Reopen the port on the next write.
+      self.disconnect()
       return False
     else:
       return True
 
+  def _read(self, size):
+    if not self._conn:
+      self.connect()
+    # Block (up to the port timeout) for the first byte only.
+    data = self._conn.read(min(size, max(1, self._conn.inWaiting())))
+    if not isinstance(data, str):
+      data = data.decode("latin-1")
+    return data
+
 
 class USB(base.BaseInterface):
   """Connect to a sign using USB.
 
-  This class uses `PyUSB <http://pyusb.berlios.de>`_.
+  This class uses `PyUSB <http://pyusb.berlios.de>`_, through its 1.x API
+  (``usb.core``) when available and the legacy 0.x API otherwise. Devices are
+  looked up once and remembered; a transfer that fails because the sign was
+  unplugged and plugged back in reconnects and is tried once more.
+
+  Packets written inside :meth:`coalesce` are sent together, in bulk
+  transfers of whole endpoint packets, instead of one transfer each::
+
+    with sign.coalesce():
+      for obj in files:
+        sign.write(obj)
+
+  :ivar transfers: number of bulk transfers made
   """
+
+  # Devices found so far, by (vendor id, product id).
+  _devices = {}
+
+  # Largest bulk transfer, rounded down to whole endpoint packets.
+  max_transfer = 4096
+
+  # Milliseconds a bulk transfer may take.
+  timeout = 1000
+
+  # Send a zero-length packet after every transfer. When False, one is only
+  # sent when the transfer ends with a full endpoint packet, which is all
+  # USB needs; this is untested on real signs.
+  always_zlp = True
+
   def __init__(self, usb_id):
     """
     :param usb_id: tuple of (vendor id, product id) identifying the USB device
     """
     self.vendor_id, self.product_id = usb_id
     self.debug = False
-    self._handle = None
+    self.transfers = 0
     self._conn = None
+    self._reset = True
+    self._coalescing = 0
+    self._pending = []
+    self._pending_size = 0
 
   def _get_device(self):
+    key = (self.vendor_id, self.product_id)
+    device = USB._devices.get(key)
+    if device is None:
+      device = self._find_device()
+      if device is not None:
+        USB._devices[key] = device
+    return device
+
+  def _find_device(self):
+    if _PYUSB_CORE:
+      return usb.core.find(idVendor=self.vendor_id, idProduct=self.product_id)
     for bus in usb.busses():
       for device in bus.devices:
         if (device.idVendor == self.vendor_id and
@@ -79,6 +214,11 @@ class USB(base.BaseInterface):
           return device
     return None
 
+  def _open(self, device, reset):
+    if _PYUSB_CORE:
+      return _CoreConnection(device, reset)
+    return _LegacyConnection(device, reset)
+
   def connect(self, reset=True):
     """
     :param reset: send a USB RESET command to the sign.
@@ -87,34 +227,178 @@ class USB(base.BaseInterface):
     """
     if self._conn:
       return
+    self._reset = reset
 
     device = self._get_device()
     if not device:
-      raise usb.USBError, ("failed to find USB device %04x:%04x" %
-                           (self.vendor_id, self.product_id))
-
-    interface = device.configurations[0].interfaces[0][0]
-    self._read_endpoint, self._write_endpoint = interface.endpoints
-    self._conn = device.open()
-    if reset:
-      self._conn.reset()
-    self._conn.claimInterface(interface)
+      raise usb.USBError("failed to find USB device %04x:%04x" %
+                         (self.vendor_id, self.product_id))
+    try:
+      self._conn = self._open(device, reset)
+    except usb.USBError:
+      # The remembered device may be stale after a replug; look it up again.
+      USB._devices.pop((self.vendor_id, self.product_id), None)
+      device = self._get_device()
+      if not device:
+        raise
+      self._conn = self._open(device, reset)
 
   def disconnect(self):
-    """ """
+    """Send any coalesced packets and release the device."""
     if self._conn:
-      self._conn.releaseInterface()
+      self.flush()
+      self._release()
+
+  def _release(self):
+    conn = self._conn
+    if conn is None:
+      return
+    self._conn = None
+    try:
+      conn.release()
+    except usb.USBError:
+      pass
+
+  @contextlib.contextmanager
+  def coalesce(self):
+    """Hold written packets and send them together when the block ends.
 
-  def write(self, packet):
+    Packets are still sent early when enough are held to fill
+    :attr:`max_transfer`, and a packet the sign needs time to process (such
+    as a memory configuration) is sent right away with those before it.
+    """
+    self._coalescing += 1
+    try:
+      yield self
+    finally:
+      self._coalescing -= 1
+      if not self._coalescing:
+        self.flush()
+
+  def _write(self, packet):
     """ """
-    if not self._conn:
-      self.connect()
-    if self.debug:
-      print "Writing packet: %s" % repr(packet)
-    written = self._conn.bulkWrite(self._write_endpoint.address, str(packet))
     if self.debug:
-      print "%d bytes written" % written
-    self._conn.bulkWrite(self._write_endpoint.address, '')
+      print("Writing packet: %s" % repr(packet))
+    self._pending.append(packet.data)
+    self._pending_size += len(packet.data)
+    if (self._coalescing and self._pending_size < self.max_transfer and
+        not self._delay(packet.contents)):
+      return True
+    return self.flush()
+
+  def flush(self):
+    """Send the packets held by :meth:`coalesce`.
+
+    :returns: False if the transfer failed
+    :rtype: bool
+    """
+    data = b"".join(self._pending)
+    self._pending = []
+    self._pending_size = 0
+    if not data:
+      return True
+    try:
+      self._transfer(data)
+    except usb.USBError:
+      # The sign may have been replugged: forget it and try once more.
+      if self._conn:
+        self._release()
+      USB._devices.pop((self.vendor_id, self.product_id), None)
+      if self.metrics is not None:
+        self.metrics.record_retry(self.metrics_name)
+      try:
+        self._transfer(data)
+      except usb.USBError as e:
+        if self.debug:
+          print("USB write failed: %s" % e)
+        if self._conn:
+          self._release()
+        if self.write_cache is not None:
+          self.write_cache.invalidate()
+        return False
+    return True
+
+  def _transfer(self, data):
+    if not self._conn:
+      self.connect(self._reset)
+    size = self._conn.max_packet_size
+    step = max(self.max_transfer // size, 1) * size
+    for i in range(0, len(data), step):
+      written = self._conn.write(data[i:i + step], self.timeout)
+      self.transfers += 1
+      if self.debug:
+        print("%d bytes written" % written)
+    # A transfer ending with a full packet needs a zero-length packet to end
+    # it; a short last packet already does (see always_zlp).
+    if self.always_zlp or len(data) % size == 0:
+      self._conn.write(b"", self.timeout)
+      self.transfers += 1
+
+  def _read(self, size):
+    self.flush()
+    if not self._conn:
+      self.connect(self._reset)
+    try:
+      data = self._conn.read(size, 100)
+    except usb.USBError:
+      return ""
+    return "".join([chr(b) for b in data])
+
+
+class _LegacyConnection(object):
+  """Claimed device, through the PyUSB 0.x API."""
+
+  def __init__(self, device, reset):
+    self._interface = device.configurations[0].interfaces[0][0]
+    self._read_endpoint, self._write_endpoint = self._interface.endpoints
+    self.max_packet_size = self._write_endpoint.maxPacketSize or 64
+    self._handle = device.open()
+    if reset:
+      self._handle.reset()
+    self._handle.claimInterface(self._interface)
+
+  def write(self, data, timeout):
+    return self._handle.bulkWrite(self._write_endpoint.address, data, timeout)
+
+  def read(self, size, timeout):
+    return self._handle.bulkRead(self._read_endpoint.address, size, timeout)
+
+  def release(self):
+    self._handle.releaseInterface()
+
+
+class _CoreConnection(object):
+  """Claimed device, through the PyUSB 1.x API."""
+
+  def __init__(self, device, reset):
+    self._device = device
+    if reset:
+      device.reset()
+    try:
+      if device.is_kernel_driver_active(0):
+        device.detach_kernel_driver(0)
+    except (NotImplementedError, usb.core.USBError):
+      pass  # not supported on this platform
+    device.set_configuration()
+    interface = device.get_active_configuration()[(0, 0)]
+    self._read_endpoint = usb.util.find_descriptor(
+      interface, custom_match=lambda e: (
+        usb.util.endpoint_direction(e.bEndpointAddress) ==
+        usb.util.ENDPOINT_IN))
+    self._write_endpoint = usb.util.find_descriptor(
+      interface, custom_match=lambda e: (
+        usb.util.endpoint_direction(e.bEndpointAddress) ==
+        usb.util.ENDPOINT_OUT))
+    self.max_packet_size = self._write_endpoint.wMaxPacketSize or 64
+
+  def write(self, data, timeout):
+    return self._write_endpoint.write(data, timeout)
+
+  def read(self, size, timeout):
+    return self._read_endpoint.read(size, timeout)
+
+  def release(self):
+    usb.util.dispose_resources(self._device)
 
 
 class DebugInterface(base.BaseInterface):
@@ -133,8 +417,8 @@ class DebugInterface(base.BaseInterface):
     """ """
     pass
 
-  def write(self, packet):
+  def _write(self, packet):
     """ """
     if self.debug:
-      print "Writing packet: %s" % repr(packet)
+      print("Writing packet: %s" % repr(packet))
     return True
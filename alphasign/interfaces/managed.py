@@ -0,0 +1,193 @@
+import collections
+import threading
+import time
+
+from alphasign.interfaces import base
+
+
+# Circuit states of a ManagedConnection.
+CLOSED = "closed"        # sign is up, packets are sent
+OPEN = "open"            # sign is down, writes fail fast
+HALF_OPEN = "half-open"  # backoff expired, the next write tries to reconnect
+
+
+class ManagedConnection(base.BaseInterface):
+  """Interface that keeps another interface connected.
+
+  A write that fails or raises drops the connection, and the next write
+  reconnects before sending. After ``failure_threshold`` failures in a row
+  the circuit opens: writes return False at once, without touching the
+  device, until a backoff delay has passed. The delay doubles with every
+  failed attempt, up to ``max_backoff``::
+
+    sign = ManagedConnection(alphasign.Serial("/dev/ttyUSB0"),
+                             health_check=lambda s: s.read_time() is not None)
+    if sign.write(counter_str) is False and sign.state == OPEN:
+      print("sign down, retrying in %.1fs" % sign.retry_in)
+
+  :ivar failures: number of failed writes and reconnects
+  :ivar rejected: number of writes refused while the circuit was open
+  :ivar reconnects: number of successful reconnections
+  :ivar reconnect_latencies: seconds from each failure that took the sign
+                             down to its recovery, most recent last
+  :ivar last_error: last exception raised by the underlying interface
+  """
+
+  command_delays = {}
+
+  def __init__(self, interface, health_check=None, failure_threshold=1,
+               backoff=0.5, max_backoff=60.0, history=100):
+    """
+    :param interface: interface to keep connected
+    :param health_check: callable taking the interface and returning whether
+                         the sign answers, run after each reconnect
+                         (default: connecting is enough)
+    :param failure_threshold: failures in a row that open the circuit
+    :param backoff: seconds the circuit first stays open
+    :param max_backoff: longest time the circuit stays open
+    :param history: number of reconnect latencies kept
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    self.interface = interface
+    self.health_check = health_check
+    self.failure_threshold = failure_threshold
+    self.backoff = backoff
+    self.max_backoff = max_backoff
+    self.failures = 0
+    self.rejected = 0
+    self.reconnects = 0
+    self.reconnect_latencies = collections.deque(maxlen=history)
+    self.last_error = None
+    self._state = CLOSED
+    self._connected = False
+    self._consecutive = 0
+    self._down_since = None
+    self._retry_at = 0
+    self._lock = threading.RLock()
+
+  @property
+  def state(self):
+    """:const:`CLOSED`, :const:`OPEN` or :const:`HALF_OPEN`."""
+    if self._state == OPEN and time.time() >= self._retry_at:
+      return HALF_OPEN
+    return self._state
+
+  @property
+  def retry_in(self):
+    """Seconds until the circuit lets a write through again."""
+    if self._state != OPEN:
+      return 0
+    return max(0, self._retry_at - time.time())
+
+  def connect(self):
+    """Connect to the sign, running the health check.
+
+    :returns: False if the sign could not be reached
+    :rtype: bool
+    """
+    with self._lock:
+      return self._connect()
+
+  def disconnect(self):
+    """Disconnect from the sign."""
+    with self._lock:
+      self._drop()
+
+  def check(self):
+    """Check that the sign is reachable, reconnecting if needed.
+
+    This ignores the circuit, so it can be called periodically to find out
+    early that a sign came back.
+
+    :returns: whether the sign is up
+    :rtype: bool
+    """
+    with self._lock:
+      if self._connected and not self._healthy():
+        self._drop()
+      if not self._connected and not self._connect():
+        return False
+      self._recovered()
+      return True
+
+  def _write(self, data):
+    with self._lock:
+      if self._state == OPEN and time.time() < self._retry_at:
+        self.rejected += 1
+        return False
+      if not self._connected and not self._connect():
+        return False
+      if self._call(self.interface.write, data) is False:
+        self._drop()
+        return False
+      self._recovered()
+      return True
+
+  def _receives(self):
+    return self.interface._receives()
+
+  def _read(self, size):
+    with self._lock:
+      if not self._connected:
+        return ""
+      data = self._call(self.interface._read, size)
+      if data is False:
+        self._drop()
+        return ""
+      return data
+
+  def _call(self, function, *args):
+    try:
+      result = function(*args)
+    except Exception as e:
+      self.last_error = e
+      result = False
+    if result is False:
+      self._failed()
+    return result
+
+  def _connect(self):
+    self._drop()
+    if self._down_since is not None and self.metrics is not None:
+      self.metrics.record_retry(self.metrics_name)
+    if self._call(self.interface.connect) is False:
+      return False
+    self._connected = True
+    if not self._healthy():
+      self._drop()
+      return False
+    return True
+
+  def _healthy(self):
+    if self.health_check is None:
+      return True
+    return self._call(lambda: bool(self.health_check(self.interface)))
+
+  def _drop(self):
+    if not self._connected:
+      return
+    self._connected = False
+    try:
+      self.interface.disconnect()
+    except Exception as e:
+      self.last_error = e
+
+  def _failed(self):
+    self.failures += 1
+    self._consecutive += 1
+    if self._down_since is None:
+      self._down_since = time.time()
+    if self._consecutive >= self.failure_threshold:
+      attempt = self._consecutive - self.failure_threshold
+      delay = min(self.backoff * 2 ** min(attempt, 32), self.max_backoff)
+      self._state = OPEN
+      self._retry_at = time.time() + delay
+
+  def _recovered(self):
+    if self._down_since is not None:
+      self.reconnects += 1
+      self.reconnect_latencies.append(time.time() - self._down_since)
+      self._down_since = None
+    self._consecutive = 0
+    self._state = CLOSED
@@ -0,0 +1,300 @@
+"""
+Counters and latency histograms of the packets interfaces send.
+
+Metrics are off by default and cost one attribute check per write. They are
+turned on per interface with
+:meth:`alphasign.interfaces.base.BaseInterface.enable_metrics`; several
+interfaces can share one :class:`Metrics`, each under its own name::
+
+  metrics = Metrics()
+  for i, sign in enumerate(signs):
+    sign.enable_metrics(metrics, name="sign%d" % i)
+  ...
+  metrics.dump("/var/lib/node_exporter/alphasign.prom")
+
+Any object with the ``record_write`` and ``record_retry`` methods of
+:class:`Metrics` can be given instead, to feed another metrics system.
+"""
+import bisect
+import json
+import os
+import threading
+
+from alphasign import constants
+
+
+# Upper bounds of the write latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0)
+
+
+def command_name(command):
+  """Name a command is counted under: its command code, followed by the
+  label for SPECIAL FUNCTIONS (``E$``, ``E.``, ...).
+
+  :rtype: string
+  """
+  if command[:1] in (constants.WRITE_SPECIAL, constants.READ_SPECIAL):
+    return command[:2]
+  return command[:1]
+
+
+class Histogram(object):
+  """Distribution of observed values in fixed buckets.
+
+  :ivar count: number of values observed
+  :ivar sum: sum of the values
+  :ivar max: largest value
+  """
+
+  def __init__(self, buckets=LATENCY_BUCKETS):
+    """
+    :param buckets: increasing upper bounds of the buckets; larger values go
+                    to an extra, unbounded bucket
+    """
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)
+    self.count = 0
+    self.sum = 0.0
+    self.max = 0.0
+
+  def observe(self, value):
+    self.counts[bisect.bisect_left(self.buckets, value)] += 1
+    self.count += 1
+    self.sum += value
+    if value > self.max:
+      self.max = value
+
+  def quantile(self, q):
+    """Estimate a quantile as the upper bound of the bucket holding it.
+
+    :param q: fraction between 0 and 1 (0.5 for the median)
+    :returns: estimate, or None if nothing was observed
+    """
+    if not self.count:
+      return None
+    rank = q * self.count
+    seen = 0
+    for bound, count in zip(self.buckets, self.counts):
+      seen += count
+      if seen >= rank:
+        return min(bound, self.max)
+    return self.max
+
+  def to_dict(self):
+    cumulative = []
+    seen = 0
+    for count in self.counts[:-1]:
+      seen += count
+      cumulative.append(seen)
+    return {
+      "count": self.count,
+      "sum": self.sum,
+      "max": self.max,
+      "p50": self.quantile(0.5),
+      "p99": self.quantile(0.99),
+      "buckets": [[bound, count] for bound, count in
+                  zip(self.buckets, cumulative)],
+    }
+
+
+class Stats(object):
+  """Counters and write latency of one interface, or one command code on an
+  interface.
+
+  :ivar packets: packets written
+  :ivar bytes: bytes written
+  :ivar errors: writes that failed or raised
+  :ivar retries: transmissions repeated after an error
+  :ivar latency: :class:`Histogram` of the seconds each write took
+  """
+
+  def __init__(self, buckets=LATENCY_BUCKETS):
+    self.packets = 0
+    self.bytes = 0
+    self.errors = 0
+    self.retries = 0
+    self.latency = Histogram(buckets)
+
+  def to_dict(self):
+    return {
+      "packets": self.packets,
+      "bytes": self.bytes,
+      "errors": self.errors,
+      "retries": self.retries,
+      "latency": self.latency.to_dict(),
+    }
+
+
+class Metrics(object):
+  """Metrics of the packets written through a set of interfaces.
+
+  :ivar interfaces: dict of interface name to :class:`Stats`
+  :ivar commands: dict of interface name to a dict of command name (see
+                  :func:`command_name`) to :class:`Stats`
+  """
+
+  def __init__(self, buckets=LATENCY_BUCKETS):
+    """
+    :param buckets: upper bounds of the latency histogram buckets
+    """
+    self.buckets = buckets
+    self.interfaces = {}
+    self.commands = {}
+    self._lock = threading.Lock()
+
+  def _stats(self, interface):
+    stats = self.interfaces.get(interface)
+    if stats is None:
+      stats = self.interfaces[interface] = Stats(self.buckets)
+      self.commands[interface] = {}
+    return stats
+
+  def record_write(self, interface, commands, size, seconds, ok):
+    """Count a packet written by an interface.
+
+    The bytes and time of a nested packet are shared out between its
+    command codes by the length of their commands, so the bytes and write
+    seconds of the command codes of an interface add up to its totals. Each
+    command code still counts the packet once.
+
+    :param interface: name of the interface
+    :param commands: commands in the packet
+    :param size: bytes in the packet
+    :param seconds: time the write took
+    :param ok: False if the write failed
+    """
+    with self._lock:
+      _count(self._stats(interface), size, seconds, ok)
+      shares = self._command_shares(interface, commands)
+      left = size
+      for i, (stats, share) in enumerate(shares):
+        if i < len(shares) - 1:
+          portion = int(size * share)
+        else:
+          portion = left  # rounding leftovers go to the last command
+        left -= portion
+        _count(stats, portion, seconds * share, ok)
+
+  def _command_shares(self, interface, commands):
+    # (stats, fraction of the packet) for each command code in the packet.
+    by_command = self.commands[interface]
+    lengths = {}
+    for command in commands:
+      name = command_name(command)
+      lengths[name] = lengths.get(name, 0) + len(command)
+    total = sum(lengths.values())
+    result = []
+    for name in sorted(lengths):
+      stats = by_command.get(name)
+      if stats is None:
+        stats = by_command[name] = Stats(self.buckets)
+      if total:
+        result.append((stats, float(lengths[name]) / total))
+      else:
+        result.append((stats, 1.0 / len(lengths)))
+    return result
+
+  def record_retry(self, interface):
+    """Count a transmission an interface repeats after an error.
+
+    :param interface: name of the interface
+    """
+    with self._lock:
+      self._stats(interface).retries += 1
+
+  def to_dict(self):
+    """Metrics as nested dicts, keyed by interface name."""
+    with self._lock:
+      result = {}
+      for name, stats in self.interfaces.items():
+        result[name] = stats.to_dict()
+        result[name]["commands"] = dict(
+          [(command, s.to_dict()) for command, s in
+           self.commands[name].items()])
+      return result
+
+  def to_json(self):
+    """Metrics as a JSON document (see :meth:`to_dict`)."""
+    return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+  def to_text(self):
+    """Metrics in the Prometheus text exposition format.
+
+    The totals of each interface and the figures of each of its command
+    codes are separate metrics (``alphasign_packets_total`` and
+    ``alphasign_command_packets_total``, ...), so summing either one does
+    not count a packet twice.
+    """
+    metrics = self.to_dict()
+    interfaces = []
+    commands = []
+    for name in sorted(metrics):
+      interfaces.append(('interface="%s"' % _escape(name), metrics[name]))
+      for command in sorted(metrics[name]["commands"]):
+        commands.append(('interface="%s",command="%s"' %
+                         (_escape(name), _escape(command)),
+                         metrics[name]["commands"][command]))
+
+    lines = []
+    for prefix, series, counters in (
+        ("alphasign_", interfaces, _COUNTERS),
+        ("alphasign_command_", commands, _COUNTERS[:-1])):
+      for counter, help in counters:
+        metric = "%s%s_total" % (prefix, counter)
+        lines.append("# HELP %s %s" % (metric, help))
+        lines.append("# TYPE %s counter" % metric)
+        for labels, stats in series:
+          lines.append("%s{%s} %d" % (metric, labels, stats[counter]))
+      metric = "%swrite_seconds" % prefix
+      lines.append("# HELP %s Time taken by writes." % metric)
+      lines.append("# TYPE %s histogram" % metric)
+      for labels, stats in series:
+        latency = stats["latency"]
+        for bound, count in latency["buckets"]:
+          lines.append('%s_bucket{%s,le="%g"} %d' %
+                       (metric, labels, bound, count))
+        lines.append('%s_bucket{%s,le="+Inf"} %d' %
+                     (metric, labels, latency["count"]))
+        lines.append("%s_sum{%s} %f" % (metric, labels, latency["sum"]))
+        lines.append("%s_count{%s} %d" % (metric, labels, latency["count"]))
+    return "\n".join(lines) + "\n"
+
+  def dump(self, path, format=None):
+    """Write the metrics to a file, replacing it atomically.
+
+    :param path: file to write
+    :param format: ``"json"`` or ``"text"`` (default: JSON for ``.json``
+                   files, text otherwise)
+    """
+    if format is None:
+      format = path.endswith(".json") and "json" or "text"
+    data = format == "json" and self.to_json() + "\n" or self.to_text()
+    temp = "%s.tmp" % path
+    with open(temp, "w") as f:
+      f.write(data)
+    os.rename(temp, path)
+
+
+def _count(stats, size, seconds, ok):
+  stats.packets += 1
+  stats.bytes += size
+  stats.latency.observe(seconds)
+  if not ok:
+    stats.errors += 1
+
+
+# Counters of to_text, with their help text. Retries are only counted per
+# interface, so they come last and are left out for command codes.
+_COUNTERS = (
+  ("packets", "Packets written."),
+  ("bytes", "Bytes written."),
+  ("errors", "Writes that failed or raised."),
+  ("retries", "Transmissions repeated after an error."),
+)
+
+
+def _escape(value):
+  # Label values escape backslashes, double quotes and newlines.
+  value = value.replace("\\", "\\\\").replace('"', '\\"')
+  return value.replace("\n", "\\n")
@@ -0,0 +1,386 @@
+"""
+Signs reached over TCP, usually through a serial-to-Ethernet converter.
+
+A :class:`TCP` interface keeps one persistent connection to its sign, with
+Nagle's algorithm disabled so each packet leaves at once and TCP keep-alives
+so a dead converter is noticed. Writes don't wait for the sign, so several
+packets can be on their way at the same time.
+
+Many signs can be driven from one thread by giving them a :class:`TCPLoop`:
+writes are then queued and sent as the sockets become writable, and a packet
+the sign needs time to process only holds back that sign's later packets::
+
+  loop = TCPLoop()
+  signs = [TCP(host, loop=loop) for host in ("10.0.0.5", "10.0.0.6")]
+  for sign in signs:
+    sign.write(counter_txt)
+  loop.flush()
+
+:class:`FakeSignServer` accepts connections on a local port and records the
+packets it receives, for trying this out without a sign.
+"""
+import collections
+import socket
+import threading
+import time
+
+try:
+  import selectors
+except ImportError:  # Python 2
+  selectors = None
+
+from alphasign import parser
+from alphasign.interfaces import base
+
+
+# Raw TCP port of common serial-to-Ethernet converters.
+DEFAULT_PORT = 10001
+
+ENCODING = "latin-1"
+
+
+def set_keepalive(sock, idle=60, interval=10, count=3):
+  """Turn on TCP keep-alives for a socket.
+
+  :param idle: seconds of silence before the first probe
+  :param interval: seconds between probes
+  :param count: unanswered probes before the connection is dropped
+  """
+  sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+  # Not every platform lets these be set per socket.
+  for name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval),
+                      ("TCP_KEEPCNT", count)):
+    if hasattr(socket, name):
+      sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+
+
+class TCP(base.BaseInterface):
+  """Connect to a sign over TCP."""
+
+  def __init__(self, host, port=DEFAULT_PORT, timeout=5, keepalive=True,
+               loop=None):
+    """
+    :param host: host name or address of the sign or converter
+    :param port: TCP port (default: :const:`DEFAULT_PORT`)
+    :param timeout: seconds to wait for the connection and for blocking
+                    sends
+    :param keepalive: turn on TCP keep-alives
+    :param loop: :class:`TCPLoop` sending this sign's packets
+                 (default: packets are sent as they are written)
+    """
+    self.host = host
+    self.port = port
+    self.timeout = timeout
+    self.keepalive = keepalive
+    self.loop = loop
+    self.debug = False
+    self._sock = None
+    self._received = ""
+
+  def connect(self):
+    """Establish connection to the sign.
+
+    :exception socket.error: if the sign can't be reached
+    """
+    if self._sock:
+      return
+    sock = socket.create_connection((self.host, self.port), self.timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if self.keepalive:
+      set_keepalive(sock)
+    self._sock = sock
+    if self.loop is not None:
+      sock.setblocking(False)
+      self.loop._register(self)
+
+  def disconnect(self):
+    """Close the connection, discarding packets still queued in the loop."""
+    if self._sock:
+      if self.loop is not None:
+        self.loop._unregister(self)
+      self._sock.close()
+      self._sock = None
+
+  def fileno(self):
+    return self._sock.fileno()
+
+  def wait_ready(self):
+    # With a loop, each sign's pacing is done by the loop.
+    if self.loop is None:
+      base.BaseInterface.wait_ready(self)
+
+  def _busy(self, commands):
+    if self.loop is None:
+      base.BaseInterface._busy(self, commands)
+
+  def _write(self, packet):
+    if self.debug:
+      print("Writing packet: %s" % repr(packet))
+    try:
+      self.connect()
+      if self.loop is not None:
+        self.loop._queue(self, packet.data, self._delay(packet.contents))
+      else:
+        self._sock.sendall(packet.data)
+    except (socket.error, socket.timeout):
+      self.disconnect()
+      return False
+    return True
+
+  def _read(self, size):
+    self.connect()
+    if self.loop is not None:
+      self.loop.poll(0.1)
+    else:
+      try:
+        self._sock.settimeout(0.1)
+        data = self._sock.recv(size)
+        if not data:
+          raise socket.error("connection closed by sign")
+      except socket.timeout:
+        data = b""
+      except socket.error:
+        self.disconnect()
+        return ""
+      finally:
+        if self._sock:
+          self._sock.settimeout(self.timeout)
+      self._received += data.decode(ENCODING)
+    data = self._received[:size]
+    self._received = self._received[size:]
+    return data
+
+
+class TCPLoop(object):
+  """Send the packets of many :class:`TCP` signs from one thread.
+
+  Packets written to the signs are queued; :meth:`poll` and :meth:`flush`
+  send them, and collect data the signs send back. This needs the
+  :mod:`selectors` module of Python 3.
+
+  :ivar errors: number of connections dropped because of an error
+  """
+
+  def __init__(self):
+    if selectors is None:
+      raise NotImplementedError("TCPLoop needs the selectors module")
+    self.errors = 0
+    self._selector = selectors.DefaultSelector()
+    self._outgoing = {}  # sign -> deque of [data, delay after it]
+    self._ready_at = {}  # sign -> time it accepts its next packet
+
+  def __len__(self):
+    """Number of bytes queued."""
+    return sum([len(chunk[0]) for queue in self._outgoing.values()
+                for chunk in queue])
+
+  def _register(self, sign):
+    self._outgoing[sign] = collections.deque()
+    self._selector.register(sign._sock, selectors.EVENT_READ, sign)
+
+  def _unregister(self, sign):
+    self._outgoing.pop(sign, None)
+    self._ready_at.pop(sign, None)
+    self._selector.unregister(sign._sock)
+
+  def _queue(self, sign, data, delay):
+    self._outgoing[sign].append([memoryview(data), delay])
+    self._update(sign, time.time())
+
+  def _update(self, sign, now):
+    events = selectors.EVENT_READ
+    if self._outgoing[sign] and self._ready_at.get(sign, 0) <= now:
+      events |= selectors.EVENT_WRITE
+    key = self._selector.get_key(sign._sock)
+    if key.events != events:
+      self._selector.modify(sign._sock, events, sign)
+
+  def poll(self, timeout=0):
+    """Send and receive whatever the sockets allow.
+
+    :param timeout: seconds to wait for a socket to become ready
+
+    :returns: whether packets are still queued
+    :rtype: bool
+    """
+    now = time.time()
+    waits = [t - now for sign, t in self._ready_at.items()
+             if self._outgoing[sign]]
+    if waits:
+      timeout = max(0, min([timeout] + waits))
+    for key, events in self._selector.select(timeout):
+      sign = key.data
+      try:
+        if events & selectors.EVENT_READ:
+          data = sign._sock.recv(4096)
+          if not data:
+            raise socket.error("connection closed by sign")
+          sign._received += data.decode(ENCODING)
+        if events & selectors.EVENT_WRITE:
+          self._send(sign)
+      except socket.error:
+        if sign._sock:
+          self.errors += 1
+          sign.disconnect()
+
+    now = time.time()
+    for sign in list(self._outgoing):
+      self._update(sign, now)
+    return any(self._outgoing.values())
+
+  def _send(self, sign):
+    queue = self._outgoing[sign]
+    while queue and self._ready_at.get(sign, 0) <= time.time():
+      chunk = queue[0]
+      try:
+        sent = sign._sock.send(chunk[0])
+      except (BlockingIOError, InterruptedError):
+        return
+      chunk[0] = chunk[0][sent:]
+      if len(chunk[0]):
+        return
+      queue.popleft()
+      if chunk[1]:
+        self._ready_at[sign] = time.time() + chunk[1]
+
+  def flush(self, timeout=None):
+    """Send every queued packet.
+
+    :param timeout: seconds to wait (default: no limit)
+    :returns: False if the timeout expired first
+    :rtype: bool
+    """
+    end = timeout is not None and time.time() + timeout or None
+    while self.poll(1):
+      if end is not None and time.time() >= end:
+        return False
+    return True
+
+  def close(self):
+    """Disconnect every sign."""
+    for sign in list(self._outgoing):
+      sign.disconnect()
+    self._selector.close()
+
+
+class FakeSignServer(object):
+  """Local TCP server standing in for a sign.
+
+  Received packets are parsed and kept in :attr:`frames`. A ``handler`` can
+  answer them::
+
+    with FakeSignServer() as server:
+      sign = TCP("127.0.0.1", server.port)
+      sign.write(counter_txt)
+      server.wait(1)
+
+  :ivar frames: :class:`alphasign.parser.Frame` objects received, in order
+  :ivar connections: number of connections accepted
+  """
+
+  def __init__(self, host="127.0.0.1", port=0, handler=None):
+    """
+    :param host: address to listen on
+    :param port: port to listen on (default: any free port)
+    :param handler: callable taking a received
+                    :class:`alphasign.parser.Frame` and returning data to
+                    send back, such as
+                    :meth:`alphasign.interfaces.emulator.Emulator.handle`
+    """
+    self.handler = handler
+    self.frames = []
+    self.connections = 0
+    self._open = []
+    self._cond = threading.Condition()
+    self._closed = False
+    self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    self._listener.bind((host, port))
+    self._listener.listen(16)
+    self._listener.settimeout(0.1)
+    self.host, self.port = self._listener.getsockname()[:2]
+    self._thread = threading.Thread(target=self._accept)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def wait(self, count, timeout=5):
+    """Wait until a number of frames has been received.
+
+    :returns: False if the timeout expired first
+    :rtype: bool
+    """
+    end = time.time() + timeout
+    with self._cond:
+      while len(self.frames) < count:
+        remaining = end - time.time()
+        if remaining <= 0:
+          return False
+        self._cond.wait(remaining)
+      return True
+
+  def drop(self):
+    """Close the open connections, as a restarting converter would.
+
+    The server keeps accepting new ones.
+    """
+    with self._cond:
+      conns, self._open = self._open, []
+    for conn in conns:
+      try:
+        conn.shutdown(socket.SHUT_RDWR)
+      except socket.error:
+        pass
+
+  def close(self):
+    """Stop accepting connections and close the server."""
+    self._closed = True
+    self._thread.join()
+    self._listener.close()
+
+  def _accept(self):
+    while not self._closed:
+      try:
+        conn, _ = self._listener.accept()
+      except socket.timeout:
+        continue
+      with self._cond:
+        self.connections += 1
+        self._open.append(conn)
+      thread = threading.Thread(target=self._serve, args=(conn,))
+      thread.daemon = True
+      thread.start()
+
+  def _serve(self, conn):
+    packets = parser.PacketParser()
+    conn.settimeout(0.1)
+    try:
+      while not self._closed:
+        try:
+          data = conn.recv(4096)
+        except socket.timeout:
+          continue
+        if not data:
+          return
+        for frame in packets.feed(data.decode(ENCODING)):
+          with self._cond:
+            self.frames.append(frame)
+            self._cond.notify_all()
+          reply = self.handler and self.handler(frame)
+          if reply:
+            if not isinstance(reply, bytes):
+              reply = reply.encode(ENCODING)
+            conn.sendall(reply)
+    except socket.error:
+      pass
+    finally:
+      with self._cond:
+        if conn in self._open:
+          self._open.remove(conn)
+      conn.close()
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+
+from alphasign import packet
+from alphasign.interfaces import base
+from alphasign.interfaces import cache
+
+
+class CoalescingWriter(base.BaseInterface):
+  """Interface that writes to another interface from a background thread.
+
+  Writes return immediately. While a TEXT or STRING write is waiting to be
+  sent, a newer write to the same file label and sign address replaces it in
+  the queue, so a slow link only ever transmits the latest data for each
+  label::
+
+    writer = CoalescingWriter(sign)
+    while True:
+      counter_str.data = read_counter()
+      writer.write(counter_str)
+
+  Other commands (special functions, nested packets) are sent in order, and
+  TEXT and STRING writes are never moved across them.
+
+  :ivar sent: number of packets sent
+  :ivar superseded: number of queued writes replaced by newer data
+  :ivar dropped: number of writes discarded because the queue was full or the
+                 writer was closed without flushing
+  :ivar errors: number of writes that failed or raised
+  :ivar last_error: last exception raised by the underlying interface
+  """
+
+  command_delays = {}
+
+  def __init__(self, interface, max_pending=None):
+    """
+    :param interface: interface to send the packets through
+    :param max_pending: largest number of queued packets; further writes are
+                        dropped (default: unbounded)
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    self.interface = interface
+    self.max_pending = max_pending
+    self.sent = 0
+    self.superseded = 0
+    self.dropped = 0
+    self.errors = 0
+    self.last_error = None
+    self._pending = OrderedDict()  # sequence number -> (key, packet)
+    self._slots = {}  # cache.command_key -> sequence number
+    self._sequence = 0
+    self._sending = False
+    self._closed = False
+    self._cond = threading.Condition()
+    self._thread = threading.Thread(target=self._run)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def __len__(self):
+    return self.depth
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  @property
+  def depth(self):
+    """Number of packets waiting to be sent."""
+    with self._cond:
+      return len(self._pending)
+
+  def _write(self, data):
+    pkt = packet.as_packet(data)
+    key = None
+    if len(pkt.contents) == 1:
+      key = cache.command_key(pkt.contents[0], pkt.type, pkt.address)
+    return self._enqueue(key, pkt)
+
+  def _enqueue(self, key, item):
+    with self._cond:
+      if self._closed:
+        raise ValueError("write to closed CoalescingWriter")
+      if key is not None and key in self._slots:
+        self._pending[self._slots[key]] = (key, item)
+        self.superseded += 1
+        return True
+      if (self.max_pending is not None and
+          len(self._pending) >= self.max_pending):
+        self.dropped += 1
+        return False
+      self._sequence += 1
+      self._pending[self._sequence] = (key, item)
+      if key is None:
+        # Nothing queued from now on may be merged into earlier writes.
+        self._slots.clear()
+      else:
+        # Nor into writes of the same file for signs this one also reaches.
+        for other in list(self._slots):
+          if other[2] == key[2] and cache.overlaps(other[:2], key[:2]):
+            del self._slots[other]
+        self._slots[key] = self._sequence
+      self._cond.notify_all()
+      return True
+
+  def flush(self, timeout=None):
+    """Wait until every queued packet has been sent.
+
+    :param timeout: seconds to wait (default: no limit)
+    :returns: False if the timeout expired first
+    :rtype: bool
+    """
+    with self._cond:
+      if timeout is None:
+        while self._pending or self._sending:
+          self._cond.wait()
+        return True
+      end = time.time() + timeout
+      while self._pending or self._sending:
+        remaining = end - time.time()
+        if remaining <= 0:
+          return False
+        self._cond.wait(remaining)
+      return True
+
+  def close(self, flush=True):
+    """Stop the writer thread.
+
+    :param flush: send queued packets first; otherwise they are dropped
+    """
+    with self._cond:
+      if not flush:
+        self.dropped += len(self._pending)
+        self._pending.clear()
+        self._slots.clear()
+      self._closed = True
+      self._cond.notify_all()
+    self._thread.join()
+
+  def _run(self):
+    while True:
+      with self._cond:
+        while not self._pending and not self._closed:
+          self._cond.wait()
+        if not self._pending:
+          return
+        sequence, (key, item) = self._pending.popitem(last=False)
+        if self._slots.get(key) == sequence:
+          del self._slots[key]
+        self._sending = True
+
+      try:
+        result = self.interface.write(item)
+      except Exception as e:
+        result = False
+        self.last_error = e
+
+      with self._cond:
+        if result is False:
+          self.errors += 1
+        else:
+          self.sent += 1
+        self._sending = False
+        self._cond.notify_all()
@@ -0,0 +1,225 @@
+"""
+A small markup language for TEXT and STRING messages.
+
+Instead of putting control codes together by hand, a message can be written
+with tags in braces, which are compiled to the codes of
+:mod:`alphasign.colors`, :mod:`alphasign.charsets`, :mod:`alphasign.speeds`
+and :mod:`alphasign.extchars`::
+
+  msg = alphasign.markup.text("{red}{wide}Gate 12{/wide} {green}boarding",
+                              label="A", mode=alphasign.modes.HOLD)
+
+The following tags are defined:
+
+* colors: ``{red}``, ``{green}``, ``{amber}``, ... (the constants of
+  :mod:`alphasign.colors` in lower case), ``{#RRGGBB}`` and
+  ``{shadow:#RRGGBB}`` (see :func:`alphasign.colors.rgb`)
+* character sets: ``{seven_high_std}``, ``{five_wide}``, ...
+* character attributes, turned off by the closing tag: ``{wide}`` and
+  ``{/wide}``, ``{double_high}``, ``{flash}``, ...
+* character spacing: ``{proportional}`` and ``{fixed_spacing}``
+* speeds: ``{speed_1}`` to ``{speed_5}``
+* extended characters: ``{heart}``, ``{up_arrow}``, ...
+* ``{newline}``, ``{newpage}``, ``{time}`` and ``{string:1}`` (the STRING
+  file with label "1")
+* display modes within a TEXT message: ``{mode:hold}`` or
+  ``{mode:scroll:top_line}`` (see :mod:`alphasign.modes` and
+  :mod:`alphasign.positions`)
+
+``{{`` and ``}}`` are literal braces; :func:`escape` protects text that comes
+from elsewhere.
+
+Control codes count against the size of a file, and a TEXT file holds at
+most :const:`MAX_TEXT_SIZE` bytes. :func:`length` tells how many bytes a
+message takes once compiled, and :func:`text` refuses messages that do not
+fit instead of letting the sign cut them short::
+
+  if alphasign.markup.length(message) > alphasign.markup.MAX_TEXT_SIZE:
+    message = shorten(message)
+
+Compiled messages are cached, so compiling the same message or fragment
+again is a dictionary lookup.
+"""
+import re
+from collections import OrderedDict
+
+from alphasign import charsets
+from alphasign import colors
+from alphasign import constants
+from alphasign import extchars
+from alphasign import modes
+from alphasign import positions
+from alphasign import speeds
+from alphasign.memory import MAX_TEXT_SIZE
+from alphasign.text import Text
+
+
+def _constants(module, prefix=None):
+  return dict([(name.lower(), value) for name, value in vars(module).items()
+               if name.isupper() and isinstance(value, str) and
+               (prefix is None or value.startswith(prefix))])
+
+
+def _tags():
+  tags = {}
+  closing = {}
+  tags.update(_constants(colors))
+  tags.update(_constants(charsets, constants.SUB))
+  for name, value in _constants(charsets).items():
+    if name.endswith("_on"):
+      tags[name[:-3]] = value
+      closing[name[:-3]] = getattr(charsets, name[:-3].upper() + "_OFF")
+  tags["proportional"] = charsets.PROPORTIONAL
+  tags["fixed_spacing"] = charsets.FIXED_WIDTH
+  tags.update(_constants(speeds))
+  tags.update(_constants(extchars))
+  tags["newline"] = constants.NEWLINE
+  tags["newpage"] = constants.NEWPAGE
+  tags["time"] = "\x13"
+  return tags, closing
+
+
+TAGS, CLOSING_TAGS = _tags()
+"""Codes of the tags without arguments, and of the closing tags, by name."""
+
+MODES = _constants(modes)
+POSITIONS = _constants(positions)
+
+_TOKEN = re.compile(r"\{\{|\}\}|\{([^{}]*)\}|[{}]")
+
+
+def escape(data):
+  """Protect text from being read as markup.
+
+  :rtype: string
+  """
+  return data.replace("{", "{{").replace("}", "}}")
+
+
+def _tag(match):
+  token = match.group(0)
+  if token == "{{":
+    return "{"
+  if token == "}}":
+    return "}"
+  tag = match.group(1)
+  if tag is None:
+    raise ValueError("unbalanced %r at position %d" % (token, match.start()))
+  name = tag.strip().lower()
+  code = TAGS.get(name)
+  if code is not None:
+    return code
+  if name[:1] == "/" and name[1:] in CLOSING_TAGS:
+    return CLOSING_TAGS[name[1:]]
+  if name[:1] == "#" and len(name) == 7:
+    return colors.rgb(name.upper())
+  kind, _, argument = name.partition(":")
+  if kind == "shadow" and argument[:1] == "#" and len(argument) == 7:
+    return colors.shadow_rgb(argument.upper())
+  if kind == "string" and len(argument) == 1:
+    return "\x10%s" % tag.strip()[-1]  # labels are case sensitive
+  if kind == "mode":
+    mode, _, position = argument.partition(":")
+    if mode in MODES and (not position or position in POSITIONS):
+      return "%s%s%s" % (constants.ESC,
+                         POSITIONS[position or "middle_line"], MODES[mode])
+  raise ValueError("unknown tag %r at position %d" % (token, match.start()))
+
+
+class Compiler(object):
+  """Compiler of markup with a cache of the messages it compiled.
+
+  :ivar hits: number of compilations answered from the cache
+  :ivar misses: number of messages that had to be compiled
+  """
+
+  def __init__(self, max_entries=4096):
+    """
+    :param max_entries: number of compiled messages to remember; the least
+                        recently used are forgotten first
+    """
+    self.max_entries = max_entries
+    self.hits = 0
+    self.misses = 0
+    self._entries = OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  def clear(self):
+    self._entries.clear()
+
+  def compile(self, markup):
+    """Compile a message.
+
+    :param markup: message with tags
+    :returns: message with control codes
+    :rtype: string
+    :exception ValueError: if a tag is unknown or a brace unbalanced
+    """
+    entries = self._entries
+    compiled = entries.get(markup)
+    if compiled is not None:
+      self.hits += 1
+      if len(entries) > self.max_entries // 2:
+        # Only keep the order up to date once forgetting can happen.
+        del entries[markup]
+        entries[markup] = compiled
+      return compiled
+    self.misses += 1
+    if "{" in markup or "}" in markup:
+      compiled = _TOKEN.sub(_tag, markup)
+    else:
+      compiled = markup
+    entries[markup] = compiled
+    if len(entries) > self.max_entries:
+      entries.popitem(last=False)
+    return compiled
+
+  def length(self, markup):
+    """Number of bytes a message takes in a file once compiled.
+
+    :rtype: int
+    :exception ValueError: if a tag is unknown or a brace unbalanced
+    """
+    return len(self.compile(markup))
+
+  def text(self, markup, size=None, **kwargs):
+    """Build a TEXT file from a message.
+
+    Other arguments are passed to :class:`alphasign.text.Text`.
+
+    :param markup: message with tags
+    :param size: bytes to allocate for the file (default: the larger of 64
+                 and the compiled message)
+    :rtype: :class:`alphasign.text.Text`
+    :exception ValueError: if the compiled message is larger than
+                           :const:`MAX_TEXT_SIZE` or than ``size``, or a tag
+                           is unknown
+    """
+    data = self.compile(markup)
+    limit = min(size or MAX_TEXT_SIZE, MAX_TEXT_SIZE)
+    if len(data) > limit:
+      raise ValueError("message takes %d bytes, more than %d: %r" %
+                       (len(data), limit, markup))
+    return Text(data, size=size, **kwargs)
+
+
+default_compiler = Compiler()
+"""Compiler used by the functions of this module."""
+
+
+def compile(markup):
+  """Compile a message with :data:`default_compiler` (see
+  :meth:`Compiler.compile`)."""
+  return default_compiler.compile(markup)
+
+
+def length(markup):
+  """Compiled size of a message (see :meth:`Compiler.length`)."""
+  return default_compiler.length(markup)
+
+
+def text(markup, size=None, **kwargs):
+  """Build a TEXT file from a message (see :meth:`Compiler.text`)."""
+  return default_compiler.text(markup, size=size, **kwargs)
@@ -0,0 +1,216 @@
+"""
+Planning of a sign's memory configuration.
+
+Allocating files (:meth:`alphasign.interfaces.base.BaseInterface.allocate`)
+replaces the sign's whole file table and clears every file, so the display
+goes blank until all of them are written again. :class:`MemoryPlanner` keeps
+track of what is allocated and written on a sign and, when the wanted set of
+files changes, only reallocates if a file no longer fits its allocation::
+
+  planner = MemoryPlanner(budget=4096)
+  planner.apply(sign, [greeting_txt, temp_str])  # allocates and writes both
+  temp_str.data = "22C"
+  planner.apply(sign, [greeting_txt, temp_str])  # writes temp_str only
+
+Allocations are given some headroom over the files' sizes, so files can grow
+a little without clearing the sign. After a restart, a planner can be filled
+in from what the sign already holds with
+:meth:`alphasign.interfaces.base.BaseInterface.reconcile`.
+"""
+import collections
+
+from alphasign import constants
+from alphasign import packet
+from alphasign.parser import MemoryEntry
+from alphasign.string import String
+from alphasign.time import run_times
+
+
+# Size of each TARGET TEXT file set up by allocate.
+TARGET_SIZE = 100
+
+# Largest TEXT message a TEXT file holds.
+MAX_TEXT_SIZE = 125
+
+# Largest STRING file a sign accepts.
+MAX_STRING_SIZE = 125
+
+Plan = collections.namedtuple("Plan", "allocation writes times")
+"""Changes needed to get a set of files on a sign.
+
+``allocation`` is the list of :class:`alphasign.parser.MemoryEntry` to
+allocate, or None if the current allocation can be kept, ``writes`` the
+files to write afterwards and ``times`` the TEXT files whose start and stop
+times are set in place with a run time table, without reallocating.
+"""
+
+
+def entry(obj):
+  """Get the memory configuration entry allocating a file object.
+
+  :param obj: file object (:class:`alphasign.text.Text`,
+              :class:`alphasign.string.String`, ...)
+
+  :rtype: :class:`alphasign.parser.MemoryEntry`
+  """
+  if isinstance(obj, String):
+    return MemoryEntry(obj.label, "B", constants.LOCKED, obj.size,
+                       "0000")  # unused for strings
+  return MemoryEntry(obj.label, "A", constants.UNLOCKED, obj.size,
+                     run_times(getattr(obj, "start", None),
+                               getattr(obj, "stop", None)))
+
+
+def fits(wanted, allocated):
+  """Check whether a file can be written to an existing allocation.
+
+  The start and stop times of TEXT files do not matter, since they can be
+  changed in place (see
+  :meth:`alphasign.interfaces.base.BaseInterface.set_run_times`).
+
+  :param wanted: :class:`alphasign.parser.MemoryEntry` the file needs
+  :param allocated: :class:`alphasign.parser.MemoryEntry` on the sign, or None
+
+  :rtype: bool
+  """
+  return (allocated is not None and
+          allocated.label == wanted.label and
+          allocated.type == wanted.type and
+          allocated.lock == wanted.lock and
+          (allocated.type == "A" or allocated.qqqq == wanted.qqqq) and
+          allocated.size >= wanted.size)
+
+
+class MemoryPlanner(object):
+  """Memory map of a sign, used to send only what changed.
+
+  :ivar entries: dict of label to the :class:`alphasign.parser.MemoryEntry`
+                 allocated on the sign, or None if unknown
+  :ivar written: dict of label to the command last written to that file
+  :ivar reallocations: number of times the sign's memory was reallocated
+  """
+
+  def __init__(self, budget=None, headroom=0.25, targets=5):
+    """
+    :param budget: bytes of sign memory the files may use, including the
+                   TARGET TEXT files (default: no limit)
+    :param headroom: fraction added to each file's size when allocating, so
+                     it can grow without a reallocation
+    :param targets: number of TARGET TEXT files to allocate
+    """
+    self.budget = budget
+    self.headroom = headroom
+    self.targets = targets
+    self.reallocations = 0
+    self.reset()
+
+  def reset(self, entries=None, written=None):
+    """Set what is known to be on the sign.
+
+    :param entries: list of :class:`alphasign.parser.MemoryEntry` allocated
+                    on the sign (default: unknown)
+    :param written: dict of label to the command in that file
+    """
+    if entries is None:
+      self.entries = None
+    else:
+      self.entries = collections.OrderedDict([(e.label, e) for e in entries])
+    self.written = dict(written or {})
+
+  def pack(self, wanted):
+    """Choose allocation sizes for a list of entries within the budget.
+
+    Each entry gets the planner's headroom if everything still fits in the
+    budget, and its exact size otherwise. STRING files are never given more
+    than :const:`MAX_STRING_SIZE` bytes.
+
+    :param wanted: list of :class:`alphasign.parser.MemoryEntry`
+
+    :rtype: list of :class:`alphasign.parser.MemoryEntry`
+    :exception ValueError: if the entries don't fit in the budget
+    """
+    padded = [e._replace(size=min(int(e.size * (1 + self.headroom) + 0.999),
+                                  e.type == "B" and MAX_STRING_SIZE or 0xFFFF))
+              for e in wanted]
+    if self.budget is None:
+      return padded
+    available = self.budget - self.targets * TARGET_SIZE
+    if sum([e.size for e in padded]) <= available:
+      return padded
+    needed = sum([e.size for e in wanted])
+    if needed > available:
+      raise ValueError("files need %d bytes but only %d are available" %
+                       (needed, available))
+    return list(wanted)
+
+  def plan(self, files):
+    """Work out the changes needed to get a set of files on the sign.
+
+    :param files: list of file objects with contents
+                  (:class:`alphasign.text.Text`,
+                  :class:`alphasign.string.String`, ...)
+
+    :rtype: :class:`Plan`
+    :exception ValueError: if a reallocation is needed and the files don't fit
+                           in the budget
+    """
+    wanted = [entry(obj) for obj in files]
+    if self.entries is not None:
+      if all([fits(w, self.entries.get(w.label)) for w in wanted]):
+        writes = [obj for obj in files
+                  if self.written.get(obj.label) != packet.commands(obj)[0]]
+        times = [obj for obj, w in zip(files, wanted)
+                 if w.qqqq != self.entries[w.label].qqqq]
+        return Plan(None, writes, times)
+    return Plan(self.pack(wanted), list(files), [])
+
+  def _accepted(self, interface, allocation):
+    # A sign ignores a memory configuration it can't hold without saying so;
+    # only its file table tells. Signs that don't answer are trusted.
+    entries = interface.read_memory_configuration()
+    if entries is None:
+      return True
+    allocated = dict([(e.label, e) for e in entries])
+    return all([fits(e, allocated.get(e.label)) for e in allocation])
+
+  def apply(self, interface, files):
+    """Allocate and write a set of files, sending only what is needed.
+
+    Files still on the sign that are not in ``files`` are left alone unless
+    the sign's memory has to be reallocated. A new allocation is read back
+    from signs that answer, and is only recorded once the sign holds it.
+
+    :param interface: interface to the sign
+    :param files: list of file objects, as for :meth:`plan`
+
+    :rtype: :class:`Plan` that was carried out
+    :exception ValueError: if the files don't fit in the budget
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    from alphasign.interfaces import base  # base imports this module
+    base.check_blocking(interface)
+    plan = self.plan(files)
+    if plan.allocation is not None:
+      self.reallocations += 1
+      if (interface.allocate(plan.allocation, targets=self.targets) is False or
+          not self._accepted(interface, plan.allocation)):
+        self.reset()
+        return plan
+      self.reset(plan.allocation)
+
+    if plan.writes or plan.times:
+      batch = interface.batch()
+      if plan.times:
+        batch.set_run_times(plan.times)
+      for obj in plan.writes:
+        batch.write(obj)
+      if batch.flush() is False:
+        for obj in plan.writes:
+          self.written.pop(obj.label, None)
+      else:
+        for obj in plan.writes:
+          self.written[obj.label] = packet.commands(obj)[0]
+        for obj in plan.times:
+          self.entries[obj.label] = self.entries[obj.label]._replace(
+            qqqq=entry(obj).qqqq)
+    return plan
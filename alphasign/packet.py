@@ -1,4 +1,28 @@
-import constants
+from alphasign import constants
+
+
+# Character encoding of packets on the wire. Every code point below 256 maps to
+# the byte of the same value.
+ENCODING = "latin-1"
+
+_PREAMBLE = (constants.NUL * 5 + constants.SOH).encode(ENCODING)
+_STX = constants.STX.encode(ENCODING)
+_ETX = constants.ETX.encode(ENCODING)
+_EOT = constants.EOT.encode(ENCODING)
+
+# Encoded preamble, type code, address and first STX, keyed by
+# (type code, address).
+_HEADERS = {}
+
+# Header of packets that are not explicitly addressed.
+_DEFAULT_HEADER = _PREAMBLE + (constants.TYPE_ALL_SIGNS +
+                               constants.ADDRESS_BROADCAST +
+                               constants.STX).encode(ENCODING)
+
+# Largest nested packet :class:`alphasign.interfaces.base.Batch` will build
+# before starting a new transmission. Signs buffer incoming packets in a small
+# serial buffer, so keep nested transmissions modest.
+MAX_NESTED_SIZE = 1024
 
 
 class Packet(object):
@@ -6,18 +30,189 @@ class Packet(object):
 
   Packet objects are created by other classes and should not usually be
   instantiated directly.
+
+  Packets are encoded to bytes once, the first time :attr:`data` is used, and
+  interfaces hand those bytes straight to the device. Packets that are only
+  taken apart again (batched, or copied for another address) are never
+  encoded.
+
+  The bytes are a new, immutable object for every packet rather than a view
+  of one reused bytearray. Packets are often still in use after the next one
+  is built (queued, retried, or written to several signs), which a shared
+  buffer would overwrite. pySerial copies a memoryview into bytes before
+  writing it anyway. And ``benchmarks/encode.py`` shows the buffer saves
+  well under a tenth of a microsecond per packet, while allocating more.
+
+  :ivar contents: list of commands carried by this packet
+  :ivar data: the encoded packet (``bytes(packet)`` returns the same object)
+  :ivar type: type code of the signs the packet is for
+  :ivar address: address of the signs the packet is for
   """
 
-  def __init__(self, contents):
-    self.type     = "Z"   # Type Code (see protocol)
-    self.address  = "00"  # Sign Address (see protocol)
-    self._pkt = ("%s%s%s%s%s%s%s" %
-                 (constants.NUL * 5, constants.SOH, self.type,
-                  self.address, constants.STX, contents,
-                  constants.EOT))
+  __slots__ = ("contents", "type", "address", "explicit", "_data")
+
+  def __init__(self, contents, type=None, address=None):
+    """
+    :param contents: command string, or a list of command strings to send
+                     together as a nested packet
+    :param type: type code
+                 (default: :const:`alphasign.constants.TYPE_ALL_SIGNS`)
+    :param address: two-character sign address; either character may be the
+                    wildcard ``?`` (default:
+                    :const:`alphasign.constants.ADDRESS_BROADCAST`)
+    """
+    self._data = None
+    # Interfaces apply their own defaults to packets not explicitly addressed.
+    if type is None and address is None:
+      self.explicit = False
+      self.type = constants.TYPE_ALL_SIGNS
+      self.address = constants.ADDRESS_BROADCAST
+    else:
+      self.explicit = True
+      if type is None:
+        type = constants.TYPE_ALL_SIGNS
+      if address is None:
+        address = constants.ADDRESS_BROADCAST
+      if len(address) != 2:
+        raise ValueError("sign address must be two characters: %r" % address)
+      self.type = type
+      self.address = address
+    if isinstance(contents, (list, tuple)):
+      self.contents = list(contents)
+    else:
+      self.contents = [contents]
+
+  @property
+  def data(self):
+    """The encoded packet."""
+    data = self._data
+    if data is None:
+      contents = self.contents
+      if len(contents) == 1:
+        # Single command: the common case, encoded inline. Packets that are
+        # not explicitly addressed share one ready-made header.
+        if self.explicit:
+          header = (_HEADERS.get((self.type, self.address)) or
+                    _header(self.type, self.address))
+        else:
+          header = _DEFAULT_HEADER
+        text = contents[0]
+        if not isinstance(text, bytes):
+          text = text.encode(ENCODING)
+        data = b"".join((header, text, _EOT))
+      else:
+        data = encode(contents, self.type, self.address)
+      self._data = data
+    return data
 
-  def __str__(self):
-    return self._pkt
+  @classmethod
+  def nested(cls, objs):
+    """Combine several packets into one nested packet.
+
+    :param objs: list of :class:`Packet`, :class:`alphasign.text.Text` or
+                 :class:`alphasign.string.String` objects
+
+    :rtype: :class:`Packet` object
+    """
+    contents = []
+    for obj in objs:
+      contents.extend(commands(obj))
+    return cls(contents)
+
+  def addressed(self, type=None, address=None):
+    """Copy this packet for another sign address.
+
+    :param type: type code (default: keep this packet's)
+    :param address: sign address (default: keep this packet's)
+
+    :rtype: :class:`Packet` object
+    """
+    if type is None:
+      type = self.type
+    if address is None:
+      address = self.address
+    return Packet(self.contents, type=type, address=address)
+
+  def __len__(self):
+    return len(self.data)
+
+  def __bytes__(self):
+    return self.data
+
+  if str is bytes:
+    def __str__(self):
+      return self.data
+  else:
+    def __str__(self):
+      return self.data.decode(ENCODING)
 
   def __repr__(self):
-    return repr(self._pkt)
+    return repr(str(self))
+
+
+def _encode_text(text):
+  if isinstance(text, bytes):
+    return text
+  return text.encode(ENCODING)
+
+
+def _header(type, address):
+  header = _PREAMBLE + _encode_text(type) + _encode_text(address) + _STX
+  _HEADERS[(type, address)] = header
+  return header
+
+
+def encode(contents, type, address):
+  """Encode commands into a complete packet.
+
+  :param contents: list of command strings (or bytes)
+  :param type: type code
+  :param address: sign address
+
+  :rtype: bytes
+  """
+  header = _HEADERS.get((type, address)) or _header(type, address)
+  if len(contents) == 1:
+    return header + _encode_text(contents[0]) + _EOT
+  # Nested packet: each command is framed with STX ... ETX.
+  return (header + (_ETX + _STX).join([_encode_text(c) for c in contents]) +
+          _ETX + _EOT)
+
+
+def as_packet(obj):
+  """Get the packet for a packet or file object.
+
+  :param obj: :class:`Packet`, or an object with a ``packet()`` method such as
+              :class:`alphasign.text.Text`
+
+  :rtype: :class:`Packet` object
+  """
+  if isinstance(obj, Packet):
+    return obj
+  return obj.packet()
+
+
+def commands(obj):
+  """Get the list of commands carried by a packet or file object.
+
+  :param obj: :class:`Packet`, or an object with a ``packet()`` method such as
+              :class:`alphasign.text.Text`
+
+  :rtype: list of strings
+  """
+  return as_packet(obj).contents
+
+
+def nested_size(sizes):
+  """Number of bytes a nested packet of commands with the given sizes takes.
+
+  :param sizes: list of command lengths
+
+  :rtype: int
+  """
+  # NULs, SOH, type code, address and EOT, plus STX and ETX around each
+  # command. A lone command is not followed by an ETX.
+  framing = 5 + 1 + 1 + 2 + 1
+  if len(sizes) == 1:
+    return framing + 1 + sizes[0]
+  return framing + sum(sizes) + 2 * len(sizes)
@@ -0,0 +1,191 @@
+"""
+Parsing of packets received from a sign.
+
+Signs answer read commands (:const:`alphasign.constants.READ_TEXT`,
+:const:`alphasign.constants.READ_SPECIAL`, ...) with packets framed like the
+ones sent to them, carrying the equivalent write command::
+
+  [NUL x 5+][SOH][Type "0"][Address][STX][Command][Label][Data]
+    [ETX][Checksum][EOT]
+
+:class:`PacketParser` turns arbitrary chunks of received data into
+:class:`Frame` objects, discarding noise between packets and packets that
+fail their checksum. The framing itself is done by :func:`split_packets` and
+:func:`split_commands`, which :class:`alphasign.decoder.Decoder` shares.
+Read commands are sent through
+:meth:`alphasign.interfaces.base.BaseInterface.read`.
+"""
+import collections
+
+from alphasign import constants
+
+
+# Command code a sign answers each read command with.
+RESPONSE_CODES = {
+  constants.READ_TEXT: constants.WRITE_TEXT,
+  constants.READ_SPECIAL: constants.WRITE_SPECIAL,
+  constants.READ_STRING: constants.WRITE_STRING,
+  constants.READ_SMALL_DOTS: constants.WRITE_SMALL_DOTS,
+  constants.READ_RGB_DOTS: constants.WRITE_RGB_DOTS,
+  constants.READ_LARGE_DOTS: constants.WRITE_LARGE_DOTS,
+}
+
+# Labels of the SPECIAL FUNCTIONS that can be read (p29).
+SPECIAL_TIME                 = "\x20"  # Time of day
+SPECIAL_MEMORY_POOL_SIZE     = "#"     # Memory pool size
+SPECIAL_MEMORY_CONFIGURATION = "$"     # File table
+SPECIAL_DAY_OF_WEEK          = "&"     # Day of week
+SPECIAL_TIME_FORMAT          = "'"     # Time format
+SPECIAL_RUN_TIME_TABLE       = ")"     # Run time table
+SPECIAL_RUN_SEQUENCE         = "."     # Run sequence
+SPECIAL_DATE                 = ";"     # Date
+
+Frame = collections.namedtuple("Frame", "type address responses")
+"""A packet received from a sign: type code, sign address and a list of
+:class:`Response` objects."""
+
+Response = collections.namedtuple("Response", "command label data")
+"""One command in a received packet: command code, file label and data."""
+
+MemoryEntry = collections.namedtuple("MemoryEntry",
+                                     "label type lock size qqqq")
+"""One file in a sign's memory configuration. ``type`` is ``A`` (TEXT),
+``B`` (STRING) or ``D`` (DOTS PICTURE), ``size`` is in bytes and ``qqqq`` is
+the type-specific field (start and stop times for TEXT files)."""
+
+
+def checksum(data):
+  """Compute the checksum of a command, from STX through ETX inclusive.
+
+  :rtype: string of four hex digits
+  """
+  return "%04X" % (sum([ord(c) for c in data]) & 0xFFFF)
+
+
+def parse_memory_configuration(data):
+  """Parse the data of a memory configuration response.
+
+  :param data: data of the response to a read of
+               :const:`SPECIAL_MEMORY_CONFIGURATION`
+
+  :rtype: list of :class:`MemoryEntry`
+  """
+  entries = []
+  for i in range(0, len(data) - 10, 11):
+    entry = data[i:i + 11]
+    try:
+      size = int(entry[3:7], 16)
+    except ValueError:
+      continue
+    entries.append(MemoryEntry(entry[0], entry[1], entry[2], size, entry[7:]))
+  return entries
+
+
+def split_packets(data, max_size=65536):
+  """Find the packets in a stream of received data.
+
+  Noise between packets is skipped. A packet cut short by the start of
+  another is discarded, and so is an unfinished packet longer than
+  ``max_size``.
+
+  :param data: received data, possibly ending part way through a packet
+  :param max_size: longest unfinished packet to keep
+
+  :returns: (bodies, errors, rest) tuple: the body of each complete packet,
+            from after the SOH up to the EOT, the number of packets
+            discarded and the unfinished packet to prepend to the next chunk
+  """
+  parts = data.split(constants.EOT)
+  rest = parts.pop()
+  bodies = []
+  errors = 0
+  for part in parts:
+    start = part.rfind(constants.SOH)
+    if start < 0:
+      continue  # noise
+    # An earlier SOH means a packet was cut short by this one.
+    if part.find(constants.SOH) != start:
+      errors += 1
+    bodies.append(part[start + 1:])
+
+  start = rest.find(constants.SOH)
+  if start < 0 or len(rest) - start > max_size:
+    if start >= 0:
+      errors += 1
+    rest = ""
+  else:
+    rest = rest[start:]
+  return bodies, errors, rest
+
+
+def split_commands(body):
+  """Split the body of a packet into its commands.
+
+  :param body: packet from after the SOH up to the EOT (see
+               :func:`split_packets`)
+
+  :returns: list of commands, each a command code followed by its fields, or
+            None if the packet is malformed or fails a checksum
+  """
+  if body[3:4] != constants.STX:
+    return None
+  rest = body[4:]
+  if constants.STX not in rest and constants.ETX not in rest:
+    # Most packets carry a single command.
+    return rest and [rest] or []
+  commands = []
+  for chunk in rest.split(constants.STX):
+    etx = chunk.find(constants.ETX)
+    if etx >= 0:
+      command = chunk[:etx]
+      check = chunk[etx + 1:]
+      if (check and check.upper() !=
+          checksum(constants.STX + command + constants.ETX)):
+        return None
+    else:
+      command = chunk
+    if command:
+      commands.append(command)
+  return commands
+
+
+class PacketParser(object):
+  """Incremental parser for data received from a sign.
+
+  :ivar errors: number of damaged packets discarded
+  """
+
+  def __init__(self, max_size=65536):
+    """
+    :param max_size: longest packet to buffer; a packet that grows beyond this
+                     without an EOT is discarded
+    """
+    self.max_size = max_size
+    self.errors = 0
+    self._buffer = ""
+
+  def feed(self, data):
+    """Add received data.
+
+    :param data: chunk of received data of any length
+    :returns: frames completed by this chunk
+    :rtype: list of :class:`Frame`
+    """
+    bodies, errors, self._buffer = split_packets(self._buffer + data,
+                                                 self.max_size)
+    frames = []
+    for body in bodies:
+      frame = self._parse(body)
+      if frame is None:
+        errors += 1
+      else:
+        frames.append(frame)
+    self.errors += errors
+    return frames
+
+  def _parse(self, body):
+    commands = split_commands(body)
+    if commands is None:
+      return None
+    return Frame(body[0], body[1:3],
+                 [Response(c[0], c[1:2], c[2:]) for c in commands])
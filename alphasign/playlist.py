@@ -0,0 +1,169 @@
+"""
+Rotation of messages through the run sequence.
+
+Rewriting one TEXT file over and over to change what a sign displays sends
+the whole message every time. A :class:`Playlist` puts every message in a
+file of its own once and then switches between them with run sequence
+commands of a few bytes::
+
+  playlist = Playlist(sign, [weather_txt, news_txt, ad_txt, temp_str])
+  playlist.show(news_txt)             # uploads everything, shows the news
+  playlist.show(weather_txt, ad_txt)  # sends the run sequence only
+  while True:
+    playlist.rotate()                 # one message after another
+    time.sleep(10)
+
+A TEXT message that shares a label with one already in the playlist is
+copied to a spare label when added; :meth:`Playlist.add` returns the copy,
+which is the object to show. A message whose contents change is written
+again the next time the playlist is shown; the others are left alone. Files
+are allocated through a :class:`alphasign.memory.MemoryPlanner`, so memory
+is only reallocated when a message outgrows its file. STRING files called by
+the messages can be added to the playlist too; they are written but never
+put in the run sequence.
+"""
+import copy
+
+from alphasign import memory
+from alphasign.interfaces import base
+from alphasign.schedule import SPARE_LABELS
+from alphasign.string import String
+from alphasign.text import Text
+
+
+class Playlist(object):
+  """Set of messages on a sign, shown by changing the run sequence.
+
+  :ivar files: file objects in the playlist, in the order they were added
+  :ivar planner: :class:`alphasign.memory.MemoryPlanner` tracking the sign
+  :ivar current: TEXT files in the run sequence last sent, or None
+  :ivar switches: number of run sequences sent
+  :ivar uploads: number of files written
+  """
+
+  def __init__(self, interface, files=(), planner=None, labels=SPARE_LABELS):
+    """
+    :param interface: interface to the sign
+    :param files: file objects (:class:`alphasign.text.Text`,
+                  :class:`alphasign.string.String`, ...)
+    :param planner: :class:`alphasign.memory.MemoryPlanner` to allocate with
+                    (default: a new planner)
+    :param labels: labels that messages sharing a label may be moved to
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    if planner is None:
+      planner = memory.MemoryPlanner()
+    self.interface = interface
+    self.planner = planner
+    self.labels = labels
+    self.files = []
+    self.current = None
+    self.switches = 0
+    self.uploads = 0
+    self._position = 0
+    for obj in files:
+      self.add(obj)
+
+  def add(self, obj):
+    """Add a file to the playlist.
+
+    If another file in the playlist has the same label, a copy of the file
+    with a spare label is added instead; the file itself is left alone.
+
+    :param obj: file object
+    :returns: the file object added, or its copy
+    :exception ValueError: if the label is taken and the file is not a
+                           :class:`alphasign.text.Text` (STRING files are
+                           called by their label, so they can't be moved), or
+                           there is no spare label
+    """
+    used = set([f.label for f in self.files])
+    if obj.label in used:
+      if not isinstance(obj, Text):
+        raise ValueError("%r cannot be moved to another label" % (obj,))
+      spare = [label for label in self.labels if label not in used]
+      if not spare:
+        raise ValueError("no spare label for %r" % (obj,))
+      obj = copy.copy(obj)
+      obj.label = spare[0]
+    self.files.append(obj)
+    return obj
+
+  def remove(self, obj):
+    """Remove a file from the playlist.
+
+    Its memory is kept until the sign is next reallocated.
+    """
+    self.files.remove(obj)
+
+  @property
+  def messages(self):
+    """TEXT files in the playlist, which can be shown."""
+    return [f for f in self.files if not isinstance(f, String)]
+
+  def sync(self):
+    """Write the files whose contents changed since they were last written.
+
+    The first call allocates and writes every file.
+
+    :rtype: :class:`alphasign.memory.Plan` that was carried out
+    :exception ValueError: if the files don't fit in the planner's budget
+    """
+    plan = self.planner.apply(self.interface, self.files)
+    written = self.planner.written
+    self.uploads += len([f for f in plan.writes if f.label in written])
+    if plan.allocation is not None:
+      self.current = None  # reallocating clears the run sequence too
+    return plan
+
+  def show(self, *files, **kwargs):
+    """Display some of the messages, in order.
+
+    Changed files are written first (see :meth:`sync`); the run sequence is
+    only sent if it differs from the one on the sign. :meth:`rotate` carries
+    on after the last of the messages.
+
+    :param files: TEXT file objects in the playlist, or their positions in
+                  :attr:`messages`
+    :param locked: keyword argument; forbid changing the sequence with the
+                   IR keyboard
+
+    :returns: False if a write failed
+    :exception ValueError: if a file is not in the playlist
+    """
+    messages = self.messages
+    files = [isinstance(f, int) and messages[f] or f for f in files]
+    for obj in files:
+      if obj not in messages:
+        raise ValueError("%r is not in the playlist" % (obj,))
+    if files:
+      self._position = messages.index(files[-1]) + 1
+    self.sync()
+    labels = [f.label for f in files]
+    if labels == self.current:
+      return True
+    result = self.interface.set_run_sequence(files,
+                                             kwargs.get("locked", False))
+    if result is not False:
+      self.current = labels
+      self.switches += 1
+    return result
+
+  def rotate(self, count=1):
+    """Display the next messages in the playlist.
+
+    Each call moves on by ``count`` messages, wrapping around at the end.
+
+    :param count: number of messages to display at once
+    :returns: False if a write failed
+    """
+    messages = self.messages
+    if not messages:
+      return True
+    start = self._position % len(messages)
+    files = [messages[(start + i) % len(messages)]
+             for i in range(min(count, len(messages)))]
+    result = self.show(*files)
+    self._position = start + count
+    return result
@@ -0,0 +1,156 @@
+"""
+Scheduling of TEXT files by time of day.
+
+A sign only displays each TEXT file between the start and stop times it was
+allocated with (see :class:`alphasign.text.Text`), so a day's worth of
+messages can be uploaded once and the sign switches between them by itself.
+:class:`Schedule` compiles a day's plan into the memory configuration and run
+sequence that do this::
+
+  day = Schedule()
+  day.add(breakfast_txt, "06:00", "10:30")
+  day.add(lunch_txt, "11:00", "14:00")
+  day.add(breakfast_txt, "17:00", "19:00")  # copied to a spare label
+  day.add(welcome_txt)                      # displayed all day
+  day.add(temp_str)                         # STRING called by the messages
+  day.upload(sign)
+
+A TEXT file has a single start and stop time, so a message scheduled more
+than once is copied to a spare label for each extra time window.
+
+Uploading through a :class:`alphasign.memory.MemoryPlanner` changes the
+times of files already on the sign with a run time table instead of
+reallocating memory, and only writes the files that changed::
+
+  planner = alphasign.memory.MemoryPlanner()
+  day.upload(sign, planner)
+  ...
+  tomorrow.upload(sign, planner)
+"""
+import collections
+import copy
+
+from alphasign import memory
+from alphasign.interfaces import base
+from alphasign.string import String
+from alphasign.text import Text
+from alphasign.time import run_times
+
+
+# Labels given to copies of messages scheduled more than once.
+SPARE_LABELS = ("ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+                "abcdefghijklmnopqrstuvwxyz")
+
+Slot = collections.namedtuple("Slot", "file start stop")
+"""A file and the times it is displayed between."""
+
+Program = collections.namedtuple("Program", "files allocation sequence")
+"""A compiled schedule: the file objects to write, with the labels and times
+they were given, the :class:`alphasign.parser.MemoryEntry` list allocating
+them, and the TEXT files of the run sequence."""
+
+
+class Schedule(object):
+  """A day's plan of TEXT files and the times they are displayed.
+
+  :ivar slots: list of :class:`Slot`, in the order they were added
+  """
+
+  def __init__(self, targets=5, labels=SPARE_LABELS):
+    """
+    :param targets: number of TARGET TEXT files to allocate
+    :param labels: labels that copies of messages may use; labels of files in
+                   the schedule are never reused
+    """
+    self.targets = targets
+    self.labels = labels
+    self.slots = []
+
+  def add(self, obj, start=None, stop=None):
+    """Add a file to the schedule.
+
+    :param obj: file object (:class:`alphasign.text.Text`,
+                :class:`alphasign.string.String`, ...)
+    :param start: time of day the sign starts displaying the file, in any
+                  form :func:`alphasign.time.time_code` takes
+                  (default: displayed all day)
+    :param stop: time of day the sign stops displaying the file; required
+                 with ``start``
+
+    :exception ValueError: if a time is not on the sign's 10-minute grid, only
+                           one of the times is given, or a time is given for
+                           a STRING file
+    """
+    if isinstance(obj, String):
+      if start is not None or stop is not None:
+        raise ValueError("STRING files have no display times")
+    else:
+      run_times(start, stop)
+    self.slots.append(Slot(obj, start, stop))
+
+  def compile(self):
+    """Work out the files, allocation and run sequence of the schedule.
+
+    :rtype: :class:`Program`
+    :exception ValueError: if there are not enough spare labels for the
+                           copies, or a copy is needed of a file that is not
+                           a :class:`alphasign.text.Text`
+    """
+    used = set([slot.file.label for slot in self.slots])
+    spare = iter([label for label in self.labels if label not in used])
+    files = []
+    sequence = []
+    seen = {}
+    for slot in self.slots:
+      obj = slot.file
+      if isinstance(obj, String):
+        if seen.get(obj.label) is not obj:
+          seen[obj.label] = obj
+          files.append(obj)
+        continue
+      obj = copy.copy(obj)
+      obj.start = slot.start
+      obj.stop = slot.stop
+      if obj.label in seen:
+        if not isinstance(obj, Text):
+          raise ValueError("%r cannot be copied to another label" %
+                           (slot.file,))
+        try:
+          obj.label = next(spare)
+        except StopIteration:
+          raise ValueError("no spare label for another copy of %r" %
+                           (slot.file,))
+      seen[obj.label] = obj
+      files.append(obj)
+      sequence.append(obj)
+    return Program(files, [memory.entry(obj) for obj in files], sequence)
+
+  def upload(self, interface, planner=None):
+    """Set the sign up to run the schedule.
+
+    :param interface: interface to the sign
+    :param planner: :class:`alphasign.memory.MemoryPlanner` tracking the
+                    sign, to send only what changed (default: allocate and
+                    write everything)
+
+    :returns: False if a write failed
+    :exception ValueError: if the schedule does not compile (see
+                           :meth:`compile`), or the files don't fit in the
+                           planner's budget
+    :exception TypeError: if ``interface`` is an asyncio interface
+    """
+    base.check_blocking(interface)
+    program = self.compile()
+    if planner is not None:
+      planner.apply(interface, program.files)
+      if planner.entries is None:
+        return False  # the allocation failed
+    elif interface.allocate(program.allocation, targets=self.targets) is False:
+      return False
+    else:
+      batch = interface.batch()
+      for obj in program.files:
+        batch.write(obj)
+      if batch.flush() is False:
+        return False
+    return interface.set_run_sequence(program.sequence)
@@ -1,5 +1,5 @@
-import constants
-from packet import Packet
+from alphasign import constants
+from alphasign.packet import Packet
 
 
 class String(object):
@@ -41,9 +41,15 @@ class String(object):
     """
     return "\x10%s" % self.label
 
+  def packet(self):
+    """Build the packet that writes this STRING file.
+
+    :rtype: :class:`alphasign.packet.Packet` object
+    """
+    return Packet("%s%s%s" % (constants.WRITE_STRING, self.label, self.data))
+
   def __str__(self):
-    return str(Packet("%s%s%s" % (constants.WRITE_STRING, self.label,
-                                  self.data)))
+    return str(self.packet())
 
   def __repr__(self):
     return repr(self.__str__())
@@ -0,0 +1,126 @@
+"""
+Templates are TEXT files whose layout is fixed and only some fields change.
+The framing, display position, mode and control codes of the layout are put
+together once; producing a packet only fills in the fields.
+
+Fields are written as ``%(name)s``, and ``%%`` is a literal percent sign::
+
+  departures = alphasign.Template("%sGate %%(gate)s %s%%(time)s" %
+                                  (alphasign.colors.RED,
+                                   alphasign.colors.GREEN),
+                                  label="A", mode=alphasign.modes.HOLD)
+  sign.allocate((departures,))
+  sign.write(departures.packet(gate="12", time="10:45"))
+  sign.write(departures.packet("14", "11:05"))
+
+A template can be passed to
+:meth:`alphasign.interfaces.base.BaseInterface.allocate` and
+:meth:`alphasign.interfaces.base.BaseInterface.set_run_sequence` like a
+:class:`alphasign.text.Text`. It is not a drop-in for one elsewhere: a
+template with fields has nothing to write until they are filled in, so
+writing it as it is (to an interface, a
+:class:`alphasign.memory.MemoryPlanner`, a
+:class:`alphasign.playlist.Playlist`, ...) raises ValueError. Write the
+packets of :meth:`Template.packet` instead.
+
+Filled in messages are checked against the size of the file, so a value too
+long for it raises ValueError instead of being cut short by the sign.
+"""
+import re
+
+from alphasign import constants
+from alphasign import modes
+from alphasign import positions
+from alphasign.packet import Packet
+
+
+_FIELD = re.compile(r"%\((\w+)\)s")
+
+
+class Template(object):
+  """Class representing a TEXT file with a precompiled layout.
+
+  :ivar fields: names of the fields in the layout, in order
+  :ivar size: bytes allocated for the message, which filled in messages may
+              not exceed
+  """
+
+  def __init__(self, layout, label=None, size=None, position=None, mode=None,
+               priority=False, start=None, stop=None):
+    """
+    :param layout: message with ``%(name)s`` fields
+    :param label: file label (default: "A")
+    :param size: amount of bytes to allocate for object on sign (default: 64)
+    :param position: constant from :mod:`alphasign.positions`
+    :param mode: constant from :mod:`alphasign.modes`
+    :param priority: write the message as the priority TEXT file
+    :param start: time of day the sign starts displaying this file (see
+                  :class:`alphasign.text.Text`)
+    :param stop: time of day the sign stops displaying this file
+    """
+    if label is None:
+      label = "A"
+    if size is None:
+      size = 64
+    if position is None:
+      position = positions.MIDDLE_LINE
+    if mode is None:
+      mode = modes.ROTATE
+
+    self.layout = layout
+    self.label = label
+    self.position = position
+    self.mode = mode
+    self.priority = priority
+    self.start = start
+    self.stop = stop
+    self.fields = _FIELD.findall(layout)
+
+    # [WRITE_TEXT][File Label][ESC][Display Position][Mode Code][Message]
+    # Only the message part counts against the file size.
+    static_size = len(_FIELD.sub("", layout).replace("%%", "%"))
+    self.size = min(max(size, static_size, 1), 125)
+    prefix = "%s%s%s%s%s" % (constants.WRITE_TEXT,
+                             (priority and "0" or label),
+                             constants.ESC, position, mode)
+    self._limit = len(prefix) + self.size
+    self._format = prefix.replace("%", "%%") + layout
+    self._positional = _FIELD.sub("%s", self._format)
+
+  def command(self, *args, **values):
+    """Build the WRITE TEXT command for a set of field values.
+
+    Values are given either by name or, slightly faster, positionally in the
+    order of :attr:`fields`.
+
+    :rtype: string
+    :exception ValueError: if a field has no value, or the message is larger
+                           than :attr:`size`
+    """
+    if args:
+      command = self._positional % args
+    else:
+      try:
+        command = self._format % values
+      except KeyError as e:
+        raise ValueError("no value for field %s of %r; fill the fields in "
+                         "with packet()" % (e, self))
+    if len(command) > self._limit:
+      raise ValueError("message of %r takes %d bytes, more than %d" %
+                       (self, len(command) - self._limit + self.size,
+                        self.size))
+    return command
+
+  def packet(self, *args, **values):
+    """Build the packet writing this TEXT file with a set of field values.
+
+    Values are given as for :meth:`command`.
+
+    :rtype: :class:`alphasign.packet.Packet` object
+    :exception ValueError: if a field has no value, or the message is larger
+                           than :attr:`size`
+    """
+    return Packet(self.command(*args, **values))
+
+  def __repr__(self):
+    return "Template(%r, label=%r)" % (self.layout, self.label)
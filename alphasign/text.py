@@ -1,7 +1,7 @@
-import constants
-import modes
-import positions
-from packet import Packet
+from alphasign import constants
+from alphasign import modes
+from alphasign import positions
+from alphasign.packet import Packet
 
 
 class Text(object):
@@ -11,7 +11,8 @@ class Text(object):
   """
 
   def __init__(self, data=None, label=None, size=None,
-               position=None, mode=None, priority=False):
+               position=None, mode=None, priority=False, start=None,
+               stop=None):
     """
     :param data: initial string to insert into object
     :param label: file label (default: "A")
@@ -21,6 +22,11 @@ class Text(object):
     :param priority: set this text to be displayed instead of
                      all other TEXT files. Set to True with an empty message to
                      clear a priority TEXT.
+    :param start: time of day the sign starts displaying this file, in any
+                  form :func:`alphasign.time.time_code` takes
+                  (default: always displayed)
+    :param stop: time of day the sign stops displaying this file; required
+                 with ``start``
     """
     if data is None:
       data = ""
@@ -45,22 +51,29 @@ class Text(object):
     self.position = position
     self.mode = mode
     self.priority = priority
+    self.start = start
+    self.stop = stop
 
-  def __str__(self):
+  def packet(self):
+    """Build the packet that writes this TEXT file.
+
+    :rtype: :class:`alphasign.packet.Packet` object
+    """
     # [WRITE_TEXT][File Label][ESC][Display Position][Mode Code]
     #   [Special Specifier][ASCII Message]
 
     if self.data:
-      packet = Packet("%s%s%s%s%s%s" % (constants.WRITE_TEXT,
-                                        (self.priority and "0" or self.label),
-                                        constants.ESC,
-                                        self.position,
-                                        self.mode,
-                                        self.data))
-    else:
-      packet = Packet("%s%s" % (constants.WRITE_TEXT,
-                                (self.priority and "0" or self.label)))
-    return str(packet)
+      return Packet("%s%s%s%s%s%s" % (constants.WRITE_TEXT,
+                                      (self.priority and "0" or self.label),
+                                      constants.ESC,
+                                      self.position,
+                                      self.mode,
+                                      self.data))
+    return Packet("%s%s" % (constants.WRITE_TEXT,
+                            (self.priority and "0" or self.label)))
+
+  def __str__(self):
+    return str(self.packet())
 
   def __repr__(self):
     return repr(self.__str__())
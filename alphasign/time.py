@@ -1,5 +1,63 @@
-import constants
-from packet import Packet
+import datetime
+
+from alphasign import constants
+from alphasign.packet import Packet
+
+
+# Run time codes of TEXT files, besides times of day (see :func:`time_code`).
+ALWAYS  = "FF"  # display at any time; the stop time is ignored
+NEVER   = "FE"  # never display
+ALL_DAY = "FD"  # display all day; the stop time is ignored
+
+
+def time_code(value):
+  """Get the run time code for a time of day.
+
+  Signs run TEXT files on a 10-minute grid, from 00:00 to 23:50.
+
+  :param value: :class:`datetime.time`, (hour, minute) tuple, ``"HH:MM"``
+                string, one of :const:`ALWAYS`, :const:`NEVER` and
+                :const:`ALL_DAY`, or None for :const:`ALWAYS`
+  :returns: two hex digits
+  :rtype: string
+  :exception ValueError: if the time is not on the 10-minute grid
+  """
+  if value is None:
+    return ALWAYS
+  if value in (ALWAYS, NEVER, ALL_DAY):
+    return value
+  if isinstance(value, datetime.time):
+    hour, minute = value.hour, value.minute
+  elif isinstance(value, tuple):
+    hour, minute = value
+  else:
+    hour, _, minute = value.partition(":")
+    hour, minute = int(hour), int(minute)
+  if not 0 <= hour < 24 or not 0 <= minute < 60 or minute % 10:
+    raise ValueError("run times are multiples of 10 minutes from 00:00 to "
+                     "23:50, not %02d:%02d" % (hour, minute))
+  return "%02X" % (hour * 6 + minute // 10)
+
+
+def run_times(start=None, stop=None):
+  """Get the run time field of a TEXT file's memory configuration entry.
+
+  :param start: time of day the sign starts displaying the file, in any form
+                :func:`time_code` takes, or None with no ``stop`` to display
+                it always
+  :param stop: time of day the sign stops displaying the file; may be left
+               out when ``start`` is :const:`ALWAYS`, :const:`NEVER` or
+               :const:`ALL_DAY`
+  :returns: start and stop codes, four hex digits
+  :rtype: string
+  :exception ValueError: if only one of two times of day is given, or a time
+                         is not on the 10-minute grid
+  """
+  if stop is None and start in (ALWAYS, NEVER, ALL_DAY):
+    return start + ALWAYS
+  if (start is None) != (stop is None):
+    raise ValueError("give both a start and a stop time, or neither")
+  return time_code(start) + time_code(stop)
 
 
 class Time(object):
@@ -0,0 +1,71 @@
+"""Compare per-object writes with nested (batched) writes.
+
+Bytes on the wire are counted exactly; wire time is what those bytes take on a
+4800 baud 7E2 serial link (11 bits per byte).
+
+Usage: python benchmarks/batch.py [number of files]
+"""
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import alphasign
+from alphasign.interfaces import base
+
+
+BAUD = 4800
+BITS_PER_BYTE = 11  # start + 7 data + parity + 2 stop
+
+
+class CountingInterface(base.BaseInterface):
+  def __init__(self):
+    self.bytes = 0
+    self.writes = 0
+
+  def _write(self, packet):
+    self.bytes += len(packet)
+    self.writes += 1
+    return True
+
+
+def make_files(count):
+  files = []
+  for i in range(count):
+    files.append(alphasign.String("value %d" % i, label=chr(ord("1") + i % 9)))
+    files.append(alphasign.Text("line %d %s" % (i, files[-1].call()),
+                                label=chr(ord("A") + i % 26)))
+  return files
+
+
+def run(count):
+  files = make_files(count)
+
+  single = CountingInterface()
+  start = time.time()
+  for obj in files:
+    single.write(obj)
+  single.set_run_sequence([f for f in files if isinstance(f, alphasign.Text)])
+  single_cpu = time.time() - start
+
+  batched = CountingInterface()
+  start = time.time()
+  with batched.batch() as batch:
+    for obj in files:
+      batch.write(obj)
+    batch.set_run_sequence([f for f in files if isinstance(f, alphasign.Text)])
+  batched_cpu = time.time() - start
+
+  for name, iface, cpu in (("per-object", single, single_cpu),
+                           ("batched", batched, batched_cpu)):
+    wire = iface.bytes * BITS_PER_BYTE / float(BAUD)
+    print("%-10s writes=%4d bytes=%6d wire=%7.3fs encode=%.4fs" %
+          (name, iface.writes, iface.bytes, wire, cpu))
+  saved = single.bytes - batched.bytes
+  print("saved %d bytes (%.1f%%), %.3fs of wire time" %
+        (saved, 100.0 * saved / single.bytes,
+         saved * BITS_PER_BYTE / float(BAUD)))
+
+
+if __name__ == "__main__":
+  run(len(sys.argv) > 1 and int(sys.argv[1]) or 20)
@@ -0,0 +1,50 @@
+"""Time the streaming decoder on a multi-megabyte packet stream.
+
+The stream mixes TEXT, STRING, nested and special function packets with
+some line noise, and is fed to the decoder in fixed-size chunks as a serial
+sniffer or socket would deliver it.
+
+Usage: python benchmarks/decode.py [megabytes] [chunk size]
+"""
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import alphasign
+from alphasign import decoder
+
+
+def make_stream(size):
+  files = [alphasign.Text("%sline %d %s" % (alphasign.colors.RED, i,
+                                             alphasign.colors.GREEN),
+                          label=chr(ord("A") + i % 26),
+                          mode=alphasign.modes.HOLD) for i in range(20)]
+  strings = [alphasign.String("value %d" % i, label=chr(ord("a") + i % 26))
+             for i in range(20)]
+  sample = [f.packet().data for f in files + strings]
+  sample.append(alphasign.Packet.nested(files[:4] + strings[:4]).data)
+  sample.append(alphasign.Packet("E.SU" + "ABCDEFGH").data)
+  sample.append(b"\xff\x00noise\x00")
+  chunk = b"".join(sample)
+  return chunk * (size // len(chunk) + 1), len(sample) - 1
+
+
+def run(megabytes, chunk_size):
+  stream, per_round = make_stream(int(megabytes * 1024 * 1024))
+  decoding = decoder.Decoder()
+  commands = 0
+  start = time.time()
+  for i in range(0, len(stream), chunk_size):
+    for pkt in decoding.feed(stream[i:i + chunk_size]):
+      commands += len(pkt.commands)
+  elapsed = time.time() - start
+  print("%.1f MB in %d-byte chunks: %d packets, %d commands, %d errors" %
+        (len(stream) / 1048576.0, chunk_size, decoding.packets, commands,
+         decoding.errors))
+  print("%.3fs, %.1f MB/s" % (elapsed, len(stream) / 1048576.0 / elapsed))
+
+
+if __name__ == "__main__":
+  run(len(sys.argv) > 1 and float(sys.argv[1]) or 4,
+      len(sys.argv) > 2 and int(sys.argv[2]) or 4096)
@@ -0,0 +1,131 @@
+"""Compare the bytes-native packet encoder with string formatting.
+
+The string path is how packets were built before: the frame is assembled with
+% formatting into a str and converted to bytes at write time. The bytes path
+is :class:`alphasign.packet.Packet`, which encodes once and hands its
+``data`` to the interface; the encode path is its encoder alone, without
+building a Packet. The buffer path encodes into one reused bytearray and
+hands out a memoryview of it, the approach Packet does not take (see
+:class:`alphasign.packet.Packet`); compare it with the encode path. The fan-out cases write the same packet
+several times, as SignFleet and retries do.
+
+Each case is timed in turn, round after round, and the best round is kept,
+so that a slow spell on a busy machine does not favour one case.
+
+Usage: python benchmarks/encode.py [iterations] [rounds]
+"""
+import sys
+import timeit
+
+sys.path.insert(0, ".")
+
+import alphasign
+from alphasign import constants
+from alphasign import packet
+
+try:
+  import tracemalloc
+  tracemalloc.reset_peak
+except (ImportError, AttributeError):  # Python < 3.9
+  tracemalloc = None
+
+
+TEXT = alphasign.Text("%sGate 12 %sboarding" % (alphasign.colors.RED,
+                                              alphasign.colors.GREEN),
+                      label="A", mode=alphasign.modes.HOLD)
+COMMAND = TEXT.packet().contents[0]
+
+# Number of writes of one packet in the fan-out case (SignFleet, retries).
+FANOUT = 10
+
+
+class StringPacket(object):
+  """The previous, str-based Packet."""
+
+  def __init__(self, contents):
+    self.type = "Z"
+    self.address = "00"
+    self._pkt = ("%s%s%s%s%s%s%s" %
+                 (constants.NUL * 5, constants.SOH, self.type,
+                  self.address, constants.STX, contents,
+                  constants.EOT))
+
+  def __str__(self):
+    return self._pkt
+
+
+def string_path():
+  return str(StringPacket(COMMAND)).encode("latin-1")
+
+
+def bytes_path():
+  return alphasign.Packet(COMMAND).data
+
+
+def encode_path():
+  return packet.encode([COMMAND], "Z", "00")
+
+
+BUFFER = bytearray()
+
+
+def buffer_path():
+  buf = BUFFER
+  del buf[:]
+  buf += packet._DEFAULT_HEADER
+  buf += COMMAND.encode(packet.ENCODING)
+  buf += packet._EOT
+  return memoryview(buf)
+
+
+def string_fanout():
+  pkt = StringPacket(COMMAND)
+  return [str(pkt).encode("latin-1") for i in range(FANOUT)]
+
+
+def bytes_fanout():
+  pkt = alphasign.Packet(COMMAND)
+  return [pkt.data for i in range(FANOUT)]
+
+
+def peak_bytes(function, iterations):
+  """Average peak of memory allocated while encoding one packet."""
+  if tracemalloc is None:
+    return None
+  tracemalloc.start()
+  total = 0
+  for i in range(iterations):
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    function()
+    total += tracemalloc.get_traced_memory()[1] - current
+  tracemalloc.stop()
+  return float(total) / iterations
+
+
+def run(iterations, rounds):
+  assert string_path() == bytes_path() == encode_path()
+  assert buffer_path().tobytes() == bytes_path()
+  cases = (("string", string_path),
+           ("bytes", bytes_path),
+           ("encode", encode_path),
+           ("buffer", buffer_path),
+           ("string x%d" % FANOUT, string_fanout),
+           ("bytes x%d" % FANOUT, bytes_fanout))
+  best = [None] * len(cases)
+  for i in range(rounds):
+    for j, (name, function) in enumerate(cases):
+      seconds = timeit.timeit(function, number=iterations)
+      if best[j] is None or seconds < best[j]:
+        best[j] = seconds
+  for (name, function), seconds in zip(cases, best):
+    line = "%-10s %8.3f us/packet" % (name, 1e6 * seconds / iterations)
+    peak = peak_bytes(function, min(iterations, 10000))
+    if peak is not None:
+      line += "  %6.1f bytes allocated/packet" % peak
+    print(line)
+
+
+if __name__ == "__main__":
+  run(len(sys.argv) > 1 and int(sys.argv[1]) or 20000,
+      len(sys.argv) > 2 and int(sys.argv[2]) or 50)
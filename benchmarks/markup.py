@@ -0,0 +1,58 @@
+"""Time compiling a large message catalog from markup.
+
+The catalog holds departure messages for many gates, each using colors,
+attributes, extended characters and a display mode. It is compiled once
+with an empty cache, then again with every message cached, and the compiled
+sizes are checked against the TEXT file limit.
+
+Usage: python benchmarks/markup.py [messages]
+"""
+import sys
+import timeit
+
+sys.path.insert(0, ".")
+
+from alphasign import markup
+
+
+DESTINATIONS = ["Boston", "Chicago", "Denver", "Houston", "Miami", "Seattle"]
+
+
+def make_catalog(count):
+  return ["{mode:hold:top_line}{red}{wide}Gate %d{/wide} {green}%s "
+          "{amber}{right_arrow} %02d:%02d {flash}%s{/flash}" %
+          (i % 120, DESTINATIONS[i % len(DESTINATIONS)], i // 60 % 24, i % 60,
+           i % 7 and "on time" or "delayed") for i in range(count)]
+
+
+def run(count):
+  catalog = make_catalog(count)
+
+  def compile_cold():
+    compiler = markup.Compiler(max_entries=count)
+    for message in catalog:
+      compiler.compile(message)
+
+  warm = markup.Compiler(max_entries=count)
+  for message in catalog:
+    warm.compile(message)
+
+  def compile_warm():
+    for message in catalog:
+      warm.compile(message)
+
+  for name, function in (("cold cache", compile_cold),
+                         ("warm cache", compile_warm)):
+    seconds = min(timeit.repeat(function, number=1, repeat=5))
+    print("%-10s %8.3f us/message  %10.0f messages/s" %
+          (name, 1e6 * seconds / count, count / seconds))
+
+  sizes = [warm.length(message) for message in catalog]
+  print("%d messages, %d to %d bytes compiled, %d over %d bytes" %
+        (count, min(sizes), max(sizes),
+         len([s for s in sizes if s > markup.MAX_TEXT_SIZE]),
+         markup.MAX_TEXT_SIZE))
+
+
+if __name__ == "__main__":
+  run(len(sys.argv) > 1 and int(sys.argv[1]) or 20000)
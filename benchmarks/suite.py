@@ -0,0 +1,206 @@
+"""Microbenchmarks of the encoding hot path, checked against a baseline.
+
+Each case reports operations per second (best of many runs), its speed
+relative to a reference workload that doesn't use alphasign, the peak memory
+one operation allocates and the memory blocks its result keeps alive.
+Results are compared with benchmarks/baseline.json; a case more than the
+threshold slower relative to the reference, or allocating more than the
+threshold more, is a regression and makes the run exit with status 1.
+
+Each run of a case is paired with a run of the reference, and the fastest of
+each is kept, so a machine that is busy or running at another clock speed
+slows both alike and doesn't show up as a regression. Runs are short and
+many: a short run is more likely to go by without an interruption, so the
+fastest of several hundred is steady from one invocation to the next.
+
+Usage: python benchmarks/suite.py [--save] [--threshold 0.2] [--number N]
+                                  [--repeat N]
+
+--save writes the results as the new baseline. Baselines are only
+comparable on the machine and Python version that produced them.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+sys.path.insert(0, ".")
+
+import alphasign
+from alphasign.interfaces import base
+
+try:
+  import tracemalloc
+  tracemalloc.reset_peak
+except (ImportError, AttributeError):  # Python < 3.9
+  tracemalloc = None
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+
+
+class NullInterface(base.BaseInterface):
+  """Interface that encodes packets and discards them."""
+
+  command_delays = {}
+
+  def _write(self, packet):
+    # Touch the encoded bytes, as a real interface does, so that packets
+    # which encode lazily are not let off.
+    return bool(len(packet.data))
+
+
+MESSAGE = "%sGate 12 %sboarding" % (alphasign.colors.RED,
+                                    alphasign.colors.GREEN)
+COMMAND = "AA\x1b a" + MESSAGE
+TEXT = alphasign.Text(MESSAGE, label="A", mode=alphasign.modes.HOLD)
+STRING = alphasign.String("21C", label="1", size=8)
+FILES = ([alphasign.Text(MESSAGE, label=chr(ord("A") + i)) for i in range(8)] +
+         [alphasign.String("%d" % i, label=chr(ord("a") + i))
+          for i in range(8)])
+SIGN = NullInterface()
+
+CASES = [
+  ("packet", lambda: alphasign.Packet(COMMAND).data),
+  ("packet_nested", lambda: alphasign.Packet([COMMAND] * 4).data),
+  ("text_str", lambda: str(TEXT)),
+  ("string_str", lambda: str(STRING)),
+  ("allocate", lambda: SIGN.allocate(FILES)),
+  ("set_run_sequence", lambda: SIGN.set_run_sequence(FILES[:8])),
+  ("colors_rgb", lambda: alphasign.colors.rgb("#FF8000")),
+]
+
+
+def reference():
+  """Workload the cases are timed against: string building much like
+  encoding, without alphasign."""
+  return "".join(["%s%02X" % (COMMAND[i], i) for i in range(8)])
+
+
+def measure(function, number, repeat=500):
+  """Benchmark one case.
+
+  :returns: dict with ops_per_sec, relative (speed as a multiple of the
+            reference's), peak_bytes and blocks (the last two None without
+            tracemalloc)
+  """
+  runs = []
+  reference_runs = []
+  for _ in range(repeat):
+    runs.append(timeit.timeit(function, number=number))
+    reference_runs.append(timeit.timeit(reference, number=number))
+  seconds = min(runs)
+  reference_seconds = min(reference_runs)
+  result = {"ops_per_sec": number / seconds,
+            "relative": reference_seconds / seconds,
+            "peak_bytes": None, "blocks": None}
+  if tracemalloc is None:
+    return result
+
+  function()  # warm up caches
+  kept = []
+  tracemalloc.start()
+  try:
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    kept.append(function())
+    result["peak_bytes"] = tracemalloc.get_traced_memory()[1] - start
+    for _ in range(99):
+      kept.append(function())
+    snapshot = tracemalloc.take_snapshot()
+  finally:
+    tracemalloc.stop()
+  blocks = sum([s.count for s in snapshot.statistics("filename")])
+  result["blocks"] = blocks / 100.0
+  return result
+
+
+def compare(results, baseline, threshold):
+  """Find cases that got worse than the baseline by more than a threshold.
+
+  :returns: list of (case, description) tuples
+  """
+  regressions = []
+  for name, result in sorted(results.items()):
+    old = baseline.get(name)
+    if old is None:
+      continue
+    if old.get("relative") is not None:
+      if result["relative"] < old["relative"] * (1 - threshold):
+        regressions.append((name, "%.3f x reference, was %.3f" %
+                            (result["relative"], old["relative"])))
+    elif result["ops_per_sec"] < old["ops_per_sec"] * (1 - threshold):
+      regressions.append((name, "%.0f ops/s, was %.0f" %
+                          (result["ops_per_sec"], old["ops_per_sec"])))
+    for key in ("peak_bytes", "blocks"):
+      if (result[key] is not None and old.get(key) is not None and
+          result[key] > old[key] * (1 + threshold) + 1):
+        regressions.append((name, "%s %s, was %s" %
+                            (key, result[key], old[key])))
+  return regressions
+
+
+def run(number, threshold=0.2, save=False, path=BASELINE, repeat=500):
+  results = {}
+  for name, function in CASES:
+    results[name] = measure(function, number, repeat)
+
+  baseline = {}
+  if os.path.exists(path):
+    with open(path) as f:
+      baseline = json.load(f).get("results", {})
+
+  # Timings are noisy: measure apparent regressions again, keeping the best.
+  cases = dict(CASES)
+  for _ in range(2):
+    for name in set([name for name, _ in
+                     compare(results, baseline, threshold)]):
+      again = measure(cases[name], number, repeat)
+      for key in ("ops_per_sec", "relative"):
+        results[name][key] = max(results[name][key], again[key])
+
+  print("%-18s %12s %8s %10s %8s %8s" %
+        ("case", "ops/s", "x ref", "peak B/op", "blk/op", "vs base"))
+  for name, _ in CASES:
+    result = results[name]
+    old = baseline.get(name)
+    key = "ops_per_sec"
+    if old and old.get("relative") is not None:
+      key = "relative"
+    change = old and "%+7.1f%%" % (100.0 * result[key] / old[key] - 100) or ""
+    print("%-18s %12.0f %8.3f %10s %8s %8s" %
+          (name, result["ops_per_sec"], result["relative"],
+           result["peak_bytes"], result["blocks"], change))
+
+  if save:
+    with open(path, "w") as f:
+      json.dump({"python": platform.python_version(), "results": results}, f,
+                indent=2, sort_keys=True)
+      f.write("\n")
+    print("baseline saved to %s" % path)
+    return 0
+
+  regressions = compare(results, baseline, threshold)
+  for name, description in regressions:
+    print("REGRESSION %s: %s" % (name, description))
+  return regressions and 1 or 0
+
+
+if __name__ == "__main__":
+  args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  args.add_argument("--save", action="store_true",
+                    help="store the results as the new baseline")
+  args.add_argument("--threshold", type=float, default=0.2,
+                    help="allowed slowdown or growth, as a fraction")
+  args.add_argument("--number", type=int, default=200,
+                    help="operations per timing run")
+  args.add_argument("--repeat", type=int, default=500,
+                    help="timing runs per case, the fastest of which counts")
+  args.add_argument("--baseline", default=BASELINE,
+                    help="baseline file")
+  options = args.parse_args()
+  sys.exit(run(options.number, options.threshold, options.save,
+               options.baseline, options.repeat))
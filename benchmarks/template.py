@@ -0,0 +1,51 @@
+"""Compare filling a precompiled Template with building a Text each time.
+
+Usage: python benchmarks/template.py [iterations]
+"""
+import sys
+import timeit
+
+sys.path.insert(0, ".")
+
+import alphasign
+
+
+GATE = alphasign.String(size=4, label="1")
+TEMPLATE = alphasign.Template("%s%sGate %%(gate)s %s%%(time)s %s" %
+                              (alphasign.charsets.SEVEN_HIGH_STD,
+                               alphasign.colors.RED, alphasign.colors.GREEN,
+                               GATE.call()),
+                              label="A", mode=alphasign.modes.HOLD)
+
+
+def text_path(gate="12", time="10:45"):
+  text = alphasign.Text("%s%sGate %s %s%s %s" %
+                        (alphasign.charsets.SEVEN_HIGH_STD,
+                         alphasign.colors.RED, gate, alphasign.colors.GREEN,
+                         time, GATE.call()),
+                        label="A", mode=alphasign.modes.HOLD)
+  return text.packet().data
+
+
+def template_path(gate="12", time="10:45"):
+  return TEMPLATE.packet(gate=gate, time=time).data
+
+
+def positional_path(gate="12", time="10:45"):
+  return TEMPLATE.packet(gate, time).data
+
+
+def run(iterations):
+  assert text_path() == template_path() == positional_path()
+  baseline = None
+  for name, function in (("Text", text_path),
+                         ("Template", template_path),
+                         ("Template (positional)", positional_path)):
+    seconds = min(timeit.repeat(function, number=iterations, repeat=5))
+    baseline = baseline or seconds
+    print("%-22s %8.3f us/packet  %5.2fx" %
+          (name, 1e6 * seconds / iterations, baseline / seconds))
+
+
+if __name__ == "__main__":
+  run(len(sys.argv) > 1 and int(sys.argv[1]) or 100000)
@@ -0,0 +1,73 @@
+"""Compare one bulk transfer per packet with coalesced USB transfers.
+
+The USB interface runs against a fake connection that counts transfers. The
+previous behaviour, a bulk write plus a zero-length write for every packet, is
+shown for reference. Bus time assumes a full-speed device that gets one
+transfer per 1 ms frame.
+
+Usage: python benchmarks/usb_transfers.py [number of packets]
+"""
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import alphasign
+from alphasign.interfaces import local
+
+
+MAX_PACKET_SIZE = 64
+FRAME = 0.001  # seconds
+
+
+class FakeConnection(object):
+  max_packet_size = MAX_PACKET_SIZE
+
+  def __init__(self):
+    self.bytes = 0
+
+  def write(self, data, timeout):
+    self.bytes += len(data)
+    return len(data)
+
+  def read(self, size, timeout):
+    return ()
+
+  def release(self):
+    pass
+
+
+def make_packets(count):
+  return [alphasign.String("value %d" % i, label=chr(ord("a") + i % 26),
+                           size=16).packet()
+          for i in range(count)]
+
+
+def run(count):
+  packets = make_packets(count)
+
+  results = [("previous", 2 * count, sum([len(p) for p in packets]), None)]
+  for name, coalesce in (("per-packet", False), ("coalesced", True)):
+    sign = local.USB((0x8765, 0x1234))
+    sign._conn = FakeConnection()
+    start = time.time()
+    if coalesce:
+      with sign.coalesce():
+        for pkt in packets:
+          sign.write(pkt)
+    else:
+      for pkt in packets:
+        sign.write(pkt)
+    results.append((name, sign.transfers, sign._conn.bytes,
+                    time.time() - start))
+
+  for name, transfers, size, cpu in results:
+    line = "%-10s transfers=%5d bytes=%6d bus=%7.3fs" % (
+      name, transfers, size, transfers * FRAME)
+    if cpu is not None:
+      line += " cpu=%.4fs" % cpu
+    print(line)
+
+
+if __name__ == "__main__":
+  run(len(sys.argv) > 1 and int(sys.argv[1]) or 200)
@@ -0,0 +1,18 @@
+"""Helpers shared by the tests."""
+from alphasign.interfaces import base
+
+
+class Recorder(base.BaseInterface):
+  """Interface that keeps the packets written to it."""
+
+  command_delays = base.COMMAND_DELAYS
+
+  def __init__(self):
+    self.packets = []
+
+  def _write(self, pkt):
+    self.packets.append(pkt)
+    return True
+
+  def wait_ready(self):
+    pass
@@ -0,0 +1,95 @@
+import unittest
+
+import alphasign
+from alphasign import dashboard
+from alphasign import memory
+from alphasign import playlist
+from alphasign import schedule
+from alphasign.interfaces import base
+from alphasign.interfaces import fleet
+from alphasign.interfaces import managed
+from alphasign.interfaces import queued
+
+from helpers import Recorder
+
+try:
+  import asyncio
+  from alphasign.interfaces import aio
+except (ImportError, SyntaxError):  # Python 2
+  aio = None
+
+
+if aio is not None:
+  class AsyncRecorder(aio.AsyncInterface):
+    """Asyncio interface that keeps the packets written to it."""
+
+    def __init__(self):
+      aio.AsyncInterface.__init__(self)
+      self.packets = []
+
+    def _write(self, packet):
+      self.packets.append(packet)
+      result = asyncio.get_running_loop().create_future()
+      result.set_result(True)
+      return result
+
+
+@unittest.skipIf(aio is None, "the asyncio interfaces need Python 3")
+class AsyncInterfaceTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = AsyncRecorder()
+    self.text = alphasign.Text("hi", label="A")
+
+  def test_reads_not_offered(self):
+    self.assertFalse(isinstance(self.sign, base.BaseInterface))
+    for name in ("read", "read_time", "read_memory_configuration",
+                 "reconcile"):
+      self.assertFalse(hasattr(self.sign, name), name)
+
+  def test_special_functions_awaitable(self):
+    text = alphasign.Text("hi", label="A", start="06:00", stop="10:00")
+    result = asyncio.run(self.sign.set_run_times([text]))
+    self.assertTrue(result)
+    self.assertTrue(asyncio.run(self.sign.set_run_times([])))
+    self.assertTrue(asyncio.run(self.sign.allocate([text])))
+    blocking = Recorder()
+    blocking.set_run_times([text])
+    blocking.allocate([text])
+    self.assertEqual([p.data for p in self.sign.packets],
+                     [p.data for p in blocking.packets])
+
+  def test_at(self):
+    addressed = self.sign.at("05")
+    self.assertTrue(asyncio.run(addressed.write(self.text)))
+    self.assertTrue(asyncio.run(addressed.set_run_sequence([self.text])))
+    self.assertEqual([p.data for p in self.sign.packets],
+                     [alphasign.Packet(c, address="05").data for c in
+                      self.text.packet().contents + ["E.TUA"]])
+
+  def test_batch(self):
+    batch = self.sign.batch()
+    batch.write(self.text)
+    batch.set_run_sequence([self.text])
+    self.assertEqual(self.sign.packets, [])
+    self.assertTrue(asyncio.run(batch.flush()))
+    self.assertEqual([p.data for p in self.sign.packets], [alphasign.Packet(
+      self.text.packet().contents + ["E.TUA"]).data])
+
+  def test_blocking_helpers_refuse(self):
+    text = self.text
+    self.assertRaises(TypeError, base.Batch, self.sign)
+    self.assertRaises(TypeError, base.Addressed, self.sign, "05")
+    self.assertRaises(TypeError, dashboard.Dashboard, self.sign, "%(a)s")
+    self.assertRaises(TypeError, playlist.Playlist, self.sign)
+    self.assertRaises(TypeError, memory.MemoryPlanner().apply, self.sign,
+                      [text])
+    self.assertRaises(TypeError, schedule.Schedule().upload, self.sign)
+    self.assertRaises(TypeError, fleet.SignFleet, [self.sign])
+    self.assertRaises(TypeError, queued.CoalescingWriter, self.sign)
+    self.assertRaises(TypeError, managed.ManagedConnection, self.sign)
+    self.assertEqual(self.sign.packets, [])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+
+import alphasign
+from alphasign.interfaces import cache
+from alphasign.interfaces.bus import BusScheduler
+
+from helpers import Recorder
+
+
+class WriteCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Recorder()
+    self.cache = self.sign.enable_write_cache()
+    self.text = alphasign.Text("hello", label="A")
+
+  def test_identical_write_skipped(self):
+    self.sign.write(self.text)
+    self.sign.write(self.text)
+    self.assertEqual(len(self.sign.packets), 1)
+    self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+  def test_changed_data_sent(self):
+    self.sign.write(self.text)
+    self.text.data = "world"
+    self.sign.write(self.text)
+    self.assertEqual(len(self.sign.packets), 2)
+
+  def test_clear_memory_invalidates(self):
+    self.sign.write(self.text)
+    self.sign.clear_memory()
+    self.sign.write(self.text)
+    self.assertEqual(len(self.sign.packets), 3)
+
+  def test_allocate_invalidates(self):
+    self.sign.write(self.text)
+    self.sign.allocate([self.text])
+    self.sign.write(self.text)
+    self.assertEqual(len(self.sign.packets), 3)
+
+  def test_soft_reset_invalidates(self):
+    self.sign.write(self.text)
+    self.sign.soft_reset()
+    self.sign.write(self.text)
+    self.assertEqual(len(self.sign.packets), 3)
+
+  def test_invalidate_label(self):
+    other = alphasign.String("21C", label="1")
+    self.sign.write(self.text)
+    self.sign.write(other)
+    self.cache.invalidate("A")
+    self.sign.write(self.text)
+    self.sign.write(other)
+    self.assertEqual(len(self.sign.packets), 3)
+
+  def test_failed_write_not_cached(self):
+    self.sign._write = lambda pkt: False
+    self.sign.write(self.text)
+    self.assertEqual(len(self.cache), 0)
+
+  def test_max_entries(self):
+    small = cache.WriteCache(max_entries=2)
+    small.update(["AA1", "AB2", "AC3"])
+    self.assertEqual(len(small), 2)
+    self.assertFalse(small.is_current(["AA1"]))
+    self.assertTrue(small.is_current(["AC3"]))
+
+  def test_addresses_cached_separately(self):
+    self.sign.at("01").write(self.text)
+    self.sign.at("02").write(self.text)
+    self.sign.at("01").write(self.text)
+    self.assertEqual([p.address for p in self.sign.packets], ["01", "02"])
+
+  def test_group_write_makes_sign_entries_stale(self):
+    self.sign.at("01").write(self.text)
+    self.text.data = "group"
+    self.sign.at("0?").write(self.text)
+    self.text.data = "hello"
+    self.sign.at("01").write(self.text)
+    self.assertEqual([p.address for p in self.sign.packets],
+                     ["01", "0?", "01"])
+
+  def test_sign_write_makes_group_entry_stale(self):
+    self.sign.write(self.text)
+    self.text.data = "one sign"
+    self.sign.at("01").write(self.text)
+    self.text.data = "hello"
+    self.sign.write(self.text)
+    self.assertEqual([p.address for p in self.sign.packets],
+                     ["00", "01", "00"])
+
+  def test_special_invalidates_only_reached_signs(self):
+    self.sign.at("01").write(self.text)
+    self.sign.at("02").write(self.text)
+    self.sign.at("01").clear_memory()
+    self.sign.at("01").write(self.text)
+    self.sign.at("02").write(self.text)
+    self.assertEqual([p.address for p in self.sign.packets],
+                     ["01", "02", "01", "01"])
+
+  def test_bus_scheduler_reaches_every_sign(self):
+    bus = BusScheduler(self.sign, ["01", "02", "03"])
+    bus.write(self.text, ["01"])
+    bus.flush()
+    bus.write(self.text, ["02"])
+    bus.flush()
+    self.assertEqual([p.address for p in self.sign.packets], ["01", "02"])
+
+  def test_overlaps(self):
+    self.assertTrue(cache.overlaps(("Z", "00"), ("1", "05")))
+    self.assertTrue(cache.overlaps(("1", "0?"), ("1", "05")))
+    self.assertTrue(cache.overlaps((None, None), ("1", "05")))
+    self.assertFalse(cache.overlaps(("1", "05"), ("1", "06")))
+    self.assertFalse(cache.overlaps(("1", "05"), ("2", "05")))
+
+  def test_uncached_commands_never_current(self):
+    self.assertFalse(self.cache.is_current(["E.TUA"]))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,73 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import alphasign
+from alphasign.interfaces import capture
+from alphasign.interfaces.emulator import Emulator
+
+from helpers import Recorder
+
+
+class CaptureTest(unittest.TestCase):
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.dir)
+    self.path = os.path.join(self.dir, "sign.cap")
+    self.text = alphasign.Text("hello", label="A")
+    self.string = alphasign.String("21C", label="T")
+
+  def record(self, sign):
+    sign.allocate([self.text, self.string])
+    sign.write(self.text)
+    sign.at("05").write(self.string)
+
+  def test_record_and_replay(self):
+    original = Emulator()
+    with capture.Recorder(original, self.path) as sign:
+      self.record(sign)
+      self.assertEqual(sign.packets, 3)
+
+    records = list(capture.read_capture(self.path))
+    self.assertEqual(len(records), 3)
+    self.assertEqual([r.time for r in records], sorted(r.time for r in records))
+
+    replayed = Emulator()
+    result = capture.replay(self.path, replayed, speed=None)
+    self.assertEqual(result.packets, 3)
+    self.assertEqual(result.failures, 0)
+    self.assertEqual(result.bytes, sum(len(r.data) for r in records))
+    self.assertEqual(replayed.files, original.files)
+    self.assertEqual(replayed.memory, original.memory)
+
+  def test_addresses_kept(self):
+    with capture.Recorder(Recorder(), self.path) as sign:
+      self.record(sign)
+    target = Recorder()
+    capture.replay(self.path, target, speed=None)
+    self.assertEqual([p.address for p in target.packets], ["00", "00", "05"])
+
+  def test_flushed_before_close(self):
+    sign = capture.Recorder(Recorder(), self.path)
+    self.addCleanup(sign.close)
+    self.record(sign)
+    self.assertEqual(len(list(capture.read_capture(self.path))), 3)
+
+  def test_cut_short_capture(self):
+    with capture.Recorder(Recorder(), self.path) as sign:
+      self.record(sign)
+    with open(self.path, "rb") as f:
+      data = f.read()
+    records = list(capture.read_capture(io.BytesIO(data[:-1])))
+    self.assertEqual(len(records), 2)
+
+  def test_not_a_capture(self):
+    self.assertRaises(ValueError, list,
+                      capture.read_capture(io.BytesIO(b"garbage")))
+
+
+if __name__ == "__main__":
+  unittest.main()
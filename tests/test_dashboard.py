@@ -0,0 +1,80 @@
+import unittest
+
+import alphasign
+from alphasign import dashboard
+from alphasign.interfaces.emulator import Emulator
+
+
+class DashboardTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Emulator()
+    self.board = dashboard.Dashboard(self.sign,
+                                     "Temp %(temp)s  Wind %(wind)s",
+                                     fields={"temp": 5, "wind": 8},
+                                     mode=alphasign.modes.HOLD)
+
+  def test_layout(self):
+    temp = self.board.strings["temp"]
+    wind = self.board.strings["wind"]
+    self.assertEqual((temp.label, wind.label), ("6", "7"))
+    self.assertEqual(self.board.text.data,
+                     "Temp %s  Wind %s" % (temp.call(), wind.call()))
+
+  def test_too_many_fields(self):
+    layout = "".join(["%%(f%d)s" % i for i in range(40)])
+    self.assertRaises(ValueError, dashboard.Dashboard, self.sign, layout)
+
+  def test_install(self):
+    self.board.install(temp="21C", wind="12 km/h")
+    self.assertEqual(self.sign.errors, 0, self.sign.last_error)
+    for label in "67A":
+      self.assertTrue(label in self.sign.memory)
+    self.assertEqual(self.sign.memory["6"].size, 5)
+    self.assertEqual(self.sign.memory["7"].size, 8)
+    self.assertEqual(self.sign.run_sequence, "A")
+    self.assertEqual(self.sign.files["A"],
+                     "\x1b b" + self.board.text.data)
+    self.assertEqual(self.sign.files["6"], "21C")
+    self.assertEqual(self.sign.files["7"], "12 km/h")
+
+  def test_install_keeps_other_files(self):
+    other = alphasign.Text("hello", label="B")
+    self.board.install([other])
+    self.assertEqual(self.sign.errors, 0, self.sign.last_error)
+    for label in "67AB":
+      self.assertTrue(label in self.sign.memory)
+    self.assertEqual(self.sign.files["6"], "")
+    self.assertEqual(self.sign.run_sequence, "AB")
+
+  def test_update_sends_changed_strings(self):
+    self.board.install(temp="21C", wind="12 km/h")
+    packets = self.sign.packets
+    text = self.sign.files["A"]
+
+    self.assertEqual(self.board.update(temp="22C", wind="12 km/h"),
+                     ["temp"])
+    self.assertEqual(self.sign.packets, packets + 1)
+    self.assertEqual(self.sign.files["6"], "22C")
+    self.assertEqual(self.sign.files["7"], "12 km/h")
+    self.assertEqual(self.sign.files["A"], text)
+
+    self.assertEqual(self.board.update(temp="22C"), [])
+    self.assertEqual(self.sign.packets, packets + 1)
+
+    self.assertEqual(sorted(self.board.update(temp="23C", wind="9 km/h")),
+                     ["temp", "wind"])
+    self.assertEqual(self.sign.packets, packets + 2)  # one nested packet
+    self.assertEqual(self.sign.files["6"], "23C")
+    self.assertEqual(self.sign.files["7"], "9 km/h")
+    self.assertEqual(self.sign.errors, 0, self.sign.last_error)
+
+  def test_update_cuts_long_values(self):
+    self.board.install()
+    self.board.update(temp="123456789")
+    self.assertEqual(self.sign.files["6"], "12345")
+    self.assertEqual(self.sign.errors, 0, self.sign.last_error)
+
+
+if __name__ == "__main__":
+  unittest.main()
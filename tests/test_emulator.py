@@ -0,0 +1,71 @@
+import unittest
+
+import alphasign
+from alphasign.interfaces.emulator import Emulator
+
+
+class EmulatorTest(unittest.TestCase):
+
+  def test_readme_flow(self):
+    # The example at the top of the alphasign package.
+    sign = Emulator()
+    sign.connect()
+    sign.clear_memory()
+    counter_str = alphasign.String(size=14, label="1")
+    counter_txt = alphasign.Text("counter value: %s%s" % (alphasign.colors.RED,
+                                                          counter_str.call()),
+                                 label="A",
+                                 mode=alphasign.modes.HOLD)
+    sign.allocate((counter_str, counter_txt))
+    sign.set_run_sequence((counter_txt,))
+    for obj in (counter_str, counter_txt):
+      sign.write(obj)
+    for counter_value in range(3):
+      counter_str.data = counter_value
+      sign.write(counter_str)
+
+    self.assertEqual(sign.errors, 0, sign.last_error)
+    self.assertEqual(sign.files["1"], "2")
+    self.assertEqual(sign.files["A"], "\x1b b" + counter_txt.data)
+    self.assertEqual(sign.run_sequence, "A")
+    self.assertEqual(sorted(sign.memory), ["1", "2", "3", "4", "5", "A"])
+    self.assertEqual(sign.memory["1"].type, "B")
+
+  def test_special_mode_not_counted_as_data(self):
+    sign = Emulator()
+    text = alphasign.Text("xxxxx", label="A", size=5,
+                          mode=alphasign.modes.TWINKLE)
+    sign.allocate([text], targets=0)
+    sign.write(text)
+    self.assertEqual(sign.errors, 0, sign.last_error)
+    self.assertEqual(sign.files["A"], "\x1b n0xxxxx")
+    self.assertEqual(sign.read_text("A"), "\x1b n0xxxxx")
+
+  def test_targets_skip_labels_in_use(self):
+    sign = Emulator()
+    sign.allocate([alphasign.Text("x", label="2")], targets=3)
+    self.assertEqual(sign.errors, 0, sign.last_error)
+    self.assertEqual(sorted(sign.memory), ["1", "2", "3"])
+    self.assertEqual(sign.memory["2"].size, 64)
+
+  def test_broadcasts_reach_any_address(self):
+    sign = Emulator(address="05")
+    self.assertEqual(sign.address, None)  # writes are not readdressed
+    text = alphasign.Text("hello", label="A")
+    sign.allocate([text])
+    sign.write(text)
+    self.assertEqual(sign.files["A"], "\x1b ahello")
+
+  def test_ignores_other_signs(self):
+    sign = Emulator(address="05")
+    text = alphasign.Text("hello", label="A")
+    sign.at("05").allocate([text])
+    sign.at("06").write(text)
+    self.assertEqual(sign.files, {})
+    sign.at("05").write(text)
+    self.assertEqual(sign.files["A"], "\x1b ahello")
+    self.assertEqual(sign.at("05").read_text("A"), "\x1b ahello")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,98 @@
+import time
+import unittest
+
+import alphasign
+from alphasign.interfaces.emulator import Emulator
+from alphasign.interfaces.fleet import SignFleet
+
+from helpers import Recorder
+
+
+class Broken(Recorder):
+  """Interface whose writes raise."""
+
+  def _write(self, pkt):
+    raise IOError("no such device")
+
+
+class Refusing(Recorder):
+  """Interface whose writes fail."""
+
+  def _write(self, pkt):
+    return False
+
+
+class Slow(Recorder):
+  """Interface that takes a while for each write."""
+
+  def _write(self, pkt):
+    time.sleep(0.2)
+    return Recorder._write(self, pkt)
+
+
+class SignFleetTest(unittest.TestCase):
+
+  def setUp(self):
+    self.text = alphasign.Text("hello", label="A")
+    self.string = alphasign.String("21C", label="T")
+
+  def test_fan_out(self):
+    signs = [Emulator() for _ in range(4)]
+    with SignFleet(signs) as fleet:
+      self.assertEqual(len(fleet), 4)
+      fleet.clear_memory()
+      fleet.allocate([self.text, self.string])
+      fleet.set_run_sequence([self.text])
+      results = fleet.write(self.text)
+    self.assertEqual([r.interface for r in results], signs)
+    self.assertEqual([r.result for r in results], [True] * 4)
+    for sign in signs:
+      self.assertEqual(sign.errors, 0, sign.last_error)
+      self.assertEqual(sign.files["A"], "\x1b ahello")
+      self.assertEqual(sign.run_sequence, "A")
+
+  def test_packet_encoded_once(self):
+    signs = [Recorder() for _ in range(3)]
+    with SignFleet(signs) as fleet:
+      fleet.write(self.text)
+      fleet.beep()
+    for sign in signs:
+      self.assertTrue(sign.packets[0] is signs[0].packets[0])
+      self.assertTrue(sign.packets[1] is signs[0].packets[1])
+
+  def test_concurrent(self):
+    signs = [Slow() for _ in range(4)]
+    with SignFleet(signs) as fleet:
+      start = time.time()
+      results = fleet.write(self.text)
+    self.assertTrue(time.time() - start < 0.6)
+    for result in results:
+      self.assertTrue(0.15 < result.elapsed < 0.6)
+
+  def test_one_sign_failing(self):
+    signs = [Recorder(), Broken(), Refusing(), Recorder()]
+    with SignFleet(signs, threads=2) as fleet:
+      results = fleet.write(self.text)
+    self.assertEqual([r.result for r in results], [True, None, False, True])
+    self.assertEqual([r.error is None for r in results],
+                     [True, False, True, True])
+    self.assertTrue(isinstance(results[1].error, IOError))
+    self.assertEqual(len(signs[0].packets), 1)
+    self.assertEqual(len(signs[3].packets), 1)
+
+  def test_special_function_failing_on_one_sign(self):
+    signs = [Recorder(), Refusing()]
+    with SignFleet(signs) as fleet:
+      results = fleet.soft_reset()
+    self.assertEqual([r.result for r in results], [True, False])
+    self.assertEqual(signs[0].packets[0].contents, ["E,"])
+
+  def test_run(self):
+    signs = [Emulator(address="01"), Emulator(address="02")]
+    with SignFleet(signs) as fleet:
+      results = fleet.run(lambda sign: sign.sign_address)
+    self.assertEqual([r.result for r in results], ["01", "02"])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,122 @@
+import time
+import unittest
+
+import alphasign
+from alphasign.interfaces import managed
+from alphasign.interfaces.managed import ManagedConnection
+
+from helpers import Recorder
+
+
+class Flaky(Recorder):
+  """Interface whose writes fail while ``down`` is set."""
+
+  def __init__(self):
+    Recorder.__init__(self)
+    self.down = False
+    self.error = None
+    self.connects = 0
+    self.attempts = 0
+
+  def connect(self):
+    self.connects += 1
+
+  def disconnect(self):
+    pass
+
+  def _write(self, pkt):
+    self.attempts += 1
+    if self.error is not None:
+      raise self.error
+    if self.down:
+      return False
+    return Recorder._write(self, pkt)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+  def setUp(self):
+    self.device = Flaky()
+    self.sign = ManagedConnection(self.device, failure_threshold=3,
+                                  backoff=0.05, max_backoff=0.15)
+    self.text = alphasign.Text("hello", label="A")
+
+  def test_opens_after_threshold(self):
+    self.device.down = True
+    for _ in range(2):
+      self.assertFalse(self.sign.write(self.text))
+      self.assertEqual(self.sign.state, managed.CLOSED)
+    self.assertFalse(self.sign.write(self.text))
+    self.assertEqual(self.sign.state, managed.OPEN)
+    self.assertTrue(0 < self.sign.retry_in <= 0.05)
+
+    # While open, writes fail without touching the device.
+    attempts = self.device.attempts
+    self.assertFalse(self.sign.write(self.text))
+    self.assertEqual(self.device.attempts, attempts)
+    self.assertEqual(self.sign.rejected, 1)
+    self.assertEqual(self.sign.failures, 3)
+
+  def test_half_open_after_cooldown(self):
+    self.device.down = True
+    for _ in range(3):
+      self.sign.write(self.text)
+    time.sleep(0.06)
+    self.assertEqual(self.sign.state, managed.HALF_OPEN)
+    self.assertEqual(self.sign.retry_in, 0)
+
+    # A failed trial opens the circuit again, for longer.
+    self.assertFalse(self.sign.write(self.text))
+    self.assertEqual(self.sign.state, managed.OPEN)
+    self.assertTrue(0.05 < self.sign.retry_in <= 0.1)
+
+  def test_backoff_is_capped(self):
+    self.device.down = True
+    for _ in range(6):
+      self.sign._retry_at = 0  # skip the waits
+      self.sign.write(self.text)
+    self.assertTrue(0.1 < self.sign.retry_in <= 0.15)
+
+  def test_closes_on_success(self):
+    self.device.down = True
+    for _ in range(3):
+      self.sign.write(self.text)
+    time.sleep(0.06)
+    self.device.down = False
+    self.assertTrue(self.sign.write(self.text))
+    self.assertEqual(self.sign.state, managed.CLOSED)
+    self.assertEqual(self.sign.reconnects, 1)
+    self.assertEqual(len(self.sign.reconnect_latencies), 1)
+    self.assertEqual(len(self.device.packets), 1)
+
+    # The failure count starts again from zero.
+    self.device.down = True
+    self.sign.write(self.text)
+    self.assertEqual(self.sign.state, managed.CLOSED)
+
+  def test_exception_counts_as_failure(self):
+    self.device.error = IOError("unplugged")
+    self.assertFalse(self.sign.write(self.text))
+    self.assertTrue(self.sign.last_error is self.device.error)
+    self.assertEqual(self.sign.failures, 1)
+
+  def test_failed_write_reconnects(self):
+    self.assertTrue(self.sign.write(self.text))
+    self.device.down = True
+    self.sign.write(self.text)
+    self.device.down = False
+    self.assertTrue(self.sign.write(self.text))
+    self.assertEqual(self.device.connects, 2)
+
+  def test_health_check(self):
+    healthy = [False]
+    sign = ManagedConnection(self.device, lambda s: healthy[0])
+    self.assertFalse(sign.connect())
+    self.assertFalse(sign.check())
+    healthy[0] = True
+    self.assertTrue(sign.check())
+    self.assertEqual(sign.state, managed.CLOSED)
+
+
+if __name__ == "__main__":
+  unittest.main()
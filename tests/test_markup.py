@@ -0,0 +1,65 @@
+import unittest
+
+import alphasign
+from alphasign import charsets
+from alphasign import colors
+from alphasign import extchars
+from alphasign import markup
+from alphasign import memory
+
+
+class CompileTest(unittest.TestCase):
+
+  def test_tags(self):
+    self.assertEqual(markup.compile("{red}Gate {wide}12{/wide}"),
+                     colors.RED + "Gate " + charsets.WIDE_ON + "12" +
+                     charsets.WIDE_OFF)
+    self.assertEqual(markup.compile("{heart}{#FF8000}"),
+                     extchars.HEART + colors.rgb("FF8000"))
+    self.assertEqual(markup.compile("{string:a}"), "\x10a")
+    self.assertEqual(markup.compile("{mode:hold}"), "\x1b b")
+
+  def test_escapes(self):
+    self.assertEqual(markup.compile("{{red}}"), "{red}")
+    self.assertEqual(markup.compile(markup.escape("{x}")), "{x}")
+
+  def test_errors(self):
+    self.assertRaises(ValueError, markup.compile, "{nosuchtag}")
+    self.assertRaises(ValueError, markup.compile, "unbalanced {")
+    self.assertRaises(ValueError, markup.compile, "unbalanced }")
+    self.assertRaises(ValueError, markup.compile, "{mode:nosuchmode}")
+
+  def test_length_and_text(self):
+    self.assertEqual(markup.length("{red}hi"), len(colors.RED) + 2)
+    text = markup.text("{red}hi", label="B")
+    self.assertEqual(text.data, colors.RED + "hi")
+    self.assertEqual(text.label, "B")
+    self.assertEqual(markup.MAX_TEXT_SIZE, memory.MAX_TEXT_SIZE)
+    self.assertRaises(ValueError, markup.text, "x" * 126)
+    self.assertRaises(ValueError, markup.text, "x" * 10, size=5)
+
+
+class CompilerCacheTest(unittest.TestCase):
+
+  def test_hit(self):
+    compiler = markup.Compiler()
+    first = compiler.compile("{red}hi")
+    self.assertEqual((compiler.hits, compiler.misses), (0, 1))
+    self.assertTrue(compiler.compile("{red}hi") is first)
+    self.assertEqual((compiler.hits, compiler.misses), (1, 1))
+
+  def test_least_recently_used_forgotten(self):
+    compiler = markup.Compiler(max_entries=2)
+    compiler.compile("a")
+    compiler.compile("b")
+    compiler.compile("a")  # now more recent than "b"
+    compiler.compile("c")
+    self.assertEqual(len(compiler), 2)
+    compiler.compile("a")
+    self.assertEqual(compiler.misses, 3)
+    compiler.compile("b")
+    self.assertEqual(compiler.misses, 4)
+
+
+if __name__ == "__main__":
+  unittest.main()
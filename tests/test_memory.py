@@ -0,0 +1,120 @@
+import unittest
+
+import alphasign
+from alphasign import memory
+from alphasign.interfaces.emulator import Emulator
+
+from helpers import Recorder
+
+
+class PlannerTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Emulator()
+    self.text = alphasign.Text("hello", label="A")
+    self.string = alphasign.String("21C", label="T")
+    self.planner = memory.MemoryPlanner()
+
+  def test_first_apply_allocates_and_writes(self):
+    plan = self.planner.apply(self.sign, [self.text, self.string])
+    self.assertNotEqual(plan.allocation, None)
+    self.assertEqual(self.sign.files["A"], "\x1b ahello")
+    self.assertEqual(self.sign.files["T"], "21C")
+    self.assertEqual(self.sign.errors, 0)
+    self.assertEqual(self.planner.reallocations, 1)
+
+  def test_unchanged_files_are_not_sent(self):
+    self.planner.apply(self.sign, [self.text, self.string])
+    packets = self.sign.packets
+    plan = self.planner.apply(self.sign, [self.text, self.string])
+    self.assertEqual(plan, memory.Plan(None, [], []))
+    self.assertEqual(self.sign.packets, packets)
+
+  def test_changed_file_is_written_without_reallocating(self):
+    self.planner.apply(self.sign, [self.text, self.string])
+    self.string.data = "22C"
+    plan = self.planner.apply(self.sign, [self.text, self.string])
+    self.assertEqual(plan.allocation, None)
+    self.assertEqual(plan.writes, [self.string])
+    self.assertEqual(self.sign.files["T"], "22C")
+    self.assertEqual(self.planner.reallocations, 1)
+
+  def test_outgrown_file_reallocates(self):
+    self.planner.apply(self.sign, [self.text, self.string])
+    text = alphasign.Text("x" * 100, label="A")
+    plan = self.planner.apply(self.sign, [text, self.string])
+    self.assertNotEqual(plan.allocation, None)
+    self.assertEqual(self.sign.files["A"], "\x1b a" + "x" * 100)
+    self.assertEqual(self.sign.files["T"], "21C")
+
+  def test_string_headroom_is_capped(self):
+    string = alphasign.String("21C", label="T", size=110)
+    self.planner.apply(self.sign, [self.text, string])
+    self.assertEqual(self.sign.errors, 0)
+    self.assertEqual(self.sign.memory["T"].size, memory.MAX_STRING_SIZE)
+    self.assertEqual(self.sign.files["T"], "21C")
+
+  def test_rejected_allocation_is_not_recorded(self):
+    sign = Emulator(memory_size=600)
+    text = alphasign.Text("hello", label="A", size=125)
+    self.planner.apply(sign, [text])
+    self.assertEqual(sign.errors, 1)  # the file is not written after it
+    self.assertEqual(self.planner.entries, None)
+    sign.memory_size = 1000
+    self.planner.apply(sign, [text])
+    self.assertEqual(sign.errors, 1)
+    self.assertEqual(sign.files["A"], "\x1b ahello")
+
+  def test_silent_sign_is_trusted(self):
+    sign = Recorder()
+    self.planner.apply(sign, [self.text])
+    self.assertEqual(sorted(self.planner.entries), ["A"])
+
+  def test_budget(self):
+    planner = memory.MemoryPlanner(budget=500 + 70)
+    entries = planner.pack([memory.entry(self.text)])
+    self.assertEqual(entries[0].size, 64)  # no room for headroom
+    planner.budget = 500 + 60
+    self.assertRaises(ValueError, planner.pack, [memory.entry(self.text)])
+
+
+class ReconcileTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Emulator()
+    self.text = alphasign.Text("hello", label="A")
+    self.string = alphasign.String("21C", label="T")
+    memory.MemoryPlanner().apply(self.sign, [self.text, self.string])
+
+  def test_files_on_sign_are_kept(self):
+    planner = memory.MemoryPlanner()
+    plan = self.sign.reconcile([self.text, self.string], planner)
+    self.assertEqual(plan.allocation, None)
+    self.assertEqual(plan.writes, [])
+    self.assertEqual(planner.reallocations, 0)
+    self.assertEqual(sorted(planner.written), ["A", "T"])
+
+  def test_only_changed_files_are_written(self):
+    self.string.data = "22C"
+    plan = self.sign.reconcile([self.text, self.string])
+    self.assertEqual(plan.allocation, None)
+    self.assertEqual(plan.writes, [self.string])
+    self.assertEqual(self.sign.files["T"], "22C")
+    self.assertEqual(self.sign.files["A"], "\x1b ahello")
+
+  def test_new_file_reallocates(self):
+    other = alphasign.Text("bye", label="B")
+    plan = self.sign.reconcile([self.text, self.string, other])
+    self.assertNotEqual(plan.allocation, None)
+    self.assertEqual(self.sign.files["B"], "\x1b abye")
+    self.assertEqual(self.sign.files["T"], "21C")
+
+  def test_empty_sign_allocates(self):
+    sign = Emulator()
+    plan = sign.reconcile([self.text])
+    self.assertNotEqual(plan.allocation, None)
+    self.assertEqual(sign.files["A"], "\x1b ahello")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+import alphasign
+from alphasign.interfaces import metrics
+
+from helpers import Recorder
+
+
+class MetricsTest(unittest.TestCase):
+
+  def setUp(self):
+    self.metrics = metrics.Metrics()
+    self.sign = Recorder()
+    self.sign.enable_metrics(self.metrics, name="sign")
+
+  def test_single_packet(self):
+    self.sign.write(alphasign.Text("hello", label="A"))
+    stats = self.metrics.interfaces["sign"]
+    self.assertEqual(stats.packets, 1)
+    self.assertEqual(stats.bytes, len(self.sign.packets[0]))
+    command = self.metrics.commands["sign"]["A"]
+    self.assertEqual(command.bytes, stats.bytes)
+    self.assertEqual(command.latency.sum, stats.latency.sum)
+
+  def test_nested_packet_is_shared_out(self):
+    self.metrics.record_write("sign", ["AAhello world", "GB21C", "E$"], 101,
+                              2.0, True)
+    stats = self.metrics.interfaces["sign"]
+    commands = self.metrics.commands["sign"]
+    self.assertEqual(sorted(commands), ["A", "E$", "G"])
+    self.assertEqual(sum([s.bytes for s in commands.values()]), 101)
+    self.assertEqual(commands["A"].bytes, 65)
+    self.assertEqual(commands["E$"].bytes, 10)
+    self.assertEqual(commands["G"].bytes, 26)  # and the byte rounded off
+    self.assertAlmostEqual(sum([s.latency.sum for s in commands.values()]),
+                           stats.latency.sum)
+    self.assertAlmostEqual(commands["A"].latency.sum, 1.3)
+    for command in commands.values():
+      self.assertEqual(command.packets, 1)
+
+  def test_errors(self):
+    self.metrics.record_write("sign", ["AAhi"], 20, 0.1, False)
+    self.metrics.record_retry("sign")
+    self.assertEqual(self.metrics.interfaces["sign"].errors, 1)
+    self.assertEqual(self.metrics.interfaces["sign"].retries, 1)
+    self.assertEqual(self.metrics.commands["sign"]["A"].errors, 1)
+
+  def test_to_text(self):
+    self.metrics.record_write("sign", ["AAhi", "GBx"], 40, 0.002, True)
+    text = self.metrics.to_text()
+    lines = text.splitlines()
+    self.assertTrue('alphasign_packets_total{interface="sign"} 1' in lines)
+    self.assertTrue('alphasign_bytes_total{interface="sign"} 40' in lines)
+    self.assertTrue('alphasign_command_bytes_total'
+                    '{interface="sign",command="A"} 22' in lines)
+    self.assertTrue('alphasign_command_bytes_total'
+                    '{interface="sign",command="G"} 18' in lines)
+    self.assertTrue('alphasign_write_seconds_count{interface="sign"} 1'
+                    in lines)
+    self.assertFalse("alphasign_command_retries_total" in text)
+
+    # Every sample follows the TYPE line of its metric, and the samples of
+    # one metric are not split up.
+    typed = {}
+    current = None
+    for line in lines:
+      if line.startswith("# TYPE "):
+        current = line.split()[2]
+        self.assertFalse(current in typed)
+        typed[current] = line.split()[3]
+      elif not line.startswith("#"):
+        name = line.split("{")[0]
+        if typed.get(current) == "histogram":
+          self.assertTrue(name in (current + "_bucket", current + "_sum",
+                                   current + "_count"), line)
+        else:
+          self.assertEqual(name, current)
+    self.assertEqual(typed["alphasign_packets_total"], "counter")
+    self.assertEqual(typed["alphasign_command_write_seconds"], "histogram")
+    self.assertTrue("# HELP alphasign_bytes_total Bytes written." in lines)
+
+  def test_escape(self):
+    self.assertEqual(metrics._escape('a"b\\c\nd\x01'), 'a\\"b\\\\c\\nd\x01')
+
+
+if __name__ == "__main__":
+  unittest.main()
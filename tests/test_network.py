@@ -0,0 +1,126 @@
+import socket
+import time
+import unittest
+
+import alphasign
+from alphasign.interfaces import network
+from alphasign.interfaces.emulator import Emulator
+from alphasign.interfaces.network import FakeSignServer, TCP, TCPLoop
+
+
+class TCPTest(unittest.TestCase):
+
+  def setUp(self):
+    self.emulator = Emulator()
+    self.server = FakeSignServer(handler=self.emulator.handle)
+    self.addCleanup(self.server.close)
+    self.sign = TCP("127.0.0.1", self.server.port)
+    self.addCleanup(self.sign.disconnect)
+    self.text = alphasign.Text("hello", label="A")
+    self.emulator.allocate([self.text], targets=0)
+
+  def test_write(self):
+    self.assertTrue(self.sign.write(self.text))
+    self.assertTrue(self.server.wait(1))
+    self.assertEqual(self.server.frames[0].responses[0].data, "\x1b ahello")
+    self.assertEqual(self.emulator.files["A"], "\x1b ahello")
+
+  def test_keepalive(self):
+    self.sign.connect()
+    self.assertTrue(self.sign._sock.getsockopt(socket.SOL_SOCKET,
+                                               socket.SO_KEEPALIVE))
+    self.assertTrue(self.sign._sock.getsockopt(socket.IPPROTO_TCP,
+                                               socket.TCP_NODELAY))
+
+  def test_read_round_trip(self):
+    self.sign.write(self.text)
+    self.assertEqual(self.sign.read_text("A"), "\x1b ahello")
+    self.assertEqual(self.sign.read_memory_configuration(),
+                     [self.emulator.memory["A"]])
+
+  def test_allocate_probing_readiness(self):
+    self.sign.probe_ready = True
+    string = alphasign.String("21C", label="T")
+    start = time.time()
+    self.sign.allocate([self.text, string], targets=0)
+    self.sign.write(string)
+    self.assertEqual(self.sign.read_string("T"), "21C")
+    self.assertTrue(time.time() - start < 1.0)  # the sign answered at once
+
+  def test_reconnect_after_server_drops(self):
+    self.sign.write(self.text)
+    self.assertTrue(self.server.wait(1))
+    self.server.drop()
+    # A write into the closed connection can still look sent; the error
+    # shows on a later one, which drops the socket.
+    for _ in range(100):
+      if self.sign.write(self.text) is False:
+        break
+      time.sleep(0.01)
+    else:
+      self.fail("writes kept succeeding on a dropped connection")
+    self.text.data = "again"
+    received = len(self.server.frames)
+    self.assertTrue(self.sign.write(self.text))
+    self.assertTrue(self.server.wait(received + 1))
+    self.assertEqual(self.server.connections, 2)
+    self.assertEqual(self.server.frames[-1].responses[0].data, "\x1b aagain")
+
+
+@unittest.skipIf(network.selectors is None, "TCPLoop needs selectors")
+class TCPLoopTest(unittest.TestCase):
+
+  def setUp(self):
+    self.loop = TCPLoop()
+    self.addCleanup(self.loop.close)
+    self.emulators = []
+    self.signs = []
+    for _ in range(3):
+      emulator = Emulator()
+      server = FakeSignServer(handler=emulator.handle)
+      self.addCleanup(server.close)
+      emulator.server = server
+      self.emulators.append(emulator)
+      self.signs.append(TCP("127.0.0.1", server.port, loop=self.loop))
+
+  def test_pipelined_writes_to_many_signs(self):
+    texts = [alphasign.Text("message %d" % i, label=chr(ord("A") + i))
+             for i in range(5)]
+    for emulator in self.emulators:
+      emulator.allocate(texts)
+    for sign in self.signs:
+      for text in texts:
+        self.assertTrue(sign.write(text))
+    self.assertTrue(len(self.loop) > 0)  # queued, not sent yet
+    self.assertTrue(self.loop.flush(5))
+    self.assertEqual(len(self.loop), 0)
+    for emulator in self.emulators:
+      self.assertTrue(emulator.server.wait(5))
+      self.assertEqual([f.responses[0].label for f in emulator.server.frames],
+                       list("ABCDE"))
+      self.assertEqual(emulator.files["E"], "\x1b amessage 4")
+
+  def test_read_through_loop(self):
+    text = alphasign.Text("hello", label="A")
+    self.emulators[1].allocate([text])
+    self.signs[1].write(text)
+    self.assertEqual(self.signs[1].read_text("A"), "\x1b ahello")
+
+  def test_slow_command_holds_back_only_its_sign(self):
+    text = alphasign.Text("hello", label="A")
+    self.signs[0].clear_memory()
+    self.signs[0].write(text)
+    self.signs[1].write(text)
+    end = time.time() + 0.5
+    while not self.emulators[1].server.frames and time.time() < end:
+      self.loop.poll(0.05)
+    self.assertEqual(len(self.emulators[1].server.frames), 1)
+    self.assertTrue(self.emulators[0].server.wait(1))
+    self.assertFalse(self.emulators[0].server.wait(2, timeout=0.1))
+    self.assertTrue(len(self.loop) > 0)  # the write after clear_memory
+    self.assertTrue(self.loop.flush(5))
+    self.assertTrue(self.emulators[0].server.wait(2))
+
+
+if __name__ == "__main__":
+  unittest.main()
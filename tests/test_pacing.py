@@ -0,0 +1,59 @@
+import time
+import unittest
+
+import alphasign
+from alphasign.interfaces import base
+from alphasign.interfaces.emulator import Emulator
+
+
+# Seconds the sign is busy after clearing its memory.
+CLEAR_DELAY = base.COMMAND_DELAYS["E$"]
+
+# Allowed scheduling slack, in seconds.
+SLACK = 0.15
+
+
+class PacingTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Emulator(baudrate=None, realtime=True)
+    self.text = alphasign.Text("hello", label="A")
+
+  def timed(self, function, *args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+  def test_clear_memory_returns_at_once(self):
+    self.assertTrue(self.timed(self.sign.clear_memory) < SLACK)
+
+  def test_write_waits_out_the_delay(self):
+    self.sign.clear_memory()
+    waited = self.timed(self.sign.write, self.text)
+    self.assertTrue(CLEAR_DELAY - SLACK < waited < CLEAR_DELAY + SLACK,
+                    waited)
+
+  def test_wait_shortened_by_time_already_passed(self):
+    self.sign.clear_memory()
+    time.sleep(CLEAR_DELAY * 0.6)
+    waited = self.timed(self.sign.write, self.text)
+    self.assertTrue(waited < CLEAR_DELAY * 0.4 + SLACK, waited)
+
+  def test_no_wait_after_delay(self):
+    self.sign.clear_memory()
+    time.sleep(CLEAR_DELAY)
+    self.assertTrue(self.timed(self.sign.write, self.text) < SLACK)
+
+  def test_fast_commands_do_not_wait(self):
+    self.sign.write(self.text)
+    self.sign.set_run_sequence([self.text])
+    self.assertTrue(self.timed(self.sign.write, self.text) < SLACK)
+
+  def test_probe_ends_wait_when_sign_answers(self):
+    self.sign.probe_ready = True
+    self.sign.clear_memory()
+    self.assertTrue(self.timed(self.sign.write, self.text) < SLACK)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import alphasign
+from alphasign import packet
+
+from helpers import Recorder
+
+
+class PacketTest(unittest.TestCase):
+
+  def test_single_command(self):
+    pkt = alphasign.Packet("AAhello")
+    self.assertEqual(pkt.data, b"\0\0\0\0\0\x01Z00\x02AAhello\x04")
+    self.assertEqual(pkt.contents, ["AAhello"])
+    self.assertEqual(len(pkt), len(pkt.data))
+
+  def test_nested_commands(self):
+    pkt = alphasign.Packet(["AAone", "G1two"])
+    self.assertEqual(pkt.data,
+                     b"\0\0\0\0\0\x01Z00\x02AAone\x03\x02G1two\x03\x04")
+    self.assertEqual(len(pkt), packet.nested_size([5, 5]))
+
+  def test_nested_objects(self):
+    text = alphasign.Text("hi", label="A")
+    string = alphasign.String("21C", label="1")
+    pkt = alphasign.Packet.nested([text, string])
+    self.assertEqual(pkt.contents,
+                     packet.commands(text) + packet.commands(string))
+
+  def test_addressed(self):
+    pkt = alphasign.Packet("AAhi", type="1", address="05")
+    self.assertTrue(pkt.explicit)
+    self.assertEqual(pkt.data, b"\0\0\0\0\0\x01105\x02AAhi\x04")
+    copy = pkt.addressed(address="06")
+    self.assertEqual(copy.data, b"\0\0\0\0\0\x01106\x02AAhi\x04")
+
+  def test_bad_address(self):
+    self.assertRaises(ValueError, alphasign.Packet, "AAhi", address="5")
+
+
+class BatchTest(unittest.TestCase):
+
+  def test_commands_nested_in_one_packet(self):
+    sign = Recorder()
+    with sign.batch() as batch:
+      batch.write(alphasign.Text("hi", label="A"))
+      batch.write(alphasign.String("21C", label="1"))
+      batch.set_run_sequence([alphasign.Text("hi", label="A")])
+    self.assertEqual(len(sign.packets), 1)
+    self.assertEqual(sign.packets[0].contents,
+                     ["AA\x1b ahi", "G121C", "E.TUA"])
+
+  def test_max_size_splits_packets(self):
+    sign = Recorder()
+    batch = sign.batch(max_size=packet.nested_size([10, 10]))
+    for label in "ABC":
+      batch.write(alphasign.Packet("A%s12345678" % label))
+    self.assertTrue(batch.flush())
+    self.assertEqual([len(p.contents) for p in sign.packets], [2, 1])
+    for pkt in sign.packets:
+      self.assertTrue(len(pkt) <= batch.max_size)
+
+  def test_slow_command_ends_packet(self):
+    sign = Recorder()
+    with sign.batch() as batch:
+      batch.clear_memory()
+      batch.write(alphasign.Text("hi", label="A"))
+    self.assertEqual([p.contents for p in sign.packets],
+                     [["E$"], ["AA\x1b ahi"]])
+
+  def test_addresses_not_nested_together(self):
+    sign = Recorder()
+    with sign.batch() as batch:
+      batch.at("01").write(alphasign.Text("one", label="A"))
+      batch.at("02").write(alphasign.Text("two", label="A"))
+    self.assertEqual([p.address for p in sign.packets], ["01", "02"])
+
+  def test_exception_discards_commands(self):
+    sign = Recorder()
+    try:
+      with sign.batch() as batch:
+        batch.write(alphasign.Text("hi", label="A"))
+        raise RuntimeError()
+    except RuntimeError:
+      pass
+    self.assertEqual(sign.packets, [])
+
+
+if __name__ == "__main__":
+  unittest.main()
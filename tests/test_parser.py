@@ -0,0 +1,138 @@
+import unittest
+
+import alphasign
+from alphasign import constants
+from alphasign import decoder
+from alphasign import parser
+
+from helpers import Recorder
+
+
+def response(label, data, code="A"):
+  """Encode a sign's response to a read command."""
+  command = constants.STX + code + label + data + constants.ETX
+  return ("\0" * 5 + constants.SOH + "000" + command +
+          parser.checksum(command) + constants.EOT)
+
+
+class PacketParserTest(unittest.TestCase):
+
+  def test_response(self):
+    frames = parser.PacketParser().feed(response("A", "\x1b ahello"))
+    self.assertEqual(len(frames), 1)
+    self.assertEqual(frames[0].type, "0")
+    self.assertEqual(frames[0].address, "00")
+    self.assertEqual(frames[0].responses,
+                     [parser.Response("A", "A", "\x1b ahello")])
+
+  def test_split_across_chunks(self):
+    data = response("1", "21C", code="G") * 2
+    p = parser.PacketParser()
+    frames = []
+    for i in range(0, len(data), 3):
+      frames.extend(p.feed(data[i:i + 3]))
+    self.assertEqual([f.responses[0].data for f in frames], ["21C", "21C"])
+    self.assertEqual(p.errors, 0)
+
+  def test_bad_checksum(self):
+    data = response("A", "hello")[:-5] + "0000" + constants.EOT
+    p = parser.PacketParser()
+    self.assertEqual(p.feed(data), [])
+    self.assertEqual(p.errors, 1)
+
+  def test_cut_short_packet(self):
+    p = parser.PacketParser()
+    frames = p.feed(response("A", "one")[:12] + response("A", "two"))
+    self.assertEqual([f.responses[0].data for f in frames], ["two"])
+    self.assertEqual(p.errors, 1)
+
+  def test_sent_packets_round_trip(self):
+    pkt = alphasign.Packet.nested([alphasign.Text("hi", label="A"),
+                                   alphasign.String("21C", label="1")])
+    frames = parser.PacketParser().feed(pkt.data.decode("latin-1"))
+    self.assertEqual([r.command + r.label + r.data
+                      for r in frames[0].responses], pkt.contents)
+
+  def test_memory_configuration(self):
+    entries = parser.parse_memory_configuration("AAU0040FFFF1BL00080000")
+    self.assertEqual(entries,
+                     [parser.MemoryEntry("A", "A", "U", 64, "FFFF"),
+                      parser.MemoryEntry("1", "B", "L", 8, "0000")])
+
+
+class SplitTest(unittest.TestCase):
+
+  def test_split_packets(self):
+    bodies, errors, rest = parser.split_packets(
+      "noise\x01Z00\x02AAhi\x04\x01cut\x01Z00\x02AAok\x04\0\x01Z0")
+    self.assertEqual(bodies, ["Z00\x02AAhi", "Z00\x02AAok"])
+    self.assertEqual(errors, 1)
+    self.assertEqual(rest, "\x01Z0")
+
+  def test_unfinished_packet_too_long(self):
+    bodies, errors, rest = parser.split_packets("\x01Z00\x02AA" + "x" * 20,
+                                                max_size=10)
+    self.assertEqual((bodies, errors, rest), ([], 1, ""))
+
+  def test_split_commands(self):
+    self.assertEqual(parser.split_commands("Z00\x02AAhi"), ["AAhi"])
+    self.assertEqual(parser.split_commands("Z00"), None)
+    nested = alphasign.Packet(["AAhi", "GAbye"]).data.decode("latin-1")
+    body = nested[nested.index("\x01") + 1:-1]
+    self.assertEqual(parser.split_commands(body), ["AAhi", "GAbye"])
+    command = "\x02AAhi\x03"
+    self.assertEqual(parser.split_commands("000" + command +
+                                           parser.checksum(command)),
+                     ["AAhi"])
+    self.assertEqual(parser.split_commands("000" + command + "0000"), None)
+
+
+class DecoderTest(unittest.TestCase):
+
+  def setUp(self):
+    self.text = alphasign.Text("hello", label="A", mode=alphasign.modes.HOLD)
+    self.string = alphasign.String("21C", label="1")
+
+  def test_round_trip(self):
+    stream = (self.text.packet().data + self.string.packet().data +
+              alphasign.Packet.nested([self.text, self.string]).data)
+    packets = decoder.Decoder().feed(stream)
+    self.assertEqual(len(packets), 3)
+    self.assertEqual(packets[0].commands,
+                     [decoder.WriteText("A", " ", "b", "hello")])
+    self.assertEqual(packets[1].commands, [decoder.WriteString("1", "21C")])
+    self.assertEqual(packets[2].commands,
+                     packets[0].commands + packets[1].commands)
+
+  def test_chunked_with_noise(self):
+    stream = (b"noise" + self.text.packet().data + b"\xff\x00" +
+              self.string.packet().data)
+    d = decoder.Decoder()
+    packets = []
+    for i in range(len(stream)):
+      packets.extend(d.feed(stream[i:i + 1]))
+    self.assertEqual(len(packets), 2)
+    self.assertEqual(d.errors, 0)
+
+  def test_special_functions(self):
+    sign = Recorder()
+    sign.allocate([self.text, self.string], targets=0)
+    sign.set_run_sequence([self.text])
+    d = decoder.Decoder()
+    commands = [p.commands[0] for p in
+                d.feed(b"".join([p.data for p in sign.packets]))]
+    self.assertEqual(commands[0].value,
+                     [parser.MemoryEntry("A", "A", "U", 64, "FFFF"),
+                      parser.MemoryEntry("1", "B", "L", 32, "0000")])
+    self.assertEqual(commands[1].value, ["A"])
+
+  def test_cut_short_packet(self):
+    d = decoder.Decoder()
+    packets = d.feed(self.text.packet().data[:12] +
+                     self.string.packet().data)
+    self.assertEqual(len(packets), 1)
+    self.assertEqual(d.errors, 1)
+
+
+if __name__ == "__main__":
+  unittest.main()
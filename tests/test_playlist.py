@@ -0,0 +1,62 @@
+import unittest
+
+import alphasign
+from alphasign.interfaces.emulator import Emulator
+from alphasign.playlist import Playlist
+
+
+class PlaylistTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Emulator()
+    self.weather = alphasign.Text("sunny", label="A")
+    self.news = alphasign.Text("news", label="B")
+    self.temp = alphasign.String("21C", label="T")
+
+  def test_show_and_rotate(self):
+    playlist = Playlist(self.sign, [self.weather, self.news, self.temp])
+    playlist.show(self.news)
+    self.assertEqual(self.sign.run_sequence, "B")
+    self.assertEqual(self.sign.files["T"], "21C")
+    playlist.rotate()
+    self.assertEqual(self.sign.run_sequence, "A")
+    playlist.rotate()
+    self.assertEqual(self.sign.run_sequence, "B")
+    self.assertEqual(self.sign.errors, 0, self.sign.last_error)
+
+  def test_rotate_after_show_moves_on(self):
+    playlist = Playlist(self.sign, [self.weather, self.news])
+    playlist.show(0)
+    playlist.rotate()
+    self.assertEqual(self.sign.run_sequence, "B")
+
+  def test_text_label_collision_adds_a_copy(self):
+    playlist = Playlist(self.sign, [self.weather])
+    other = alphasign.Text("rain", label="A")
+    added = playlist.add(other)
+    self.assertFalse(added is other)
+    self.assertEqual(other.label, "A")
+    self.assertNotEqual(added.label, "A")
+    playlist.show(added)
+    self.assertEqual(self.sign.run_sequence, added.label)
+    self.assertEqual(self.sign.files[added.label], "\x1b arain")
+
+  def test_string_label_collision(self):
+    playlist = Playlist(self.sign, [self.temp])
+    other = alphasign.String("40%", label="T")
+    self.assertRaises(ValueError, playlist.add, other)
+    self.assertEqual(other.label, "T")
+    self.assertEqual(playlist.files, [self.temp])
+
+  def test_unchanged_messages_not_written_again(self):
+    playlist = Playlist(self.sign, [self.weather, self.news])
+    playlist.show(0)
+    self.weather.data = "rain"
+    playlist.show(0, 1)
+    self.assertEqual(playlist.uploads, 3)
+    self.assertEqual(playlist.switches, 2)
+    self.assertEqual(self.sign.files["A"], "\x1b arain")
+
+
+if __name__ == "__main__":
+  unittest.main()
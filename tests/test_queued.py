@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+import alphasign
+from alphasign.interfaces.queued import CoalescingWriter
+
+from helpers import Recorder
+
+
+class Blocked(Recorder):
+  """Interface whose writes wait until released."""
+
+  def __init__(self):
+    Recorder.__init__(self)
+    self.release = threading.Event()
+
+  def _write(self, pkt):
+    self.release.wait()
+    return Recorder._write(self, pkt)
+
+
+class CoalescingWriterTest(unittest.TestCase):
+
+  def setUp(self):
+    self.sign = Blocked()
+    self.writer = CoalescingWriter(self.sign)
+    self.addCleanup(self.writer.close, False)
+    self.addCleanup(self.sign.release.set)
+    # Hold the writer thread on a first packet so later writes queue up.
+    self.writer.write(alphasign.Packet("E.TUA"))
+    while self.writer.depth:
+      time.sleep(0.001)
+
+  def sent(self):
+    self.sign.release.set()
+    self.writer.flush()
+    return [(p.address, p.contents[0]) for p in self.sign.packets[1:]]
+
+  def test_newer_data_replaces_queued_write(self):
+    text = alphasign.Text("one", label="A")
+    self.writer.write(text)
+    text.data = "two"
+    self.writer.write(text)
+    self.assertEqual(self.sent(), [("00", "AA\x1b atwo")])
+    self.assertEqual(self.writer.superseded, 1)
+
+  def test_clear_memory_is_not_crossed(self):
+    text = alphasign.Text("one", label="A")
+    self.writer.write(text)
+    self.writer.clear_memory()
+    text.data = "two"
+    self.writer.write(text)
+    self.assertEqual([c for _, c in self.sent()],
+                     ["AA\x1b aone", "E$", "AA\x1b atwo"])
+    self.assertEqual(self.writer.superseded, 0)
+
+  def test_addresses_queued_separately(self):
+    text = alphasign.Text("one", label="A")
+    self.writer.at("01").write(text)
+    self.writer.at("02").write(text)
+    self.assertEqual([a for a, _ in self.sent()], ["01", "02"])
+    self.assertEqual(self.writer.superseded, 0)
+
+  def test_group_write_not_reordered(self):
+    text = alphasign.Text("one", label="A")
+    self.writer.at("01").write(text)
+    text.data = "all"
+    self.writer.write(text)
+    text.data = "two"
+    self.writer.at("01").write(text)
+    self.assertEqual(self.sent(), [("01", "AA\x1b aone"),
+                                   ("00", "AA\x1b aall"),
+                                   ("01", "AA\x1b atwo")])
+
+
+if __name__ == "__main__":
+  unittest.main()
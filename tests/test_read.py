@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import alphasign
+from alphasign import parser
+from alphasign.interfaces.capture import Recorder as CaptureRecorder
+from alphasign.interfaces.emulator import Emulator
+from alphasign.interfaces.managed import ManagedConnection
+from alphasign.interfaces.local import DebugInterface
+
+from helpers import Recorder
+
+
+# CPU time, to check that waiting does not spin (time.clock on Python 2).
+_cpu_time = getattr(time, "process_time", None) or time.clock
+
+
+class Silent(Recorder):
+  """Interface that can receive, to a sign that never answers."""
+
+  def _read(self, size):
+    return ""
+
+
+class ReadTest(unittest.TestCase):
+
+  def test_reads_from_emulator(self):
+    sign = Emulator()
+    text = alphasign.Text("hello", label="A")
+    string = alphasign.String("21C", label="1")
+    sign.allocate([text, string], targets=0)
+    sign.write(text)
+    sign.write(string)
+    self.assertEqual(sign.read_text("A"), "\x1b ahello")
+    self.assertEqual(sign.read_string("1"), "21C")
+    self.assertEqual(sorted(sign.read_memory_configuration()),
+                     [parser.MemoryEntry("1", "B", "L", 32, "0000"),
+                      parser.MemoryEntry("A", "A", "U", 64, "FFFF")])
+
+  def test_no_receive_path_returns_at_once(self):
+    for sign in (DebugInterface(), Recorder(), Recorder().batch()):
+      sign.debug = False
+      start = time.time()
+      self.assertEqual(sign.read_time(), None)
+      self.assertTrue(time.time() - start < 0.5)
+
+  def test_wrappers_of_write_only_interfaces_return_at_once(self):
+    path = os.path.join(tempfile.mkdtemp(), "capture.bin")
+    self.addCleanup(shutil.rmtree, os.path.dirname(path))
+    capture = CaptureRecorder(Recorder(), path)
+    self.addCleanup(capture.close)
+    for sign in (Recorder().at("01"), ManagedConnection(Recorder()),
+                 capture):
+      start = time.time()
+      self.assertEqual(sign.read_time(), None)
+      self.assertTrue(time.time() - start < 0.5)
+    self.assertTrue(Emulator().at("00")._receives())
+
+  def test_silent_sign_does_not_spin(self):
+    sign = Silent().at("01")
+    sign.read_timeout = 0.3
+    start_cpu = _cpu_time()
+    self.assertEqual(sign.read_time(), None)
+    self.assertTrue(_cpu_time() - start_cpu < 0.15)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import alphasign
+from alphasign import memory
+from alphasign import time
+from alphasign.interfaces.emulator import Emulator
+from alphasign.schedule import Schedule
+from alphasign.time import run_times
+
+from helpers import Recorder
+
+
+class RunTimesTest(unittest.TestCase):
+
+  def test_codes(self):
+    self.assertEqual(run_times(), "FFFF")
+    self.assertEqual(run_times("06:00", (10, 30)), "243F")
+    self.assertRaises(ValueError, run_times, "06:05", "10:00")
+
+  def test_both_or_neither(self):
+    self.assertRaises(ValueError, run_times, "06:00")
+    self.assertRaises(ValueError, run_times, None, "10:00")
+    text = alphasign.Text("hi", label="A", start="06:00")
+    self.assertRaises(ValueError, memory.entry, text)
+
+  def test_codes_need_no_stop(self):
+    self.assertEqual(run_times(time.ALL_DAY), "FDFF")
+    self.assertEqual(run_times(time.NEVER), "FEFF")
+    text = alphasign.Text("hi", label="A", start=time.ALL_DAY)
+    self.assertEqual(memory.entry(text).qqqq, "FDFF")
+    Schedule().add(text, time.ALWAYS)
+
+
+class ScheduleTest(unittest.TestCase):
+
+  def setUp(self):
+    self.breakfast = alphasign.Text("eggs", label="A")
+    self.lunch = alphasign.Text("soup", label="B")
+
+  def test_start_without_stop(self):
+    day = Schedule()
+    self.assertRaises(ValueError, day.add, self.breakfast, "06:00")
+    self.assertRaises(ValueError, day.add, self.breakfast, None, "10:00")
+    self.assertEqual(day.slots, [])
+
+  def test_upload(self):
+    sign = Emulator()
+    day = Schedule()
+    day.add(self.breakfast, "06:00", "10:30")
+    day.add(self.lunch, "11:00", "14:00")
+    day.add(self.breakfast, "17:00", "19:00")
+    day.upload(sign)
+    self.assertEqual(sign.errors, 0, sign.last_error)
+    self.assertEqual(sign.run_sequence, "ABC")
+    self.assertEqual([sign.memory[label].qqqq for label in "ABC"],
+                     ["243F", "4254", "6672"])
+    self.assertEqual(sign.files["C"], sign.files["A"])
+
+  def test_upload_through_planner_sets_times_in_place(self):
+    sign = Emulator()
+    planner = memory.MemoryPlanner()
+    day = Schedule()
+    day.add(self.breakfast, "06:00", "10:30")
+    day.upload(sign, planner)
+    later = Schedule()
+    later.add(self.breakfast, "07:00", "11:00")
+    later.upload(sign, planner)
+    self.assertEqual(planner.reallocations, 1)
+    self.assertEqual(sign.memory["A"].qqqq, "2A42")
+    self.assertEqual(sign.errors, 0, sign.last_error)
+
+
+class SetRunTimesTest(unittest.TestCase):
+
+  def test_empty_list_sends_nothing(self):
+    sign = Recorder()
+    self.assertTrue(sign.set_run_times([]))
+    self.assertEqual(sign.packets, [])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import alphasign
+from alphasign import memory
+from alphasign.interfaces.emulator import Emulator
+
+from helpers import Recorder
+
+
+class TemplateTest(unittest.TestCase):
+
+  def setUp(self):
+    self.template = alphasign.Template("Gate %(gate)s at %(time)s 100%%",
+                                       label="A", mode=alphasign.modes.HOLD,
+                                       size=24)
+
+  def test_fields(self):
+    self.assertEqual(self.template.fields, ["gate", "time"])
+
+  def test_packet(self):
+    pkt = self.template.packet(gate="12", time="10:45")
+    self.assertEqual(pkt.contents, ["AA\x1b bGate 12 at 10:45 100%"])
+    self.assertEqual(self.template.packet("12", "10:45").data, pkt.data)
+
+  def test_same_as_text(self):
+    text = alphasign.Text("Gate 12 at 10:45 100%", label="A",
+                          mode=alphasign.modes.HOLD)
+    self.assertEqual(self.template.packet(gate="12", time="10:45").data,
+                     text.packet().data)
+
+  def test_missing_field(self):
+    self.assertRaises(ValueError, self.template.packet, gate="12")
+    self.assertRaises(ValueError, self.template.packet)
+
+  def test_unfilled_template_cannot_be_written(self):
+    sign = Recorder()
+    self.assertRaises(ValueError, sign.write, self.template)
+    self.assertEqual(sign.packets, [])
+    self.assertRaises(ValueError, alphasign.packet.commands, self.template)
+
+  def test_fill_checked_against_size(self):
+    self.assertEqual(self.template.size, 24)
+    self.template.packet(gate="12345", time="10:45")  # exactly 24 bytes
+    self.assertRaises(ValueError, self.template.packet, gate="123456",
+                      time="10:45")
+    self.assertRaises(ValueError, self.template.packet, "123456", "10:45")
+
+  def test_size_covers_static_text(self):
+    template = alphasign.Template("x" * 80 + "%(a)s", size=10)
+    self.assertEqual(template.size, 80)
+
+  def test_without_fields(self):
+    template = alphasign.Template("hello", label="B")
+    sign = Emulator()
+    memory.MemoryPlanner().apply(sign, [template])
+    self.assertEqual(sign.files["B"], "\x1b ahello")
+
+  def test_on_emulator(self):
+    sign = Emulator()
+    sign.allocate([self.template], targets=0)
+    sign.set_run_sequence([self.template])
+    sign.write(self.template.packet(gate="12", time="10:45"))
+    self.assertEqual(sign.errors, 0, sign.last_error)
+    self.assertEqual(sign.memory["A"].size, 24)
+    self.assertEqual(sign.files["A"], "\x1b bGate 12 at 10:45 100%")
+    self.assertEqual(sign.run_sequence, "A")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import usb
+
+import alphasign
+from alphasign import packet
+from alphasign.interfaces import local
+
+
+class FakeConnection(object):
+
+  max_packet_size = 64
+
+  def __init__(self, fail=False):
+    self.fail = fail
+    self.writes = []
+    self.releases = 0
+
+  def write(self, data, timeout):
+    if self.fail:
+      raise usb.USBError("write failed")
+    self.writes.append(data)
+    return len(data)
+
+  def release(self):
+    self.releases += 1
+
+
+class FakeUSB(local.USB):
+
+  def __init__(self, fail=False):
+    local.USB.__init__(self, (0x8765, 0x1234))
+    self.fail = fail
+    self.connections = []
+
+  def connect(self, reset=True):
+    if not self._conn:
+      self._conn = FakeConnection(self.fail)
+      self.connections.append(self._conn)
+
+
+class USBTest(unittest.TestCase):
+
+  def test_zero_length_packet_after_every_transfer(self):
+    sign = FakeUSB()
+    sign.write(alphasign.Text("hello", label="A"))
+    self.assertEqual(len(sign._conn.writes), 2)
+    self.assertEqual(sign._conn.writes[1], b"")
+
+  def test_zero_length_packet_only_when_needed(self):
+    sign = FakeUSB()
+    sign.always_zlp = False
+    sign.write(alphasign.Text("hello", label="A"))
+    self.assertEqual(len(sign._conn.writes), 1)
+    text = alphasign.Text("x", label="A")
+    text.data = "x" * (65 - len(packet.as_packet(text)))  # one full packet
+    sign.write(text)
+    self.assertEqual(len(sign._conn.writes[1]), 64)
+    self.assertEqual(sign._conn.writes[2:], [b""])
+
+  def test_coalesced_packets_share_a_transfer(self):
+    sign = FakeUSB()
+    with sign.coalesce():
+      sign.write(alphasign.Text("hello", label="A"))
+      sign.write(alphasign.String("21C", label="1"))
+      self.assertEqual(sign.transfers, 0)
+    self.assertEqual(sign.transfers, 2)
+
+  def test_disconnect_after_failed_flush(self):
+    sign = FakeUSB(fail=True)
+    sign.connect()
+    with sign.coalesce():
+      sign.write(alphasign.Text("hello", label="A"))
+      sign.disconnect()
+    self.assertEqual(sign._conn, None)
+    self.assertEqual([c.releases for c in sign.connections], [1, 1])
+
+
+if __name__ == "__main__":
+  unittest.main()